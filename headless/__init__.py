@@ -0,0 +1,62 @@
+"""Run Wrap Plus outside of Sublime Text.
+
+`install()` registers in-memory stand-ins for the `sublime`, `sublime_plugin`
+and `Default.comment` modules, unless the real ones are available, and then
+imports the plugin, so its commands run unchanged over `headless.sublime.View`
+objects holding plain text.
+"""
+import os
+import sys
+import types
+import importlib
+
+PACKAGE_ROOT_DIRECTORY = os.path.dirname( os.path.dirname( os.path.realpath( __file__ ) ) )
+PACKAGE_NAME = __name__.rpartition( '.' )[0]
+
+is_installed = False
+
+
+def install(plugin=True):
+    """Register the stand-in modules and import the plugin.
+
+    :param plugin: whether to import the plugin, or only register the stand-ins
+    :returns: The `wrap_plus` plugin module, or None without `plugin`.
+    """
+    global is_installed
+
+    if not is_installed:
+        is_installed = True
+
+        try:
+            import sublime
+            import sublime_plugin
+
+        except ImportError:
+            from . import sublime
+            from . import sublime_plugin
+            from . import comment
+
+            default = types.ModuleType( 'Default' )
+            default.__path__ = []
+            default.comment = comment
+
+            sys.modules['sublime'] = sublime
+            sys.modules['sublime_plugin'] = sublime_plugin
+            sys.modules.setdefault( 'Default', default )
+            sys.modules.setdefault( 'Default.comment', comment )
+
+            _load_package_settings( sublime )
+
+    return importlib.import_module( PACKAGE_NAME + '.wrap_plus' ) if plugin else None
+
+
+def _load_package_settings(sublime):
+    settings_path = os.path.join( PACKAGE_ROOT_DIRECTORY, 'Preferences.sublime-settings' )
+
+    with open( settings_path, encoding='utf-8' ) as settings_file:
+        defaults = sublime.decode_value( settings_file.read() )
+
+    settings = sublime.load_settings( 'Preferences.sublime-settings' )
+
+    for key, value in defaults.items():
+        settings.set( key, value )
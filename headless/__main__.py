@@ -0,0 +1,27 @@
+"""Run the command line batch reformatter, see `headless.cli`, or the
+benchmarks with `benchmark` as the first argument, see `headless.benchmark`.
+
+From the directory containing the package, run `python -m "Wrap Plus.headless"`,
+or `python -m headless` from inside the package directory.
+"""
+import os
+import sys
+import importlib
+
+if __package__ in (None, '', 'headless'):
+    # The plugin is imported by the package name, so run from its parent directory
+    PACKAGE_ROOT_DIRECTORY = os.path.dirname( os.path.dirname( os.path.realpath( __file__ ) ) )
+    sys.path.insert( 0, os.path.dirname( PACKAGE_ROOT_DIRECTORY ) )
+
+    cli = importlib.import_module( os.path.basename( PACKAGE_ROOT_DIRECTORY ) + '.headless.cli' )
+
+else:
+    from . import cli
+
+if __name__ == '__main__':
+
+    if sys.argv[1:2] in (['benchmark'], ['differential']):
+        tool = importlib.import_module( cli.__package__ + '.' + sys.argv[1] )
+        sys.exit( tool.main( sys.argv[2:] ) )
+
+    sys.exit( cli.main() )
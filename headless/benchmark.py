@@ -0,0 +1,569 @@
+"""Benchmarks of the wrapping entry points, with JSON baselines.
+
+    python -m headless benchmark run --output baseline.json
+    python -m headless benchmark run --output current.json
+    python -m headless benchmark compare baseline.json current.json --threshold 0.1
+
+Each entry point (`find_paragraphs`, `classic_wrap`, `semantic_line_wrap`,
+`balance`, the `textwrap` kernel, the `check` of the wrapping violations,
+and the `wrap_comments` of the whole file by the headless stream) runs over
+corpora of increasing size,
+derived from the `tests/wrap_tests` fixtures of each syntax and from seeded
+synthetic generators.  The paragraphs and their prefixes are found before
+timing the wrapping entry points, so each one times only its own work.  The
+wall time is the best of the repeats, and the allocations are the peak of
+memory traced by `tracemalloc` on a separate run.
+
+The startup costs are timed on fresh processes: `import` is the import of
+the plugin, `first_wrap` is the first `wrap_lines_plus` just after it, paying
+for everything deferred to the first use, and `prewarmed_wrap` is the first
+wrapping after `wrap_plus.prewarm()`, as run by `plugin_loaded()`.  Their
+memory is not traced.
+
+The typing costs are timed on a text of 50 thousand lines, with the caret on
+its middle: `auto_wrap_keystroke` is the check of `WrapPlus.auto_wrap` run on
+each edit, for a line still under the width, `auto_wrap_reflow` is the
+wrapping of the paragraph of a line which got over the width, and
+`over_width_keystroke` is the update of the `WrapPlus.highlight_over_width`
+highlights, with thousands of paragraphs over the width.  Their results
+have the `target_seconds` they should take, so typing never stalls.  The
+stand-in views scan their scopes again after each edit, which is not timed, as
+Sublime Text does it incrementally.
+
+`compare` flags the cases which got slower, or allocating more, than the
+threshold ratio, exiting with 1 when there is some regression.
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import random
+import collections
+import importlib
+import subprocess
+import argparse
+import platform
+import tracemalloc
+
+from . import install
+from . import stream
+from . import mapped
+from . import syntaxes
+from . import PACKAGE_ROOT_DIRECTORY
+
+ENTRY_POINTS = ['find_paragraphs', 'classic_wrap', 'semantic_line_wrap', 'balance', 'textwrap', 'check', 'wrap_comments']
+STARTUP_POINTS = ['import', 'first_wrap', 'prewarmed_wrap']
+TYPING_POINTS = ['auto_wrap_keystroke', 'auto_wrap_reflow', 'over_width_keystroke']
+TYPING_LINES = 50000
+TYPING_TARGET_SECONDS = 0.016
+DEFAULT_SIZES = [1, 4, 16]
+
+WORDS = ("lorem ipsum dolor sit amet consectetuer adipiscing elit aenean commodo ligula eget massa cum sociis "
+         "natoque penatibus et magnis dis parturient montes nascetur ridiculus mus donec quam felis ultricies "
+         "nec pellentesque eu pretium quis sem nulla consequat enim pede justo fringilla vel aliquet").split()
+
+fixture_start_pattern = re.compile( r'^===.*\n', re.MULTILINE )
+
+
+def fixture_texts(file_name):
+    """:returns: The syntax and the original texts of the cases of a `tests/wrap_tests` fixture."""
+    with open( os.path.join( PACKAGE_ROOT_DIRECTORY, 'tests', 'wrap_tests', file_name ), encoding='utf-8' ) as input_file:
+        contents = input_file.read().replace( '\r\n', '\n' )
+
+    syntax, _, contents = contents.partition( '\n' )
+    texts = []
+
+    for case in fixture_start_pattern.split( contents )[1:]:
+        original = re.split( '^---\n', case, flags=re.MULTILINE )[0]
+        texts.append( original.replace( '<START>', '' ).replace( '<END>', '' ) )
+
+    return syntax, texts
+
+
+def generate_sentence(randomizer, words_count):
+    words = [randomizer.choice( WORDS ) for _ in range( words_count )]
+
+    for index in range( 3, len( words ) - 1, randomizer.randint( 4, 9 ) ):
+        words[index] += randomizer.choice( ',,;:' )
+
+    return ' '.join( words ).capitalize() + randomizer.choice( '..?!' )
+
+
+def generate_prose(randomizer, paragraphs):
+    """Paragraphs of long unwrapped lines of sentences."""
+    return '\n\n'.join( ' '.join( generate_sentence( randomizer, randomizer.randint( 6, 24 ) )
+            for _ in range( randomizer.randint( 2, 8 ) ) ) for _ in range( paragraphs ) ) + '\n'
+
+
+def generate_lists(randomizer, paragraphs):
+    """Numbered, lettered and bulleted lists, with wrapped items."""
+    items = []
+
+    for index in range( paragraphs * 3 ):
+        marker = randomizer.choice( ['%d.' % ( index + 1 ), '-', '*', 'a)'] )
+        items.append( '%s %s' % (marker, generate_sentence( randomizer, randomizer.randint( 10, 30 ) )) )
+
+    return '\n'.join( items ) + '\n'
+
+
+def generate_comments(randomizer, paragraphs):
+    """Python code with comment blocks and docstrings."""
+    blocks = []
+
+    for index in range( paragraphs ):
+        comment = generate_sentence( randomizer, randomizer.randint( 12, 40 ) )
+        docstring = generate_sentence( randomizer, randomizer.randint( 12, 40 ) )
+        blocks.append( '# %s\ndef function_%d():\n    """%s\n    """\n    pass\n' % (comment, index, docstring) )
+
+    return '\n'.join( blocks )
+
+
+def generate_wrapped_prose(randomizer, lines_count, width=72):
+    """Paragraphs of 2 to 8 lines already wrapped, with `lines_count` lines at all."""
+    lines = []
+
+    while len( lines ) < lines_count:
+        words = generate_sentence( randomizer, randomizer.randint( 20, 80 ) ).split()
+        line = words[0]
+
+        for word in words[1:]:
+
+            if len( line ) + 1 + len( word ) > width:
+                lines.append( line )
+                line = word
+
+            else:
+                line += ' ' + word
+
+        lines.extend( [line, ''] )
+
+    return '\n'.join( lines[:lines_count] ) + '\n'
+
+
+def generate_comma_run(size):
+    """A single sentence with `size` comma separated words, for `is_comma_separated_list()`."""
+    return ', '.join( ['word'] * size ) + '.\n'
+
+
+def generate_numbered_lines(size):
+    """Lines like `2. ` which are not a real numbered list, for `_is_real_numbered_list()`."""
+    return '2. item text\n' * size
+
+
+def generate_email_quotes(size):
+    """Lines quoted up to 20 levels deep, each one a new paragraph for `set_comments()`."""
+    return ''.join( '> ' * ( 1 + index % 20 ) + 'quoted text line\n' for index in range( size ) )
+
+
+def generate_long_word(size):
+    """A single word with `size` characters, for the balancing loops."""
+    return 'x' * size + '\n'
+
+
+def generate_c_comment_paragraphs(size):
+    """A C block comment with `size` paragraphs, each one scanning the comment on `set_comments()`."""
+    return '/*\n' + ' * some comment text line\n *\n' * size + ' */\nint x;\n'
+
+
+def generate_docstring_paragraphs(size):
+    """A Python docstring with `size` paragraphs, each blank line inside it checked by `segment_blocks()`."""
+    return 'def function():\n    """Docstring.\n\n' + '    some docstring text line\n\n' * size + '    """\n'
+
+
+# The worst cases of the paragraph scanning and wrapping, as (name, syntax,
+# generator, base_size, entry_points) tuples, for the complexity guard tests
+ADVERSARIAL_CORPORA = [
+    ('comma-run', "Packages/Text/Plain text.tmLanguage", generate_comma_run, 400,
+        ['semantic_line_wrap', 'balance', 'classic_wrap']),
+    ('numbered-lines', "Packages/Text/Plain text.tmLanguage", generate_numbered_lines, 300,
+        ['find_paragraphs', 'semantic_line_wrap']),
+    ('email-quotes', "Packages/Text/Plain text.tmLanguage", generate_email_quotes, 300,
+        ['find_paragraphs', 'classic_wrap']),
+    ('long-word', "Packages/Text/Plain text.tmLanguage", generate_long_word, 32 * 1024,
+        ['find_paragraphs', 'semantic_line_wrap', 'balance', 'classic_wrap', 'textwrap']),
+    ('c-comment-paragraphs', "Packages/C++/C.sublime-syntax", generate_c_comment_paragraphs, 150,
+        ['find_paragraphs']),
+    ('docstring-paragraphs', "Packages/Python/Python.sublime-syntax", generate_docstring_paragraphs, 500,
+        ['segment_blocks', 'segment_mapped_blocks']),
+]
+
+
+def make_corpora(sizes, seed=0):
+    """:returns: A list of (name, syntax, size, text) tuples, where size is
+        how many times the base corpus is repeated or generated.
+    """
+    corpora = []
+
+    for file_name in sorted( os.listdir( os.path.join( PACKAGE_ROOT_DIRECTORY, 'tests', 'wrap_tests' ) ) ):
+        syntax, texts = fixture_texts( file_name )
+        base = '\n'.join( texts )
+
+        for size in sizes:
+            corpora.append( ('fixture-' + file_name, syntax, size, '\n'.join( [base] * size )) )
+
+    generators = [
+        ('synthetic-prose', "Packages/Text/Plain text.tmLanguage", generate_prose),
+        ('synthetic-lists', "Packages/Text/Plain text.tmLanguage", generate_lists),
+        ('synthetic-comments', "Packages/Python/Python.sublime-syntax", generate_comments),
+    ]
+
+    for name, syntax, generator in generators:
+
+        for size in sizes:
+            corpora.append( (name, syntax, size, generator( random.Random( seed ), 20 * size )) )
+
+    return corpora
+
+
+class Engine(object):
+    """A `wrap_lines_plus` command prepared over a corpus, with its paragraphs
+    and their prefixes found, so each entry point can be timed alone.
+    """
+
+    def __init__(self, syntax, text, settings=None, width=80, entry_points=ENTRY_POINTS):
+        wrap_plus = install()
+
+        import sublime
+        self.sublime = sublime
+        self.py_textwrap = importlib.import_module( wrap_plus.__name__.rpartition( '.' )[0] + '.py_textwrap' )
+
+        self.syntax = syntaxes.find_syntax( syntax )
+        self.text = text
+        self.settings = settings or {}
+        self.width = width
+
+        self.view = sublime.View( text, self.syntax, self.settings )
+        self.command = wrap_plus.WrapLinesPlusCommand( self.view )
+        self.line_wrapper_type = self.command._prepare_wrap( width, 'classic' )
+
+        self.paragraphs = self.find_paragraphs()
+        self.prefixed = [self.command._extract_prefix( paragraph ) for paragraph in self.paragraphs]
+        # The input of the balancing is the semantic wrap output
+        self.semantic_lines = [self.command.semantic_line_wrap( lines, initial_indent, subsequent_indent, 0.0, False, True )
+                for initial_indent, subsequent_indent, lines in self.prefixed] if 'balance' in entry_points else None
+
+    def find_paragraphs(self):
+        # A caret on each line finds every paragraph, as a single selection
+        # with all the text stops on the first change of comment or quoting
+        carets = self.command._lines_carets( [self.sublime.Region( 0, self.view.size() )] )
+        return self.command._find_selections_paragraphs( carets )
+
+    def classic_wrap(self):
+        for initial_indent, subsequent_indent, lines in self.prefixed:
+            self.command.classic_wrap_text( self.command._make_text_wrapper(), lines, initial_indent, subsequent_indent )
+
+    def semantic_line_wrap(self):
+        for initial_indent, subsequent_indent, lines in self.prefixed:
+            self.command.semantic_line_wrap( lines, initial_indent, subsequent_indent )
+
+    def balance(self):
+        for (initial_indent, subsequent_indent, lines), semantic_lines in zip( self.prefixed, self.semantic_lines ):
+            self.command.balance_characters_between_line_wraps( self.command._make_text_wrapper(), semantic_lines,
+                    initial_indent, subsequent_indent )
+
+    def textwrap(self):
+        wrapper = self.py_textwrap.TextWrapper( width=self.command._width, break_long_words=False, break_on_hyphens=False )
+
+        for initial_indent, subsequent_indent, lines in self.prefixed:
+            wrapper.wrap( ' '.join( lines ) )
+
+
+    def check(self):
+        self.command._check_paragraphs( self.paragraphs, self.line_wrapper_type )
+
+    def segment_blocks(self):
+        stream_wrapper = stream.StreamWrapper( self.syntax, self.settings, self.width, 'classic' )
+        collections.deque( stream_wrapper.segment_blocks( io.StringIO( self.text ) ), maxlen=0 )
+
+    def segment_mapped_blocks(self):
+        mapped_wrapper = mapped.MappedWrapper( self.syntax, self.settings, self.width, 'classic' )
+        collections.deque( mapped_wrapper.segment_blocks( mapped.LineIndex( self.text.encode( 'utf-8' ) ) ), maxlen=0 )
+
+    def wrap_comments(self):
+        stream.wrap_file( io.StringIO( self.text ), None, self.syntax, self.settings, self.width, 'classic',
+                comments_only=True )
+
+
+def measure(function, repeats):
+    """:returns: The best wall time of the repeats and the peak of traced memory."""
+    best = float( 'inf' )
+
+    for _ in range( repeats ):
+        start = time.perf_counter()
+        function()
+        best = min( best, time.perf_counter() - start )
+
+    tracemalloc.start()
+
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+
+def startup_probe(prewarm=False, output_file=None):
+    """Time the import of the plugin and its first wrapping, writing them as
+    JSON, on a fresh process started by `measure_startup()`.
+    """
+    install( plugin=False )
+
+    import sublime
+    import sublime_plugin
+
+    view = sublime.View( generate_prose( random.Random( 0 ), 2 ),
+            syntaxes.find_syntax( "Packages/Text/Plain text.tmLanguage" ), {} )
+    view.sel().add( sublime.Region( 0, view.size() ) )
+    view.scope_name( 0 )
+
+    start = time.perf_counter()
+    wrap_plus = install()
+    import_seconds = time.perf_counter() - start
+
+    if prewarm:
+        wrap_plus.prewarm()
+
+    start = time.perf_counter()
+    sublime_plugin.run_text_command( view, 'wrap_lines_plus', {} )
+    wrap_seconds = time.perf_counter() - start
+
+    json.dump( {'import': import_seconds, 'wrap': wrap_seconds}, output_file or sys.stdout )
+
+
+def measure_startup(repeats):
+    """:returns: A dict with the best time of each of the `STARTUP_POINTS`."""
+    best = dict.fromkeys( STARTUP_POINTS, float( 'inf' ) )
+
+    for prewarm in (False, True):
+
+        for _ in range( repeats ):
+            output = subprocess.check_output( [sys.executable, '-c',
+                    "import sys, importlib; sys.path.insert( 0, %r ); "
+                    "importlib.import_module( %r ).startup_probe( %r )" % (
+                    os.path.dirname( PACKAGE_ROOT_DIRECTORY ), __name__, prewarm)] )
+
+            timings = json.loads( output.decode( 'utf-8' ) )
+            wrap_point = 'prewarmed_wrap' if prewarm else 'first_wrap'
+
+            best['import'] = min( best['import'], timings['import'] )
+            best[wrap_point] = min( best[wrap_point], timings['wrap'] )
+
+    return best
+
+
+def measure_typing(repeats, lines_count=TYPING_LINES, seed=0):
+    """:returns: A dict with the best time of each of the `TYPING_POINTS`,
+        typing at the end of the middle line of a text with `lines_count` lines.
+    """
+    wrap_plus = install()
+
+    import sublime
+    text = generate_wrapped_prose( random.Random( seed ), lines_count )
+    syntax = syntaxes.find_syntax( "Packages/Text/Plain text.tmLanguage" )
+    best = dict.fromkeys( TYPING_POINTS, float( 'inf' ) )
+
+    index_listener = wrap_plus.WrapPlusParagraphIndexListener()
+    auto_wrap_listener = wrap_plus.WrapPlusAutoWrapListener()
+    over_width_listener = wrap_plus.WrapPlusOverWidthListener()
+
+    def type_word(view, word):
+        view.run_command( 'insert', {'characters': word} )
+        index_listener.on_modified( view )
+        view.scope_name( 0 )
+
+    def create_view(settings):
+        view = sublime.View( text, syntax, settings )
+        row = lines_count // 2
+        row += not view.line( view.text_point( row, 0 ) ).size()
+
+        view.sel().add( sublime.Region( view.line( view.text_point( row, 0 ) ).end() ) )
+        wrap_plus.get_paragraph_index( view ).block( view, 0 )
+        return view
+
+    # The lines are wrapped on 72 columns, so most paragraphs are over the width
+    over_width_view = create_view( {'WrapPlus.highlight_over_width': True, 'WrapPlus.wrap_width': 70} )
+    over_width_listener.on_activated( over_width_view )
+
+    for _ in range( repeats ):
+        type_word( over_width_view, " a" )
+        start = time.perf_counter()
+        over_width_listener.on_modified( over_width_view )
+        best['over_width_keystroke'] = min( best['over_width_keystroke'], time.perf_counter() - start )
+
+    over_width_listener.on_close( over_width_view )
+
+    for _ in range( repeats ):
+        view = create_view( {'WrapPlus.auto_wrap': True} )
+
+        type_word( view, " a" )
+        start = time.perf_counter()
+        auto_wrap_listener.on_modified( view )
+        best['auto_wrap_keystroke'] = min( best['auto_wrap_keystroke'], time.perf_counter() - start )
+
+        type_word( view, " lorem ipsum dolor sit amet" )
+        start = time.perf_counter()
+        view.run_command( 'wrap_lines_plus', {'auto_wrap': True} )
+        best['auto_wrap_reflow'] = min( best['auto_wrap_reflow'], time.perf_counter() - start )
+
+    return best
+
+
+def run(sizes=None, entry_points=None, repeats=5, seed=0, output_file=None):
+    """Run the benchmarks.
+
+    :returns: A dict with the `environment` and the `results` keyed by
+        `entry_point/corpus/size`, each with `seconds`, `bytes`, `throughput`
+        (bytes per second) and `peak_memory`.
+    """
+    results = {}
+    entry_points = entry_points or ENTRY_POINTS + STARTUP_POINTS + TYPING_POINTS
+    engine_points = [entry_point for entry_point in entry_points if entry_point in ENTRY_POINTS]
+    startup_points = [entry_point for entry_point in entry_points if entry_point in STARTUP_POINTS]
+    typing_points = [entry_point for entry_point in entry_points if entry_point in TYPING_POINTS]
+
+    for name, syntax, size, text in make_corpora( sizes or DEFAULT_SIZES, seed ) if engine_points else []:
+        engine = Engine( syntax, text, entry_points=engine_points )
+        text_bytes = len( text.encode( 'utf-8' ) )
+
+        for entry_point in engine_points:
+            seconds, peak = measure( getattr( engine, entry_point ), repeats )
+            key = '%s/%s/%d' % (entry_point, name, size)
+
+            results[key] = {
+                'seconds': seconds,
+                'bytes': text_bytes,
+                'throughput': text_bytes / seconds if seconds else 0.0,
+                'peak_memory': peak,
+            }
+
+            if output_file:
+                output_file.write( '%-60s %10.6f s %10.0f KB/s %10d B\n' % (key, seconds,
+                        results[key]['throughput'] / 1024, peak) )
+
+    if startup_points:
+        startup = measure_startup( repeats )
+
+        for entry_point in startup_points:
+            key = '%s/plugin/1' % entry_point
+            results[key] = {'seconds': startup[entry_point], 'bytes': 0, 'throughput': 0.0, 'peak_memory': 0}
+
+            if output_file:
+                output_file.write( '%-60s %10.6f s\n' % (key, startup[entry_point]) )
+
+    if typing_points:
+        typing = measure_typing( repeats, seed=seed )
+
+        for entry_point in typing_points:
+            key = '%s/typing/%d' % (entry_point, TYPING_LINES)
+            results[key] = {'seconds': typing[entry_point], 'bytes': 0, 'throughput': 0.0, 'peak_memory': 0,
+                    'target_seconds': TYPING_TARGET_SECONDS}
+
+            if output_file:
+                output_file.write( '%-60s %10.6f s %s\n' % (key, typing[entry_point],
+                        'within the target' if typing[entry_point] <= TYPING_TARGET_SECONDS else 'over the target') )
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'seed': seed,
+            'repeats': repeats,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.1, memory_threshold=None):
+    """Compare two `run()` results.
+
+    :returns: A list of (key, metric, baseline_value, current_value, ratio)
+        tuples for the cases where the current value exceeds the baseline one
+        by more than the threshold ratio.
+    """
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    regressions = []
+
+    for key, base in sorted( baseline['results'].items() ):
+        other = current['results'].get( key )
+
+        if other is None:
+            continue
+
+        for metric, limit in (('seconds', threshold), ('peak_memory', memory_threshold)):
+
+            if base[metric] > 0:
+                ratio = other[metric] / base[metric]
+
+                if ratio > 1 + limit:
+                    regressions.append( (key, metric, base[metric], other[metric], ratio) )
+
+    return regressions
+
+
+def parse_arguments(arguments):
+    parser = argparse.ArgumentParser( prog='wrap_plus benchmark', description=__doc__.split( '\n\n' )[0] )
+    commands = parser.add_subparsers( dest='command' )
+    commands.required = True
+
+    run_parser = commands.add_parser( 'run', help="Run the benchmarks and save the results." )
+    run_parser.add_argument( '-o', '--output', metavar='FILE', help="The JSON file to save the results." )
+    run_parser.add_argument( '--sizes', default=','.join( str( size ) for size in DEFAULT_SIZES ),
+            help="Comma separated corpus size multipliers (default: %(default)s)." )
+    run_parser.add_argument( '--entry-points', default=','.join( ENTRY_POINTS + STARTUP_POINTS + TYPING_POINTS ),
+            help="Comma separated entry points to time (default: %(default)s)." )
+    run_parser.add_argument( '-r', '--repeats', type=int, default=5 )
+    run_parser.add_argument( '--seed', type=int, default=0, help="The seed of the synthetic corpora." )
+
+    compare_parser = commands.add_parser( 'compare', help="Flag the regressions of some results over a baseline." )
+    compare_parser.add_argument( 'baseline' )
+    compare_parser.add_argument( 'current' )
+    compare_parser.add_argument( '-t', '--threshold', type=float, default=0.1,
+            help="The maximum slowdown ratio accepted, e.g., 0.1 for 10%% (default: %(default)s)." )
+    compare_parser.add_argument( '--memory-threshold', type=float,
+            help="The maximum peak memory growth ratio accepted (default: the threshold)." )
+
+    return parser, parser.parse_args( arguments )
+
+
+def main(arguments=None):
+    parser, options = parse_arguments( sys.argv[1:] if arguments is None else arguments )
+
+    if options.command == 'run':
+        entry_points = [name.strip() for name in options.entry_points.split( ',' )]
+        unknown = set( entry_points ) - set( ENTRY_POINTS + STARTUP_POINTS + TYPING_POINTS )
+
+        if unknown:
+            parser.error( "unknown entry points: %s" % ', '.join( sorted( unknown ) ) )
+
+        results = run( [int( size ) for size in options.sizes.split( ',' )], entry_points,
+                options.repeats, options.seed, sys.stderr )
+
+        if options.output:
+
+            with open( options.output, 'w', encoding='utf-8' ) as output_file:
+                json.dump( results, output_file, indent=1, sort_keys=True )
+
+        else:
+            json.dump( results, sys.stdout, indent=1, sort_keys=True )
+
+        return 0
+
+    with open( options.baseline, encoding='utf-8' ) as baseline_file:
+        baseline = json.load( baseline_file )
+
+    with open( options.current, encoding='utf-8' ) as current_file:
+        current = json.load( current_file )
+
+    regressions = compare( baseline, current, options.threshold, options.memory_threshold )
+
+    for key, metric, base_value, current_value, ratio in regressions:
+        print( "regression: %s %s %.6g -> %.6g (%+.1f%%)" % (key, metric, base_value, current_value,
+                ( ratio - 1 ) * 100), file=sys.stderr )
+
+    return 1 if regressions else 0
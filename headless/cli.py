@@ -0,0 +1,520 @@
+"""Command line batch reformatter, wrapping each block of lines of the files,
+up to the blank lines after it, like the `wrap_lines_plus` command does after
+selecting all the text of that block.
+
+    python -m headless --check docs/
+    python -m headless --in-place --set WrapPlus.semantic_line_wrap=true README.md
+
+The files are distributed across a pool of processes, one for each core by
+default.  The settings are the same `WrapPlus.*` options (and `wrap_width`,
+`rulers`, `tab_size`, etc.) from `Preferences.sublime-settings`, given by a
+`--settings` file or by `--set NAME=VALUE` options with JSON values.
+
+The files found clean by a run are recorded on a manifest (`--cache`) by their
+content hash, the hash of the settings profile and the tool version, so the
+next runs skip them after just hashing their contents.
+
+This is not always what selecting all the text of a file does on the editor.
+A selection starting on a comment stops at the first paragraph out of the
+comment, while each block is wrapped here from its own first line.  So the
+paragraphs after a comment starting a file are wrapped here, but not on the
+editor, as the ones of `tests/wrap_tests/test.tex`.
+
+With `--check`, nothing is written, but each paragraph the wrapping would change
+is reported as a `path:line: message` diagnostic on the standard output.  Most
+paragraphs are decided by the invariants of the classic greedy wrapping,
+without wrapping them, see `WrapLinesPlusCommand._classic_check()`.
+
+With `--comments-only`, only the comments and docstrings of the source files
+are wrapped, leaving their code and other strings alone.
+
+With `--diff`, only the paragraphs touched by the lines added or removed by a
+unified diff are wrapped, e.g., `git diff | python -m headless --diff -i`.
+
+With `--serve`, it keeps running as a JSON-RPC server for other tools, see
+`headless.daemon`.
+"""
+import os
+import re
+import sys
+import json
+import glob
+import hashlib
+import argparse
+import tempfile
+import multiprocessing
+
+from . import install
+from . import syntaxes
+
+# The exit status when some file would be changed by `--check` and when some
+# file could not be wrapped.
+EXIT_CHANGED = 1
+EXIT_ERROR = 2
+
+# The size of the reads when hashing the files for the manifest
+HASH_CHUNK_SIZE = 1 << 20
+
+hunk_header_pattern = re.compile( r'@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@' )
+
+
+def text_extensions():
+    """The extensions of the text syntaxes, wrapped by default when walking directories."""
+    return [extension for syntax in syntaxes.SYNTAXES if syntax.is_text() for extension in syntax.extensions]
+
+
+def iter_files(paths, extensions):
+    """Yield the given files and the files with one of the `extensions` inside
+    the given directories, skipping the hidden ones.
+    """
+    for path in paths:
+
+        if not os.path.isdir( path ):
+            yield path
+            continue
+
+        for directory, directories, files in os.walk( path ):
+            directories[:] = sorted( name for name in directories if not name.startswith( '.' ) )
+
+            for name in sorted( files ):
+
+                if not name.startswith( '.' ) and os.path.splitext( name )[1].lstrip( '.' ).lower() in extensions:
+                    yield os.path.join( directory, name )
+
+
+def load_settings(settings_path, values):
+    """Merge a `.sublime-settings` file with the `NAME=VALUE` strings."""
+    install()
+
+    import sublime
+    settings = {}
+
+    if settings_path:
+
+        with open( settings_path, encoding='utf-8' ) as settings_file:
+            settings.update( sublime.decode_value( settings_file.read() ) )
+
+    for value in values:
+        name, separator, value = value.partition( '=' )
+
+        if not separator:
+            raise ValueError( "Expected NAME=VALUE, got '%s'" % name )
+
+        try:
+            settings[name.strip()] = json.loads( value )
+
+        except ValueError:
+            settings[name.strip()] = value
+
+    # The plugin finds the relative paths from its package directory, but the command line from the current one
+    if settings.get( 'WrapPlus.hyphenation_patterns' ):
+        settings['WrapPlus.hyphenation_patterns'] = os.path.abspath(
+                os.path.expanduser( settings['WrapPlus.hyphenation_patterns'] ) )
+
+    return settings
+
+
+def read_changed_lines(diff_lines, strip=1):
+    """Find the lines changed by a unified diff on the new version of each file.
+
+    A removed line marks the lines around the place it was removed from.
+
+    :param strip: the number of leading path components removed from the file
+        names, like `patch -p`, e.g., 1 for the `a/` and `b/` of `git diff`.
+
+    :returns: A dict from the file path to its sorted changed line numbers,
+        starting at 1.
+    """
+    changed = {}
+    lines = None
+    old_count = new_count = 0
+    line_number = 0
+
+    for line in diff_lines:
+
+        if old_count <= 0 and new_count <= 0:
+            match = hunk_header_pattern.match( line )
+
+            if match:
+                old_count = 1 if match.group( 1 ) is None else int( match.group( 1 ) )
+                new_count = 1 if match.group( 3 ) is None else int( match.group( 3 ) )
+                line_number = int( match.group( 2 ) )
+
+                # A hunk only removing lines starts on the line before the removal
+                if new_count == 0:
+                    line_number += 1
+
+            elif line.startswith( '+++ ' ):
+                name = line[4:].rstrip( '\r\n' ).split( '\t' )[0]
+                parts = name.split( '/' )
+
+                if name == '/dev/null' or len( parts ) <= strip:
+                    lines = None
+
+                else:
+                    lines = changed.setdefault( os.path.join( *parts[strip:] ), set() )
+
+            continue
+
+        if line.startswith( '+' ):
+            if lines is not None:
+                lines.add( line_number )
+
+            line_number += 1
+            new_count -= 1
+
+        elif line.startswith( '-' ):
+            if lines is not None:
+                lines.update( number for number in ( line_number - 1, line_number ) if number > 0 )
+
+            old_count -= 1
+
+        # Some tools strip the space of the empty context lines
+        elif line.startswith( ' ' ) or line in ( '\n', '\r\n' ):
+            line_number += 1
+            old_count -= 1
+            new_count -= 1
+
+    return {path: sorted( numbers ) for path, numbers in changed.items()}
+
+
+def select_changed_files(paths, changed):
+    """Filter the files of a diff by the given files or directories, if any."""
+    if not paths:
+        return sorted( changed )
+
+    selected = []
+    absolute_paths = [os.path.abspath( path ) for path in paths]
+
+    for path in sorted( changed ):
+        absolute_path = os.path.abspath( path )
+
+        if any( absolute_path == other or absolute_path.startswith( os.path.join( other, '' ) )
+                for other in absolute_paths ):
+            selected.append( path )
+
+    return selected
+
+
+def hash_bytes(data):
+    return hashlib.sha256( data ).hexdigest()
+
+
+def hash_file(path):
+    """Hash the file on chunks of `HASH_CHUNK_SIZE` bytes, so a large file is
+    never read into memory at once.
+    """
+    hasher = hashlib.sha256()
+
+    with open( path, 'rb' ) as input_file:
+
+        for chunk in iter( lambda: input_file.read( HASH_CHUNK_SIZE ), b'' ):
+            hasher.update( chunk )
+
+    return hasher.hexdigest()
+
+
+def tool_version():
+    """A hash of the engine sources, as the package has no version number,
+    so any change on the wrapping code invalidates the manifest.
+    """
+    from . import PACKAGE_ROOT_DIRECTORY
+    hasher = hashlib.sha256()
+
+    for path in sorted( glob.glob( os.path.join( PACKAGE_ROOT_DIRECTORY, '*.py' ) )
+            + glob.glob( os.path.join( PACKAGE_ROOT_DIRECTORY, 'headless', '*.py' ) ) ):
+
+        with open( path, 'rb' ) as input_file:
+            hasher.update( input_file.read() )
+
+    return hasher.hexdigest()
+
+
+def profile_hash(job_options):
+    """A hash of everything, but the file contents, changing the wrapping result."""
+    profile = dict( job_options )
+    profile.pop( 'mode', None )
+
+    # The wrapping changes with the contents of the hyphenation patterns, not only their path
+    patterns_path = profile['settings'].get( 'WrapPlus.hyphenation_patterns' )
+
+    if patterns_path:
+
+        try:
+            profile['hyphenation_patterns'] = hash_file( patterns_path )
+
+        except OSError:
+            pass
+
+    return hash_bytes( json.dumps( profile, sort_keys=True ).encode( 'utf-8' ) )
+
+
+def load_manifest(cache_path):
+    """:returns: A dict from the absolute file path to a (content_hash, profile_hash, tool_version) list."""
+    try:
+        with open( cache_path, encoding='utf-8' ) as cache_file:
+            manifest = json.load( cache_file )
+
+    except (OSError, ValueError):
+        return {}
+
+    return manifest if isinstance( manifest, dict ) else {}
+
+
+def save_manifest(cache_path, manifest):
+    directory = os.path.dirname( os.path.abspath( cache_path ) )
+    file_descriptor, temporary_path = tempfile.mkstemp( prefix='.wrap_plus-', dir=directory )
+
+    with os.fdopen( file_descriptor, 'w', encoding='utf-8' ) as cache_file:
+        json.dump( manifest, cache_file, indent=0, sort_keys=True )
+
+    os.replace( temporary_path, cache_path )
+
+
+def wrap_path(job):
+    """Wrap one file on a pool worker.
+
+    :param job: A (path, options, cached_hash, changed_lines) tuple, where
+        options is a dict with `mode` (`check`, `in_place` or `print`),
+        `settings`, `width`, `line_wrap_type`, `comments_only`, `syntax` and `encoding`,
+        cached_hash is the content hash of the file on the last clean run, if
+        any, and changed_lines are the only line numbers to wrap, if any.
+
+    :returns: A (path, is_changed, error_message, clean_hash, diagnostics)
+        tuple, where clean_hash is the content hash of the file when it did
+        not change, and diagnostics is a list of (line, message) tuples on the
+        `check` mode.
+    """
+    path, options, cached_hash, changed_lines = job
+
+    from . import stream
+    from . import mapped
+
+    syntax = options['syntax'] or syntaxes.syntax_for_file( path )
+    arguments = dict( syntax=syntax, settings=options['settings'], width=options['width'],
+            line_wrap_type=options['line_wrap_type'], changed_lines=changed_lines,
+            comments_only=options['comments_only'] )
+
+    try:
+        content_hash = None
+
+        if cached_hash:
+            content_hash = hash_file( path )
+
+            if content_hash == cached_hash:
+                return path, False, None, content_hash, []
+
+        diagnostics = []
+
+        if options['mode'] == 'check':
+
+            if path == '-':
+                diagnostics = stream.check_file( sys.stdin, **arguments )
+
+            else:
+                with open( path, encoding=options['encoding'] ) as input_file:
+                    diagnostics = stream.check_file( input_file, **arguments )
+
+            is_changed = bool( diagnostics )
+
+        elif options['mode'] == 'in_place':
+            is_changed = mapped.wrap_mapped_file( path, encoding=options['encoding'], **arguments )
+
+        else:
+            output_file = sys.stdout if options['mode'] == 'print' else None
+
+            if path == '-':
+                is_changed = stream.wrap_file( sys.stdin, output_file, **arguments )
+
+            else:
+                with open( path, encoding=options['encoding'] ) as input_file:
+                    is_changed = stream.wrap_file( input_file, output_file, **arguments )
+
+    except (OSError, ValueError) as error:
+        return path, False, str( error ), None, []
+
+    if is_changed or path == '-':
+        return path, is_changed, None, None, diagnostics
+
+    return path, is_changed, None, content_hash or hash_file( path ), diagnostics
+
+
+def parse_arguments(arguments):
+    parser = argparse.ArgumentParser( prog='wrap_plus', description=__doc__.split( '\n\n' )[0] )
+
+    parser.add_argument( 'paths', nargs='*',
+            help="Files or directories to wrap, or '-' to read the standard input.  "
+                 "With --diff, they filter the files of the diff." )
+
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument( '--check', action='store_true',
+            help="Do not write anything, but report the paragraphs which would change as `path:line: message` "
+                 "and exit with %d when there is some." % EXIT_CHANGED )
+    mode.add_argument( '-i', '--in-place', action='store_true',
+            help="Rewrite the files which change." )
+
+    parser.add_argument( '-w', '--width', type=int, default=0,
+            help="The wrap width, by default it comes from the settings as on Sublime Text." )
+    parser.add_argument( '--line-wrap-type', choices=['classic', 'semantic'],
+            help="Override the `WrapPlus.semantic_line_wrap` setting." )
+    parser.add_argument( '--comments-only', action='store_true',
+            help="Only wrap the comments and docstrings of the source files." )
+    parser.add_argument( '--settings', metavar='FILE',
+            help="A `.sublime-settings` file with the `WrapPlus.*` settings." )
+    parser.add_argument( '-s', '--set', action='append', default=[], metavar='NAME=VALUE',
+            help="A setting, e.g., `--set WrapPlus.semantic_line_wrap=true`.  Can be repeated." )
+    parser.add_argument( '--syntax', metavar='PATH',
+            help="The syntax of all files, e.g., `Packages/Python/Python.sublime-syntax`. "
+                 "By default, it is guessed by the file extension." )
+    parser.add_argument( '--extensions', metavar='LIST', default=','.join( text_extensions() ),
+            help="Comma separated extensions of the files wrapped inside directories (default: %(default)s)." )
+    parser.add_argument( '--encoding', default='utf-8' )
+    parser.add_argument( '-j', '--jobs', type=int, default=os.cpu_count() or 1,
+            help="The number of worker processes (default: the number of cores)." )
+    parser.add_argument( '--cache', metavar='FILE', default='.wrap_plus_cache.json',
+            help="The manifest of the files found clean, skipped on the next runs (default: %(default)s)." )
+    parser.add_argument( '--no-cache', action='store_true',
+            help="Wrap all files, neither reading nor writing the manifest." )
+    parser.add_argument( '--diff', nargs='?', const='-', metavar='FILE',
+            help="Only wrap the paragraphs touched by a unified diff, read from the standard input by default." )
+    parser.add_argument( '-p', '--strip', type=int, default=1, metavar='NUM',
+            help="Strip NUM leading components from the file names of the diff, like `patch` (default: %(default)s)." )
+    parser.add_argument( '--serve', nargs='?', const='-', metavar='SOCKET',
+            help="Serve JSON-RPC `wrap` requests over a Unix domain socket, or over the standard input "
+                 "and output by default, instead of wrapping files." )
+    parser.add_argument( '-q', '--quiet', action='store_true' )
+
+    return parser, parser.parse_args( arguments )
+
+
+def main(arguments=None):
+    parser, options = parse_arguments( sys.argv[1:] if arguments is None else arguments )
+    extensions = [extension.strip().lstrip( '.' ).lower() for extension in options.extensions.split( ',' )]
+    changed = {}
+
+    if options.serve:
+        from . import daemon
+
+        try:
+            settings = load_settings( options.settings, options.set )
+
+        except (OSError, ValueError) as error:
+            parser.error( str( error ) )
+
+        try:
+            return daemon.serve( options.serve, settings, options.jobs )
+
+        except OSError as error:
+            print( "error: %s" % error, file=sys.stderr )
+            return EXIT_ERROR
+
+    if options.diff:
+
+        try:
+            if options.diff == '-':
+                changed = read_changed_lines( sys.stdin, options.strip )
+
+            else:
+                with open( options.diff, encoding=options.encoding ) as diff_file:
+                    changed = read_changed_lines( diff_file, options.strip )
+
+        except OSError as error:
+            parser.error( str( error ) )
+
+        paths = select_changed_files( options.paths, changed )
+
+    elif options.paths:
+        paths = list( iter_files( options.paths, extensions ) )
+
+    else:
+        parser.error( "expected some file or directory to wrap" )
+
+    mode = 'check' if options.check else 'in_place' if options.in_place else 'print'
+
+    if mode == 'print' and len( paths ) > 1:
+        parser.error( "use --in-place or --check with several files" )
+
+    if mode == 'in_place' and '-' in paths:
+        parser.error( "cannot wrap the standard input in place" )
+
+    try:
+        settings = load_settings( options.settings, options.set )
+
+    except (OSError, ValueError) as error:
+        parser.error( str( error ) )
+
+    job_options = {
+        'mode': mode,
+        'settings': settings,
+        'width': options.width,
+        'line_wrap_type': options.line_wrap_type,
+        'comments_only': options.comments_only,
+        'syntax': options.syntax,
+        'encoding': options.encoding,
+    }
+    # The standard output needs the wrapped text, even for clean files, and
+    # the manifest records whole files clean, not only their changed lines
+    use_cache = not options.no_cache and mode != 'print' and not options.diff
+    manifest = load_manifest( options.cache ) if use_cache else {}
+    version = tool_version() if use_cache else None
+    profile = profile_hash( job_options )
+    jobs = []
+
+    for path in paths:
+        entry = manifest.get( os.path.abspath( path ) )
+        cached_hash = entry[0] if entry and entry[1:] == [profile, version] else None
+        jobs.append( (path, job_options, cached_hash, changed.get( path )) )
+
+    if options.jobs > 1 and len( jobs ) > 1:
+        pool = multiprocessing.Pool( min( options.jobs, len( jobs ) ) )
+        chunk_size = max( 1, len( jobs ) // ( options.jobs * 4 ) )
+
+        try:
+            results = list( pool.imap_unordered( wrap_path, jobs, chunk_size ) )
+
+        finally:
+            pool.close()
+            pool.join()
+
+    else:
+        results = [wrap_path( job ) for job in jobs]
+
+    exit_code = 0
+
+    for path, is_changed, error_message, clean_hash, diagnostics in sorted( results ):
+
+        if use_cache and path != '-':
+
+            if clean_hash:
+                manifest[os.path.abspath( path )] = [clean_hash, profile, version]
+
+            else:
+                manifest.pop( os.path.abspath( path ), None )
+
+        if error_message:
+            exit_code = EXIT_ERROR
+            print( "error: %s: %s" % (path, error_message), file=sys.stderr )
+
+        elif is_changed and mode != 'print':
+
+            if mode == 'check':
+                exit_code = exit_code or EXIT_CHANGED
+
+            if options.quiet:
+                continue
+
+            for line, message in diagnostics:
+                print( "%s:%d: %s" % (path, line, message) )
+
+            if mode == 'in_place':
+                print( "wrapped %s" % path, file=sys.stderr )
+
+    if use_cache:
+
+        try:
+            save_manifest( options.cache, manifest )
+
+        except OSError as error:
+            print( "warning: could not save the cache %s: %s" % (options.cache, error), file=sys.stderr )
+
+    return exit_code
@@ -0,0 +1,34 @@
+"""The comment data helper from the Sublime Text `Default` package, for the
+headless view.
+"""
+
+
+def build_comment_data(view, pt):
+    shell_vars = view.meta_info("shellVariables", pt)
+    if not shell_vars:
+        return ([], [])
+
+    # transform the list of dicts into a single dict
+    all_vars = {}
+    for v in shell_vars:
+        if 'name' in v and 'value' in v:
+            all_vars[v['name']] = v['value']
+
+    line_comments = []
+    block_comments = []
+
+    # transform the dict into a single array of valid comments
+    suffixes = [""] + ["_" + str(i) for i in range(1, 10)]
+    for suffix in suffixes:
+        start = all_vars.setdefault("TM_COMMENT_START" + suffix)
+        end = all_vars.setdefault("TM_COMMENT_END" + suffix)
+        disable_indent = all_vars.setdefault("TM_COMMENT_DISABLE_INDENT" + suffix)
+
+        if start and end:
+            block_comments.append((start, end, disable_indent == 'yes'))
+            block_comments.append((start.strip(), end.strip(), disable_indent == 'yes'))
+        elif start:
+            line_comments.append((start, disable_indent == 'yes'))
+            line_comments.append((start.strip(), disable_indent == 'yes'))
+
+    return (line_comments, block_comments)
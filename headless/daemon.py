@@ -0,0 +1,343 @@
+"""Serve the `wrap_lines_plus` command to other tools as JSON-RPC 2.0.
+
+    python -m headless --serve                     # over the standard input and output
+    python -m headless --serve /tmp/wrap_plus.sock # over a Unix domain socket
+
+Each request and response is a JSON object on its own line, e.g.:
+
+    {"jsonrpc": "2.0", "id": 1, "method": "wrap", "params": {"text": "...",
+        "syntax": "Packages/Python/Python.sublime-syntax", "selection": [[0, 10]],
+        "settings": {"WrapPlus.semantic_line_wrap": true}, "width": 80}}
+
+    {"jsonrpc": "2.0", "id": 1, "result": {"text": "...", "selection": [[12, 12]]}}
+
+The plugin, the syntax definitions and their compiled patterns are loaded once,
+and the settings of each profile (syntax and settings) are kept warm between
+the requests.  Requests are read and answered concurrently, by a thread pool
+over the standard input or by one thread for each socket connection, but the
+wrapping itself holds a lock, as the plugin keeps its patterns on globals set
+by each run.
+"""
+import os
+import sys
+import json
+import stat
+import errno
+import signal
+import socket
+import threading
+import socketserver
+import collections
+
+from concurrent.futures import ThreadPoolExecutor
+
+from . import install
+from . import syntaxes
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# The parameters of each method served, in their positional order, with the
+# types accepted and whether they are required
+METHOD_PARAMS = {
+    'wrap': (
+        ('text', (str,), True),
+        ('syntax', (str, type( None )), False),
+        ('selection', (list, type( None )), False),
+        ('settings', (dict, type( None )), False),
+        ('width', (int,), False),
+        ('line_wrap_type', (str, type( None )), False),
+    ),
+    'ping': (),
+}
+
+
+class InvalidParamsError(ValueError):
+    pass
+
+
+def check_params(method, params):
+    """Check the parameters of a request against the ones of its method.
+
+    :returns: The parameters as a dict of keyword arguments.
+    :raises InvalidParamsError: When a parameter is missing, unknown or of the wrong type.
+    """
+    names = [name for name, types, required in METHOD_PARAMS[method]]
+
+    if isinstance( params, list ):
+
+        if len( params ) > len( names ):
+            raise InvalidParamsError( "%s takes at most %s params, got %s" % (method, len( names ), len( params )) )
+
+        params = dict( zip( names, params ) )
+
+    elif not isinstance( params, dict ):
+        raise InvalidParamsError( "params must be an array or an object" )
+
+    for name in params:
+
+        if name not in names:
+            raise InvalidParamsError( "Unknown param for %s: %s" % (method, name) )
+
+    for name, types, required in METHOD_PARAMS[method]:
+
+        if name not in params:
+
+            if required:
+                raise InvalidParamsError( "Missing param for %s: %s" % (method, name) )
+
+        # `bool` is an `int` for Python, but not for JSON
+        elif not isinstance( params[name], types ) or isinstance( params[name], bool ):
+            raise InvalidParamsError( "%s must be %s" % (name, " or ".join(
+                    'null' if type_ is type( None ) else type_.__name__ for type_ in types )) )
+
+    for item in params.get( 'selection' ) or ():
+
+        if not isinstance( item, list ) or len( item ) != 2 or \
+                not all( isinstance( offset, int ) and not isinstance( offset, bool ) for offset in item ):
+            raise InvalidParamsError( "selection must be a list of [begin, end] offsets" )
+
+    return params
+
+
+class WrapService(object):
+    """The methods served, over a plugin loaded only once.
+
+        @param settings the default settings, overridden by the ones of each request
+        @param profiles how many (syntax, settings) profiles to keep warm
+    """
+
+    def __init__(self, settings=None, profiles=64):
+        install()
+
+        import sublime
+        import sublime_plugin
+        self.sublime = sublime
+        self.sublime_plugin = sublime_plugin
+
+        self.settings = dict( settings or {} )
+        self.maximum_profiles = profiles
+        self.profiles = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def _profile(self, syntax, settings):
+        key = (syntax, json.dumps( settings, sort_keys=True ) if settings else '')
+
+        with self.lock:
+            profile = self.profiles.get( key )
+
+            if profile is None:
+                merged = dict( self.settings )
+                merged.update( settings or {} )
+                profile = self.profiles[key] = (syntaxes.find_syntax( syntax ), merged)
+
+                if len( self.profiles ) > self.maximum_profiles:
+                    self.profiles.popitem( last=False )
+
+            else:
+                self.profiles.move_to_end( key )
+
+        return profile
+
+    def wrap(self, text, syntax=None, selection=None, settings=None, width=0, line_wrap_type=None):
+        """Run `wrap_lines_plus` over the text with the given selections.
+
+        :param selection: a list of [begin, end] offsets, by default, all the text
+        :returns: A dict with the wrapped `text` and the `selection` after the wrapping.
+        """
+        if not isinstance( text, str ):
+            raise TypeError( "text must be a string" )
+
+        region = self.sublime.Region
+        syntax, settings = self._profile( syntax, settings )
+        view = self.sublime.View( text, syntax, settings )
+
+        if selection is None:
+            view.sel().add( region( 0, view.size() ) )
+
+        else:
+            for begin, end in selection:
+                view.sel().add( region( max( 0, min( begin, view.size() ) ), max( 0, min( end, view.size() ) ) ) )
+
+        with self.lock:
+            self.sublime_plugin.run_text_command( view, 'wrap_lines_plus',
+                    {'width': width, 'line_wrap_type': line_wrap_type} )
+
+        return {
+            'text': view.substr( region( 0, view.size() ) ),
+            'selection': [[selection.a, selection.b] for selection in view.sel()],
+        }
+
+    def ping(self):
+        return 'pong'
+
+
+def error_response(request_id, code, message):
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+def handle_request(service, request):
+    """Call a method of the service for a decoded JSON-RPC request.
+
+    :returns: The response object, or None for notifications.
+    """
+    if not isinstance( request, dict ) or not isinstance( request.get( 'method' ), str ):
+        return error_response( None, INVALID_REQUEST, "Invalid Request" )
+
+    request_id = request.get( 'id' )
+    method = request['method']
+    params = request.get( 'params', {} )
+
+    if method not in METHOD_PARAMS:
+        response = error_response( request_id, METHOD_NOT_FOUND, "Method not found: %s" % method )
+
+    else:
+        try:
+            result = getattr( service, method )( **check_params( method, params ) )
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+        except InvalidParamsError as error:
+            response = error_response( request_id, INVALID_PARAMS, str( error ) )
+
+        except Exception as error:
+            response = error_response( request_id, INTERNAL_ERROR, "%s: %s" % (type( error ).__name__, error) )
+
+    return None if 'id' not in request else response
+
+
+def handle_line(service, line):
+    """Answer one line with a request or a batch of requests.
+
+    :returns: The encoded response line, or None when there is nothing to answer.
+    """
+    try:
+        request = json.loads( line )
+
+    except ValueError as error:
+        return json.dumps( error_response( None, PARSE_ERROR, "Parse error: %s" % error ) ) + '\n'
+
+    if isinstance( request, list ):
+
+        if not request:
+            return json.dumps( error_response( None, INVALID_REQUEST, "Invalid Request" ) ) + '\n'
+
+        responses = [response for response in (handle_request( service, item ) for item in request) if response]
+        return json.dumps( responses ) + '\n' if responses else None
+
+    response = handle_request( service, request )
+    return json.dumps( response ) + '\n' if response else None
+
+
+def serve_stdio(service, input_file=None, output_file=None, workers=4):
+    """Answer the requests from `input_file` until it ends.
+
+    The responses are written as soon as each request is done, so they may be
+    out of order, and are matched to the requests by their `id`.
+    """
+    input_file = input_file or sys.stdin
+    output_file = output_file or sys.stdout
+    output_lock = threading.Lock()
+
+    def answer(line):
+        response = handle_line( service, line )
+
+        if response:
+
+            with output_lock:
+                output_file.write( response )
+                output_file.flush()
+
+    with ThreadPoolExecutor( workers ) as executor:
+
+        for line in input_file:
+
+            if line.strip():
+                executor.submit( answer, line )
+
+
+class WrapRequestHandler(socketserver.StreamRequestHandler):
+    """Answer the requests of one socket connection, one line at a time."""
+
+    def handle(self):
+        for line in self.rfile:
+
+            if line.strip():
+                response = handle_line( self.server.service, line.decode( 'utf-8' ) )
+
+                if response:
+                    self.wfile.write( response.encode( 'utf-8' ) )
+
+
+class WrapServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, service):
+        self.service = service
+        socketserver.UnixStreamServer.__init__( self, socket_path, WrapRequestHandler )
+
+    def server_bind(self):
+        self.socket.setsockopt( socket.SOL_SOCKET, socket.SO_REUSEADDR, 1 )
+        socketserver.UnixStreamServer.server_bind( self )
+
+
+def remove_socket(socket_path):
+    """Remove the socket file on the path, if any, without following a symbolic link."""
+    try:
+        mode = os.lstat( socket_path ).st_mode
+
+    except FileNotFoundError:
+        return
+
+    if not stat.S_ISSOCK( mode ):
+        raise FileExistsError( errno.EEXIST, "Not a socket, refusing to replace it", socket_path )
+
+    os.remove( socket_path )
+
+
+def serve_socket(service, socket_path):
+    """Answer the requests over a Unix domain socket until interrupted.
+
+    A socket left by a previous server is replaced, but any other file on the
+    path is kept.
+
+    :raises FileExistsError: When the path is taken by something else than a socket.
+    """
+    remove_socket( socket_path )
+
+    server = WrapServer( socket_path, service )
+
+    # Remove the socket file when terminated by a signal, too
+    if threading.current_thread() is threading.main_thread():
+        signal.signal( signal.SIGTERM, lambda signal_number, frame: sys.exit( 0 ) )
+
+    try:
+        server.serve_forever()
+
+    except (KeyboardInterrupt, SystemExit):
+        pass
+
+    finally:
+        server.server_close()
+        remove_socket( socket_path )
+
+
+def serve(socket_path='-', settings=None, workers=4):
+    """Serve over the standard input and output for `-`, or over a Unix socket."""
+    if socket_path != '-':
+        remove_socket( socket_path )
+
+    service = WrapService( settings )
+
+    # Load the syntax patterns and the wrapping code before the first request
+    service.wrap( "warm up\n" )
+
+    if socket_path == '-':
+        serve_stdio( service, workers=workers )
+
+    else:
+        serve_socket( service, socket_path )
+
+    return 0
@@ -0,0 +1,307 @@
+"""Check the wrapping engines against a frozen reference of the plugin.
+
+    python -m headless differential                      # against the last commit
+    python -m headless differential --reference v1.2.0   # against some tag
+    python -m headless differential --approved approved.json
+
+The `wrap_plus.py` and `py_textwrap.py` (and `line_break.py`) of the reference (a git revision, or a
+directory with a copy of them) are loaded as a separate package, next to the
+plugin of the working tree, so any faster classic, semantic or balancing
+engine can be checked to give byte-identical output to the code it replaces.
+
+Each case, every `tests/wrap_tests` fixture and the texts of a seeded random
+generator, has its paragraphs and prefixes found once by the working tree
+plugin, and then wrapped by both plugins, on each of the `classic`, `semantic`
+and `balance` modes.  The first diverging paragraph of each case is reported
+with both outputs, along with the speedup ratio of the working tree over the
+reference, as the best of the repeats.
+
+The divergences accepted are listed by their `case/mode` key on a JSON file
+given by `--approved`.  It exits with 1 when some divergence is not approved.
+"""
+import os
+import sys
+import json
+import time
+import types
+import random
+import argparse
+import subprocess
+
+from . import install
+from . import syntaxes
+from . import benchmark
+from . import PACKAGE_ROOT_DIRECTORY
+
+REFERENCE_PACKAGE = 'wrap_plus_reference'
+REFERENCE_MODULES = ['hyphenation', 'line_break', 'py_textwrap', 'wrap_plus']
+
+# The modules added after the first references, which the older ones do not have
+OPTIONAL_REFERENCE_MODULES = ['hyphenation', 'line_break']
+
+# Without a time budget, so the configured algorithm wraps every paragraph
+MODES = {
+    'classic': {'WrapPlus.semantic_line_wrap': False, 'WrapPlus.time_budget_ms': 0},
+    'semantic': {'WrapPlus.semantic_line_wrap': True, 'WrapPlus.time_budget_ms': 0},
+    'balance': {'WrapPlus.semantic_line_wrap': True, 'WrapPlus.semantic_balance_characters_between_line_wraps': True,
+            'WrapPlus.time_budget_ms': 0},
+}
+
+GENERATORS = [
+    ('prose', "Packages/Text/Plain text.tmLanguage", benchmark.generate_prose),
+    ('lists', "Packages/Text/Plain text.tmLanguage", benchmark.generate_lists),
+    ('comments', "Packages/Python/Python.sublime-syntax", benchmark.generate_comments),
+]
+
+
+def read_reference_sources(revision='HEAD', directory=None):
+    """:returns: A dict with the source of each module of `REFERENCE_MODULES`,
+        from a directory, or from a git revision of the package repository,
+        without the `OPTIONAL_REFERENCE_MODULES` the reference does not have.
+    """
+    sources = {}
+
+    for module_name in REFERENCE_MODULES:
+        file_name = module_name + '.py'
+
+        try:
+            if directory:
+
+                with open( os.path.join( directory, file_name ), encoding='utf-8' ) as input_file:
+                    sources[module_name] = input_file.read()
+
+            else:
+                sources[module_name] = subprocess.check_output( ['git', 'show', '%s:./%s' % (revision, file_name)],
+                        cwd=PACKAGE_ROOT_DIRECTORY, stderr=subprocess.DEVNULL ).decode( 'utf-8' )
+
+        except (OSError, subprocess.CalledProcessError):
+
+            if module_name not in OPTIONAL_REFERENCE_MODULES:
+                raise
+
+    return sources
+
+
+def load_reference(revision='HEAD', directory=None):
+    """Load the plugin of a git revision, or of a directory, as the package
+    `REFERENCE_PACKAGE`, without replacing the commands of the working tree.
+
+    :returns: The reference `wrap_plus` module.
+    """
+    install()
+
+    import sublime_plugin
+    sources = read_reference_sources( revision, directory )
+
+    package = types.ModuleType( REFERENCE_PACKAGE )
+    package.__path__ = []
+    sys.modules[REFERENCE_PACKAGE] = package
+
+    # Its command classes would register themselves over the ones of the working tree
+    registries = [getattr( sublime_plugin, name ) for name in ('text_commands', 'window_commands')
+            if isinstance( getattr( sublime_plugin, name, None ), dict )]
+    saved = [dict( registry ) for registry in registries]
+
+    try:
+
+        for module_name in REFERENCE_MODULES:
+
+            if module_name not in sources:
+                continue
+
+            name = REFERENCE_PACKAGE + '.' + module_name
+            module = types.ModuleType( name )
+            module.__package__ = REFERENCE_PACKAGE
+            module.__file__ = '<%s %s.py>' % (directory or revision, module_name)
+
+            sys.modules[name] = module
+            setattr( package, module_name, module )
+            exec( compile( sources[module_name], module.__file__, 'exec' ), module.__dict__ )
+
+    finally:
+
+        for registry, registered in zip( registries, saved ):
+            registry.clear()
+            registry.update( registered )
+
+    if not hasattr( package.wrap_plus.WrapLinesPlusCommand, '_prepare_wrap' ):
+        raise ValueError( "the reference predates `WrapLinesPlusCommand._prepare_wrap()`" )
+
+    return package.wrap_plus
+
+
+def make_cases(seed=0, count=30):
+    """:returns: A list of (name, syntax, text) tuples, with each fixture case
+        and `count` texts of the random generators seeded by `seed`.
+    """
+    cases = []
+
+    for file_name in sorted( os.listdir( os.path.join( PACKAGE_ROOT_DIRECTORY, 'tests', 'wrap_tests' ) ) ):
+        syntax, texts = benchmark.fixture_texts( file_name )
+
+        for index, text in enumerate( texts ):
+            cases.append( ('fixture-%s#%d' % (file_name, index), syntax, text) )
+
+    randomizer = random.Random( seed )
+
+    for index in range( count ):
+        name, syntax, generator = randomizer.choice( GENERATORS )
+        text = generator( random.Random( randomizer.getrandbits( 32 ) ), randomizer.randint( 1, 6 ) )
+        cases.append( ('random-%s#%d' % (name, index), syntax, text) )
+
+    return cases
+
+
+def best_time(function, repeats):
+    best = float( 'inf' )
+
+    for _ in range( repeats ):
+        start = time.perf_counter()
+        function()
+        best = min( best, time.perf_counter() - start )
+
+    return best
+
+
+def compare_case(reference, syntax, text, mode, width=80, repeats=3):
+    """Wrap each paragraph of a text with the working tree and the reference plugins.
+
+    :returns: A dict with the count of `paragraphs`, the `reference_seconds`,
+        the `current_seconds`, the `speedup` and the first `divergence`, if
+        any, as a dict with the `paragraph` index, its `line` number, the
+        `original` text and the `reference` and `current` outputs.
+    """
+    wrap_plus = install()
+
+    import sublime
+    view = sublime.View( text, syntaxes.find_syntax( syntax ), MODES[mode] )
+    current_command = wrap_plus.WrapLinesPlusCommand( view )
+    reference_command = reference.WrapLinesPlusCommand( view )
+
+    current_wrapper = current_command._prepare_wrap( width )
+    reference_wrapper = reference_command._prepare_wrap( width )
+
+    carets = current_command._lines_carets( [sublime.Region( 0, view.size() )] )
+    paragraphs = current_command._find_selections_paragraphs( carets )
+    prefixed = [current_command._extract_prefix( paragraph ) for paragraph in paragraphs]
+
+    def wrap_all(command, line_wrapper_type):
+        return [line_wrapper_type( list( lines ), initial_indent, subsequent_indent, command._make_text_wrapper() )
+                for initial_indent, subsequent_indent, lines in prefixed]
+
+    reference_outputs = wrap_all( reference_command, reference_wrapper )
+    current_outputs = wrap_all( current_command, current_wrapper )
+
+    reference_seconds = best_time( lambda: wrap_all( reference_command, reference_wrapper ), repeats )
+    current_seconds = best_time( lambda: wrap_all( current_command, current_wrapper ), repeats )
+
+    divergence = None
+
+    for index, (reference_output, current_output) in enumerate( zip( reference_outputs, current_outputs ) ):
+
+        if reference_output != current_output:
+            paragraph = paragraphs[index]
+            divergence = {
+                'paragraph': index,
+                'line': view.rowcol( paragraph.region.begin() )[0] + 1,
+                'original': view.substr( paragraph.region ),
+                'reference': reference_output,
+                'current': current_output,
+            }
+            break
+
+    return {
+        'paragraphs': len( prefixed ),
+        'reference_seconds': reference_seconds,
+        'current_seconds': current_seconds,
+        'speedup': reference_seconds / current_seconds if current_seconds else float( 'inf' ),
+        'divergence': divergence,
+    }
+
+
+def run(reference, cases, modes=None, width=80, repeats=3, output_file=None):
+    """Compare all the cases on each mode.
+
+    :returns: A dict with the results keyed by `case/mode`.
+    """
+    results = {}
+
+    for name, syntax, text in cases:
+
+        for mode in modes or sorted( MODES ):
+            key = '%s/%s' % (name, mode)
+            results[key] = result = compare_case( reference, syntax, text, mode, width, repeats )
+
+            if output_file:
+                divergence = result['divergence']
+                output_file.write( '%-50s %4d paragraphs %7.2fx %s\n' % (key, result['paragraphs'], result['speedup'],
+                        'ok' if divergence is None else 'diverges at paragraph %d (line %d)' % (
+                        divergence['paragraph'], divergence['line'])) )
+
+    return results
+
+
+def report_divergences(results, approved, output_file):
+    """Write the first diverging paragraph of the cases not approved.
+
+    :returns: The count of divergences not approved.
+    """
+    count = 0
+
+    for key, result in sorted( results.items() ):
+        divergence = result['divergence']
+
+        if divergence is None or key in approved:
+            continue
+
+        count += 1
+        output_file.write( "\n%s: paragraph %d, line %d\n" % (key, divergence['paragraph'], divergence['line']) )
+
+        for label in ('original', 'reference', 'current'):
+            output_file.write( "--- %s\n%s\n" % (label, divergence[label]) )
+
+    return count
+
+
+def parse_arguments(arguments):
+    parser = argparse.ArgumentParser( prog='wrap_plus differential', description=__doc__.split( '\n\n' )[0] )
+    parser.add_argument( '--reference', default='HEAD', metavar='REVISION',
+            help="The git revision of the frozen reference (default: %(default)s)." )
+    parser.add_argument( '--reference-directory', metavar='DIRECTORY',
+            help="A directory with the `wrap_plus.py` and `py_textwrap.py` of the reference, instead of a revision." )
+    parser.add_argument( '--modes', default=','.join( sorted( MODES ) ),
+            help="Comma separated wrapping modes to compare (default: %(default)s)." )
+    parser.add_argument( '--approved', metavar='FILE', help="A JSON list of the `case/mode` divergences accepted." )
+    parser.add_argument( '--seed', type=int, default=0, help="The seed of the random texts." )
+    parser.add_argument( '--count', type=int, default=30, help="How many random texts to generate." )
+    parser.add_argument( '-w', '--width', type=int, default=80 )
+    parser.add_argument( '-r', '--repeats', type=int, default=3 )
+    return parser, parser.parse_args( arguments )
+
+
+def main(arguments=None):
+    parser, options = parse_arguments( sys.argv[1:] if arguments is None else arguments )
+    modes = [mode.strip() for mode in options.modes.split( ',' )]
+    unknown = set( modes ) - set( MODES )
+
+    if unknown:
+        parser.error( "unknown modes: %s" % ', '.join( sorted( unknown ) ) )
+
+    approved = set()
+
+    if options.approved:
+
+        with open( options.approved, encoding='utf-8' ) as approved_file:
+            approved = set( json.load( approved_file ) )
+
+    try:
+        reference = load_reference( options.reference, options.reference_directory )
+
+    except (OSError, ValueError, subprocess.CalledProcessError) as error:
+        print( "error: cannot load the reference: %s" % error, file=sys.stderr )
+        return 2
+
+    results = run( reference, make_cases( options.seed, options.count ), modes, options.width,
+            options.repeats, sys.stderr )
+
+    return 1 if report_divergences( results, approved, sys.stderr ) else 0
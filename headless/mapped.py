@@ -0,0 +1,253 @@
+"""Wrap large files through a memory map, instead of reading them into a string.
+
+The line starts are indexed directly over the mapped bytes and the blocks of
+`headless.stream` are found by their byte offsets, so only the blocks with some
+text are decoded, one at a time, to be wrapped.  The output is written to a
+temporary file which atomically replaces the destination, and the blocks not
+changed by the wrapping are copied through from the map without re-encoding.
+"""
+import os
+import re
+import mmap
+import bisect
+import shutil
+import tempfile
+import collections
+
+from array import array
+
+from . import syntaxes
+from .stream import StreamWrapper
+
+blank_line_pattern = re.compile( br'[ \t\r\f\v]*(?:\n|\Z)' )
+
+# The start of the lines which may open or close a block never wrapped, see `wrap_plus.ProtectedBlocks`
+protected_start_pattern = re.compile( br'[ \t]*[`~\\$]' )
+
+
+class LineIndex(object):
+    """The offsets where each line starts on a bytes like object, e.g., a `mmap`.
+
+    The last item is the size of the buffer, so the line `index` is the range
+    `starts[index]:starts[index + 1]`, including its line ending.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.starts = array( 'Q', [0] )
+
+        size = len( buffer )
+        position = buffer.find( b'\n' )
+
+        while position > -1:
+            self.starts.append( position + 1 )
+            position = buffer.find( b'\n', position + 1 )
+
+        if self.starts[-1] != size:
+            self.starts.append( size )
+
+    def __len__(self):
+        return len( self.starts ) - 1
+
+    def is_blank(self, index):
+        return blank_line_pattern.match( self.buffer, self.starts[index], self.starts[index + 1] ) is not None
+
+
+class MappedWrapper(object):
+    """Wraps the blocks of a `LineIndex`, see `StreamWrapper` for the parameters."""
+
+    def __init__(self, syntax=None, settings=None, width=0, line_wrap_type=None, encoding='utf-8',
+            comments_only=False):
+        self.stream_wrapper = StreamWrapper( syntax, settings, width, line_wrap_type, comments_only )
+        self.syntax = self.stream_wrapper.syntax
+        self.encoding = encoding
+
+    def decode(self, buffer, begin, end):
+        return buffer[begin:end].decode( self.encoding ).replace( '\r\n', '\n' )
+
+    def segment_blocks(self, line_index):
+        """Group the lines like `StreamWrapper.segment_blocks()` does, but only
+        decoding the lines when the syntax has to check for open tokens, or
+        when they may open or close a block never wrapped.
+
+        :returns: A generator of (begin, end, has_text) tuples with byte offsets.
+        """
+        starts = line_index.starts
+        buffer = line_index.buffer
+        has_tokens = self.syntax.pattern is not None
+        scanner = syntaxes.TokenScanner( self.syntax )
+        protected_blocks = self.stream_wrapper.protected_blocks
+        protected = None
+
+        block_begin = 0
+        content_end = 0
+
+        for index in range( len( line_index ) ):
+            line_begin = starts[index]
+
+            if not line_index.is_blank( index ):
+
+                if content_end < line_begin and block_begin < content_end:
+                    yield block_begin, line_begin, True
+                    block_begin = line_begin
+                    scanner.reset()
+
+                elif block_begin == content_end < line_begin:
+                    # Blank lines on the start of the file
+                    yield block_begin, line_begin, False
+                    block_begin = line_begin
+
+                content_end = starts[index + 1]
+
+                if has_tokens:
+                    scanner.feed( self.decode( buffer, line_begin, content_end ) )
+
+                if protected_start_pattern.match( buffer, line_begin, content_end ):
+                    protected = protected_blocks.follow_line( self.decode( buffer, line_begin, content_end ), protected )
+
+            elif content_end == line_begin and block_begin < content_end \
+                    and ( protected or has_tokens and scanner.ends_inside_token() ):
+                content_end = starts[index + 1]
+                scanner.feed( self.decode( buffer, line_begin, content_end ) )
+
+        if block_begin < len( buffer ):
+            yield block_begin, len( buffer ), block_begin < content_end
+
+    def wrap_index(self, line_index, changed_lines=None):
+        """:param changed_lines: sorted line numbers, starting at 1, to wrap
+            only the paragraphs with some of them, see `StreamWrapper.scope_blocks()`.
+
+        :returns: A generator of (begin, end, wrapped_bytes) tuples, where
+            wrapped_bytes is None when the block is not changed.
+        """
+        buffer = line_index.buffer
+        first_line_end = line_index.starts[1] if len( line_index ) else 0
+        newline = '\r\n' if buffer[first_line_end - 2:first_line_end] == b'\r\n' else '\n'
+        pending = collections.deque()
+
+        # The blocks without text are passed through without being decoded
+        def decode_blocks():
+            for begin, end, has_text in self.segment_blocks( line_index ):
+
+                if has_text:
+                    pending.append( (begin, end) )
+                    yield self.decode( buffer, begin, end )
+
+        # Neither the blocks without changed lines
+        def decode_changed_blocks():
+            starts = line_index.starts
+            lines = iter( changed_lines )
+            changed_line = next( lines, None )
+
+            for begin, end, has_text in self.segment_blocks( line_index ):
+                first_line = bisect.bisect_left( starts, begin ) + 1
+                end_line = bisect.bisect_left( starts, end ) + 1
+                rows = []
+
+                while changed_line is not None and changed_line < end_line:
+
+                    if changed_line >= first_line:
+                        rows.append( changed_line - first_line )
+
+                    changed_line = next( lines, None )
+
+                if has_text and rows:
+                    pending.append( (begin, end) )
+                    yield self.decode( buffer, begin, end ), rows
+
+        if changed_lines is None:
+            items = self.stream_wrapper.wrap_blocks( decode_blocks() )
+
+        else:
+            items = self.stream_wrapper.wrap_changed_blocks( decode_changed_blocks() )
+
+        for original_text, wrapped_text in items:
+            begin, end = pending.popleft()
+
+            if original_text == wrapped_text:
+                yield begin, end, None
+
+            else:
+                yield begin, end, wrapped_text.replace( '\n', newline ).encode( self.encoding )
+
+
+def write_blocks(items, buffer, output_file):
+    """Write the wrapped blocks, copying the bytes between them from `buffer`.
+
+    :returns: True if any block was changed.
+    """
+    is_changed = False
+    copied_end = 0
+    view = memoryview( buffer )
+
+    try:
+        for begin, end, wrapped_bytes in items:
+
+            if wrapped_bytes is not None:
+                is_changed = True
+                output_file.write( view[copied_end:begin] )
+                output_file.write( wrapped_bytes )
+                copied_end = end
+
+        output_file.write( view[copied_end:] )
+
+    finally:
+        view.release()
+
+    return is_changed
+
+
+def wrap_mapped_file(path, output_path=None, syntax=None, settings=None, width=0, line_wrap_type=None,
+        encoding='utf-8', changed_lines=None, comments_only=False):
+    """Wrap a file through a memory map, replacing `output_path` (by default,
+    the file itself) only if the wrapping changed something.  When
+    `changed_lines` is given, only the paragraphs with some of these line
+    numbers (starting at 1) are wrapped.  With `comments_only`, only the
+    comments and docstrings are.
+
+    :returns: True if the wrapping changed the file contents.
+    """
+    if syntax is None:
+        syntax = syntaxes.syntax_for_file( path )
+
+    output_path = output_path or path
+
+    if os.path.getsize( path ) == 0:
+
+        if output_path != path:
+            shutil.copyfile( path, output_path )
+
+        return False
+
+    mapped_wrapper = MappedWrapper( syntax, settings, width, line_wrap_type, encoding, comments_only )
+
+    with open( path, 'rb' ) as input_file:
+        buffer = mmap.mmap( input_file.fileno(), 0, access=mmap.ACCESS_READ )
+
+        try:
+            directory = os.path.dirname( os.path.abspath( output_path ) )
+            file_descriptor, temporary_path = tempfile.mkstemp( prefix='.wrap_plus-', dir=directory )
+
+            try:
+                with os.fdopen( file_descriptor, 'wb' ) as output_file:
+                    is_changed = write_blocks( mapped_wrapper.wrap_index( LineIndex( buffer ), changed_lines ),
+                            buffer, output_file )
+
+                if is_changed or output_path != path:
+                    shutil.copymode( path, temporary_path )
+                    os.replace( temporary_path, output_path )
+
+                else:
+                    os.remove( temporary_path )
+
+            except BaseException:
+
+                if os.path.exists( temporary_path ):
+                    os.remove( temporary_path )
+
+                raise
+
+        finally:
+            buffer.close()
+
+    return is_changed
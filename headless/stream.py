@@ -0,0 +1,367 @@
+"""Wrap whole files as a pipeline of generators.
+
+    read_lines -> segment_blocks -> find_paragraphs -> extract_prefixes -> wrap_paragraphs -> write_blocks
+    read_lines -> segment_blocks -> find_paragraphs -> check_paragraphs -> number_diagnostics
+
+Each stage pulls one item at a time from the previous one.  A block is a run
+of lines followed by the blank lines ending it, as long as these blank lines
+are not inside some comment, string, code fence or LaTeX verbatim
+environment.  As paragraphs never cross a blank line, each block is wrapped
+like if it was the only text on the view, so the memory used is bounded by
+the largest block instead of the whole file, and the output starts flowing
+before the whole input is read.
+
+Each block is wrapped like selecting all its text, which is not the same as
+selecting all the text of the file, when the file starts with a comment: the
+editor then stops at the first paragraph out of it, see `headless.cli`.
+
+With `comments_only`, only the comments and docstrings are wrapped, found on
+Python by the `tokenize` module, and on the other syntaxes by a selector query.
+"""
+import io
+import tokenize
+
+from . import install
+from . import syntaxes
+
+
+class StreamWrapper(object):
+    """Holds the `wrap_lines_plus` command used by all the stages.
+
+        @param syntax         a `headless.syntaxes.Syntax` or a `Packages/...` syntax path
+        @param settings       a dict with the view settings, like `WrapPlus.semantic_line_wrap`
+        @param width          the wrap width, where 0 means "figure it out" from the settings
+        @param line_wrap_type `semantic`, `classic` or None to use the settings
+        @param comments_only  wrap only the comments and docstrings
+    """
+
+    def __init__(self, syntax=None, settings=None, width=0, line_wrap_type=None, comments_only=False):
+        wrap_plus = install()
+
+        import sublime
+        self.sublime = sublime
+        self.syntax = syntaxes.find_syntax( syntax )
+        self.settings = dict( settings or {} )
+        self.comments_only = comments_only
+        self.comments_selector = wrap_plus.comments_selector
+        self.protected_blocks = wrap_plus.ProtectedBlocks
+
+        # Without a time budget, as all the paragraphs of the files share this command
+        self.command = wrap_plus.WrapLinesPlusCommand( self._new_view( '' ) )
+        self.line_wrapper_type = self.command._prepare_wrap( width, line_wrap_type, time_budget=0 )
+        self.check_fallbacks = 0
+
+    def _new_view(self, text):
+        return self.sublime.View( text, self.syntax, self.settings )
+
+    def segment_blocks(self, lines):
+        """Group the lines into blocks, splitting them after the blank lines
+        which are not inside some token of the syntax, nor inside some block
+        never wrapped, like a code fence or a LaTeX verbatim environment.
+
+        :returns: A generator of strings.
+        """
+        content = []
+        blanks = []
+        scanner = syntaxes.TokenScanner( self.syntax )
+        protected = None
+
+        for line in lines:
+
+            if line.strip():
+
+                if blanks:
+                    yield ''.join( content + blanks )
+                    content = []
+                    blanks = []
+                    scanner.reset()
+
+                content.append( line )
+                scanner.feed( line )
+                protected = self.protected_blocks.follow_line( line, protected )
+
+            elif content and not blanks and ( protected or scanner.ends_inside_token() ):
+                content.append( line )
+                scanner.feed( line )
+
+            else:
+                blanks.append( line )
+
+        if content or blanks:
+            yield ''.join( content + blanks )
+
+    def comment_regions(self, view):
+        """Find the comments and docstrings of a block, with `tokenize` for
+        Python, falling back to the selector query when it cannot tokenize the
+        block alone, e.g., when it ends inside some brackets.
+        """
+        if self.syntax is syntaxes.PYTHON:
+            spans = python_comment_spans( view.substr( self.sublime.Region( 0, view.size() ) ) )
+
+            if spans is not None:
+                return [self.sublime.Region( begin, end ) for begin, end in spans]
+
+        return view.find_by_selector( self.comments_selector )
+
+    def find_paragraphs(self, blocks):
+        """:returns: A generator of (view, paragraphs) tuples, one for each block."""
+        region = self.sublime.Region
+
+        for text in blocks:
+            view = self._new_view( text )
+            self.command.view = view
+
+            if self.comments_only:
+                yield view, self.command._find_comments_paragraphs( self.comment_regions( view ) )
+
+            else:
+                yield view, self.command._find_selections_paragraphs( [region( 0, view.size() )] )
+
+    def scope_blocks(self, blocks, changed_lines):
+        """Pair each block with its changed lines.
+
+        :param changed_lines: an iterable of sorted line numbers, starting at 1
+        :returns: A generator of (text, rows) tuples, where rows are the line
+            indexes inside the block, starting at 0.
+        """
+        changed_lines = iter( changed_lines )
+        changed_line = next( changed_lines, None )
+        first_line = 1
+
+        for text in blocks:
+            end_line = first_line + text.count( '\n' ) + ( not text.endswith( '\n' ) )
+            rows = []
+
+            while changed_line is not None and changed_line < end_line:
+
+                if changed_line >= first_line:
+                    rows.append( changed_line - first_line )
+
+                changed_line = next( changed_lines, None )
+
+            yield text, rows
+            first_line = end_line
+
+    def find_changed_paragraphs(self, items):
+        """Like `find_paragraphs()`, but only finding the paragraphs with some
+        changed line, so the blocks without changes are not parsed at all.
+
+        :param items: an iterable of (text, rows) tuples, see `scope_blocks()`
+        :returns: A generator of (view, paragraphs) tuples, one for each block.
+        """
+        region = self.sublime.Region
+
+        for text, rows in items:
+            view = self._new_view( text )
+            self.command.view = view
+
+            if rows and self.comments_only:
+                rows = set( rows )
+                regions = [comment for comment in self.comment_regions( view )
+                           if rows.intersection( range( view.rowcol( comment.begin() )[0], view.rowcol( comment.end() )[0] + 1 ) )]
+                yield view, self.command._find_comments_paragraphs( regions )
+
+            elif rows:
+                carets = [region( view.text_point( row, 0 ) ) for row in rows]
+                yield view, self.command._find_selections_paragraphs( carets )
+
+            else:
+                yield view, []
+
+    def extract_prefixes(self, items):
+        """:returns: A generator of (view, prefixed) tuples, where prefixed is a
+            list of (paragraph, initial_indent, subsequent_indent, lines) tuples.
+        """
+        for view, paragraphs in items:
+            self.command.view = view
+            yield view, [(paragraph,) + self.command._extract_prefix( paragraph ) for paragraph in paragraphs]
+
+    def wrap_paragraphs(self, items):
+        """:returns: A generator of (original_text, wrapped_text) tuples, one for each block."""
+        for view, prefixed in items:
+            self.command.view = view
+            original_text = view.substr( self.sublime.Region( 0, view.size() ) )
+
+            chunks = []
+            last_end = 0
+
+            for paragraph, initial_indent, subsequent_indent, lines in prefixed:
+                region = paragraph.region
+                chunks.append( original_text[last_end:region.begin()] )
+                # A new text wrapper for each one, as `classic_wrap_text()` changes its indentation
+                wrapper = self.command._make_text_wrapper()
+                chunks.append( self.line_wrapper_type( lines, initial_indent, subsequent_indent, wrapper ) )
+                last_end = region.end()
+
+            chunks.append( original_text[last_end:] )
+            yield original_text, ''.join( chunks )
+
+    def check_paragraphs(self, items):
+        """Tell which paragraphs the wrapping would change, without wrapping
+        the ones decided by the invariants of `_classic_check()`.
+
+        :returns: A generator of (text, diagnostics) tuples, one for each
+            block, where diagnostics is a list of (row, message) tuples, with
+            the rows starting at 0 on the block.
+        """
+        for view, paragraphs in items:
+            self.command.view = view
+            diagnostics = self.command._check_paragraphs( paragraphs, self.line_wrapper_type )
+            self.check_fallbacks += self.command.check_fallbacks
+
+            yield view.substr( self.sublime.Region( 0, view.size() ) ), \
+                    [(view.rowcol( point )[0], message) for point, message in diagnostics]
+
+    def check_lines(self, lines, changed_lines=None):
+        """Chain the stages of the check, see `wrap_changed_lines()` for the
+        `changed_lines`.
+
+        :returns: A generator of (text, diagnostics) tuples, see `check_paragraphs()`.
+        """
+        blocks = self.segment_blocks( lines )
+
+        if changed_lines is None:
+            return self.check_paragraphs( self.find_paragraphs( blocks ) )
+
+        return self.check_paragraphs( self.find_changed_paragraphs( self.scope_blocks( blocks, changed_lines ) ) )
+
+    def wrap_blocks(self, blocks):
+        """Chain the stages after the segmenter.
+
+        :returns: A generator of (original_text, wrapped_text) tuples, one for each block.
+        """
+        return self.wrap_paragraphs( self.extract_prefixes( self.find_paragraphs( blocks ) ) )
+
+    def wrap_changed_blocks(self, items):
+        """Chain the stages after `scope_blocks()`, only wrapping the changed paragraphs."""
+        return self.wrap_paragraphs( self.extract_prefixes( self.find_changed_paragraphs( items ) ) )
+
+    def wrap_lines(self, lines):
+        """Chain all the stages, but the writer.
+
+        :returns: A generator of (original_text, wrapped_text) tuples.
+        """
+        return self.wrap_blocks( self.segment_blocks( lines ) )
+
+    def wrap_changed_lines(self, lines, changed_lines):
+        """Chain all the stages, but the writer, only wrapping the paragraphs
+        with some of the `changed_lines`, see `scope_blocks()`.
+
+        :returns: A generator of (original_text, wrapped_text) tuples.
+        """
+        return self.wrap_changed_blocks( self.scope_blocks( self.segment_blocks( lines ), changed_lines ) )
+
+
+def python_comment_spans(text):
+    """Find the comments and docstrings of some Python code by its tokens,
+    where a docstring is a triple quoted string alone on its statement.
+
+    :returns: A list of (begin, end) offsets, or None if the text does not
+        tokenize.
+    """
+    # Most blocks of code have neither, and tokenizing them is slower than this search
+    if '#' not in text and '"""' not in text and "'''" not in text:
+        return []
+
+    line_starts = [0]
+
+    for line in io.StringIO( text ):
+        line_starts.append( line_starts[-1] + len( line ) )
+
+    spans = []
+    statement_start = True
+    ignored = (tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT)
+
+    try:
+        for token in tokenize.generate_tokens( io.StringIO( text ).readline ):
+
+            if token.type == tokenize.COMMENT or token.type == tokenize.STRING and statement_start \
+                    and token.string.lstrip( 'rRuUbBfF' )[:3] in ('"""', "'''"):
+                spans.append( (line_starts[token.start[0] - 1] + token.start[1],
+                               line_starts[token.end[0] - 1] + token.end[1]) )
+
+            if token.type not in ignored:
+                statement_start = token.type == tokenize.NEWLINE
+
+    except (tokenize.TokenError, SyntaxError):
+        return None
+
+    return spans
+
+
+def read_lines(input_file):
+    """:returns: A generator of the lines of a file object, keeping their line endings."""
+    for line in input_file:
+        yield line
+
+
+def write_blocks(items, output_file=None):
+    """Consume the wrapped blocks, writing them to `output_file`, if any.
+
+    :returns: True if any block was changed by the wrapping.
+    """
+    is_changed = False
+
+    for original_text, wrapped_text in items:
+        is_changed = is_changed or original_text != wrapped_text
+
+        if output_file is not None:
+            output_file.write( wrapped_text )
+
+    return is_changed
+
+
+def number_diagnostics(items):
+    """Consume the checked blocks, numbering their diagnostics by the file lines.
+
+    :returns: A list of (line, message) tuples, with the lines starting at 1.
+    """
+    diagnostics = []
+    first_line = 1
+
+    for text, block_diagnostics in items:
+        diagnostics.extend( (first_line + row, message) for row, message in block_diagnostics )
+        first_line += text.count( '\n' ) + ( not text.endswith( '\n' ) )
+
+    return diagnostics
+
+
+def check_file(input_file, syntax=None, settings=None, width=0, line_wrap_type=None, changed_lines=None,
+        comments_only=False):
+    """Check all paragraphs of a file object, like `wrap_file()`, but without
+    writing anything, and only wrapping the paragraphs the invariants of the
+    classic wrapping cannot decide.
+
+    :returns: A list of (line, message) tuples, one for each paragraph the
+        wrapping would change, with the line of its first changed line.
+    """
+    if syntax is None:
+        syntax = syntaxes.syntax_for_file( getattr( input_file, 'name', '' ) or '' )
+
+    stream_wrapper = StreamWrapper( syntax, settings, width, line_wrap_type, comments_only )
+    return number_diagnostics( stream_wrapper.check_lines( read_lines( input_file ), changed_lines ) )
+
+
+def wrap_file(input_file, output_file=None, syntax=None, settings=None, width=0, line_wrap_type=None,
+        changed_lines=None, comments_only=False):
+    """Wrap all paragraphs of a file object, writing the result to another.
+
+    When `syntax` is not given, it is guessed by the `input_file.name`.  When
+    `changed_lines` is given, only the paragraphs with some of these line
+    numbers (starting at 1) are wrapped.  With `comments_only`, only the
+    comments and docstrings are.
+
+    :returns: True if the wrapping changed the file contents.
+    """
+    if syntax is None:
+        syntax = syntaxes.syntax_for_file( getattr( input_file, 'name', '' ) or '' )
+
+    stream_wrapper = StreamWrapper( syntax, settings, width, line_wrap_type, comments_only )
+
+    if changed_lines is None:
+        items = stream_wrapper.wrap_lines( read_lines( input_file ) )
+
+    else:
+        items = stream_wrapper.wrap_changed_lines( read_lines( input_file ), changed_lines )
+
+    return write_blocks( items, output_file )
@@ -0,0 +1,799 @@
+"""In-memory stand-in for the parts of the Sublime Text `sublime` module used by
+Wrap Plus.
+
+It is registered as `sys.modules['sublime']` by `headless.install()` when the
+real editor API is not available, so `wrap_plus.py` runs unchanged on a plain
+Python interpreter.  Only the behaviour the plugin relies on is implemented:
+regions, selections, settings, a text buffer with line and word lookups and
+scopes provided by `headless.syntaxes`.
+"""
+import re
+import copy
+import json
+import bisect
+
+from . import syntaxes
+
+
+version = lambda: '3211'
+platform = lambda: 'linux'
+arch = lambda: 'x64'
+
+_settings_files = {}
+
+
+def decode_value(data):
+    """Decode a `.sublime-settings` file contents, which allow comments and
+    trailing commas, like `sublime.decode_value()` does.
+    """
+    data = _comments_pattern.sub( lambda match: match.group(1) or '', data )
+    data = _trailing_comma_pattern.sub( r'\1', data )
+    return json.loads( data )
+
+
+def encode_value(value, pretty=False):
+    return json.dumps( value, indent=4 if pretty else None )
+
+
+_comments_pattern = re.compile( r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.DOTALL )
+_trailing_comma_pattern = re.compile( r',(\s*[\]}])' )
+
+
+def load_settings(base_name):
+    if base_name not in _settings_files:
+        _settings_files[base_name] = Settings()
+    return _settings_files[base_name]
+
+
+def save_settings(base_name):
+    pass
+
+
+def set_timeout(callback, delay=0):
+    callback()
+
+
+def set_timeout_async(callback, delay=0):
+    callback()
+
+
+def status_message(message):
+    pass
+
+
+def error_message(message):
+    raise RuntimeError( message )
+
+
+class Region(object):
+    __slots__ = ('a', 'b', 'xpos')
+
+    def __init__(self, a, b=None, xpos=-1):
+        if b is None:
+            b = a
+        self.a = a
+        self.b = b
+        self.xpos = xpos
+
+    def __repr__(self):
+        return '(%d, %d)' % (self.a, self.b)
+
+    def __len__(self):
+        return self.size()
+
+    def __eq__(self, other):
+        return isinstance(other, Region) and self.a == other.a and self.b == other.b
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash( (self.a, self.b) )
+
+    def __lt__(self, other):
+        return self.begin() < other.begin()
+
+    def __contains__(self, value):
+        if isinstance(value, Region):
+            return self.contains(value)
+        return self.contains(value)
+
+    def empty(self):
+        return self.a == self.b
+
+    def begin(self):
+        return min(self.a, self.b)
+
+    def end(self):
+        return max(self.a, self.b)
+
+    def size(self):
+        return abs(self.b - self.a)
+
+    def contains(self, x):
+        if isinstance(x, Region):
+            return self.contains(x.a) and self.contains(x.b)
+        return self.begin() <= x <= self.end()
+
+    def cover(self, region):
+        return Region( min(self.begin(), region.begin()), max(self.end(), region.end()) )
+
+    def intersection(self, region):
+        if not self.intersects(region):
+            return Region(0)
+        return Region( max(self.begin(), region.begin()), min(self.end(), region.end()) )
+
+    def intersects(self, region):
+        lb, le = self.begin(), self.end()
+        rb, re_ = region.begin(), region.end()
+        return (lb == rb and le == re_) or (rb > lb and rb < le) or (lb > rb and lb < re_)
+
+
+class Selection(object):
+    """The regions selected on a view, kept sorted and merged like Sublime Text
+    does.  Iterating it is "live", i.e., regions shifted by `View.replace()`
+    while iterating are seen with their new positions.
+    """
+
+    def __init__(self, view=None):
+        self.view = view
+        self._regions = []
+
+    def __len__(self):
+        return len( self._regions )
+
+    def __getitem__(self, index):
+        return self._regions[index]
+
+    def __iter__(self):
+        index = 0
+        while index < len( self._regions ):
+            yield self._regions[index]
+            index += 1
+
+    def __bool__(self):
+        return bool( self._regions )
+
+    def __repr__(self):
+        return 'Selection(%r)' % self._regions
+
+    def clear(self):
+        self._regions = []
+
+    def add(self, region):
+        if not isinstance(region, Region):
+            region = Region(region)
+
+        begin, end = region.begin(), region.end()
+
+        # The regions are mostly added in order, after all the others
+        if not self._regions or self._regions[-1].end() < begin:
+            self._regions.append( Region(begin, end) if region.a <= region.b else Region(end, begin) )
+            return
+
+        kept = []
+
+        for other in self._regions:
+            other_begin, other_end = other.begin(), other.end()
+
+            if other_begin < end and begin < other_end \
+                    or other_begin == begin and other_end == end \
+                    or other.empty() and begin <= other_begin <= end \
+                    or region.empty() and other_begin <= begin <= other_end:
+                begin = min(begin, other_begin)
+                end = max(end, other_end)
+
+            else:
+                kept.append(other)
+
+        bisect.insort( kept, Region(begin, end) if region.a <= region.b else Region(end, begin) )
+        self._regions = kept
+
+    def add_all(self, regions):
+        for region in regions:
+            self.add(region)
+
+    def subtract(self, region):
+        self._regions = [other for other in self._regions if not region.contains(other)]
+
+    def contains(self, region):
+        return any( other.contains(region) for other in self._regions )
+
+    def _shift(self, begin, end, delta, is_insertion):
+        regions = self._regions
+        first = _first_region_after( regions, begin, lambda region: region.end(), is_insertion )
+        last = _first_region_after( regions, end, lambda region: region.begin(), is_insertion or begin < end )
+        last = max( first, last )
+
+        # Only the regions around the edit are clipped, the ones after it are moved as a whole
+        shifted = regions[:first]
+
+        for region in regions[first:last]:
+            shifted.append( Region(
+                    _shift_point(region.a, begin, end, delta, is_insertion),
+                    _shift_point(region.b, begin, end, delta, is_insertion) ) )
+
+        if delta:
+            shifted.extend( Region(region.a + delta, region.b + delta) for region in regions[last:] )
+
+        else:
+            shifted.extend( regions[last:] )
+
+        self._regions = shifted
+
+
+def _first_region_after(regions, point, get_point, is_inclusive):
+    # The sorted selection regions have both their beginnings and ends in order
+    low, high = 0, len( regions )
+
+    while low < high:
+        middle = ( low + high ) // 2
+        middle_point = get_point( regions[middle] )
+
+        if middle_point < point or not is_inclusive and middle_point == point:
+            low = middle + 1
+
+        else:
+            high = middle
+
+    return low
+
+
+def _shift_point(point, begin, end, delta, is_insertion):
+    if is_insertion:
+        return point + delta if point >= begin else point
+
+    if point <= begin:
+        return point
+
+    if point >= end:
+        return point + delta
+
+    return min( point, end + delta )
+
+
+class Settings(object):
+
+    def __init__(self, values=None, parent=None):
+        self._values = dict( values or {} )
+        self._parent = parent
+        self._callbacks = {}
+
+    def get(self, key, default=None):
+        # Sublime Text decodes a new value on each call, so changing it does not change the settings
+        if key in self._values:
+            value = self._values[key]
+            return copy.deepcopy( value ) if isinstance( value, (list, dict) ) else value
+
+        if self._parent is not None:
+            return self._parent.get( key, default )
+
+        return default
+
+    def set(self, key, value):
+        self._values[key] = value
+        self._changed()
+
+    def erase(self, key):
+        self._values.pop( key, None )
+        self._changed()
+
+    def _changed(self):
+        for callbacks in list( self._callbacks.values() ):
+
+            for callback in callbacks:
+                callback()
+
+    def has(self, key):
+        return key in self._values or self._parent is not None and self._parent.has( key )
+
+    def to_dict(self):
+        values = self._parent.to_dict() if self._parent is not None else {}
+        values.update( self._values )
+        return values
+
+    def add_on_change(self, tag, callback):
+        self._callbacks.setdefault( tag, [] ).append( callback )
+
+    def clear_on_change(self, tag):
+        self._callbacks.pop( tag, None )
+
+
+class Edit(object):
+
+    def __init__(self, edit_token=0):
+        self.edit_token = edit_token
+
+
+_view_id = 0
+
+# Characters Sublime Text uses by default to split words on `View.word()`
+default_word_separators = "./\\()\"'-:,.;<>~!@#$%^&*|+=[]{}`~?"
+
+
+class View(object):
+    """A text buffer with the view API used by the plugin.
+
+    The text is held as a single string and a sorted list of line start
+    offsets, so `line()` and `full_line()` are binary searches.  Scopes are
+    computed lazily by the `headless.syntaxes` definition set with
+    `set_syntax_file()`.
+    """
+
+    def __init__(self, text='', syntax=None, settings=None, window=None):
+        global _view_id
+        _view_id += 1
+
+        self._id = _view_id
+        self._window = window
+        self._settings = Settings( settings, parent=load_settings( 'Preferences.sublime-settings' ) )
+        self._selection = Selection( self )
+        self._file_name = None
+        self._scratch = False
+        self._change_count = 0
+        self._name = ''
+        self._regions = {}
+
+        self.syntax = syntaxes.find_syntax( syntax )
+        self._set_text( text )
+
+    def __repr__(self):
+        return 'View(%d)' % self._id
+
+    def __eq__(self, other):
+        return isinstance(other, View) and self._id == other._id
+
+    def __hash__(self):
+        return self._id
+
+    def _set_text(self, text):
+        self._text = text
+        self._line_starts = None
+        self._tokens = None
+        self._change_count += 1
+
+    def id(self):
+        return self._id
+
+    def buffer_id(self):
+        return self._id
+
+    def is_valid(self):
+        return True
+
+    def is_loading(self):
+        return False
+
+    def is_scratch(self):
+        return self._scratch
+
+    def set_scratch(self, scratch):
+        self._scratch = scratch
+
+    def is_read_only(self):
+        return False
+
+    def set_read_only(self, value):
+        pass
+
+    def file_name(self):
+        return self._file_name
+
+    def set_name(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+    def window(self):
+        return self._window
+
+    def change_count(self):
+        return self._change_count
+
+    def settings(self):
+        return self._settings
+
+    def line_endings(self):
+        return 'Unix'
+
+    def size(self):
+        return len( self._text )
+
+    def visible_region(self):
+        # Without a window drawing it, the whole text is on the screen
+        return Region( 0, self.size() )
+
+    def sel(self):
+        return self._selection
+
+    def show(self, location, show_surrounds=True):
+        pass
+
+    def show_at_center(self, location):
+        pass
+
+    def set_syntax_file(self, syntax_file):
+        self.syntax = syntaxes.find_syntax( syntax_file )
+        self._tokens = None
+
+        # As on Sublime Text, which notifies the change of syntax to the settings listeners
+        self._settings.set( 'syntax', syntax_file )
+
+    def assign_syntax(self, syntax_file):
+        self.set_syntax_file( syntax_file )
+
+    def substr(self, x):
+        if isinstance(x, Region):
+            return self._text[x.begin():x.end()]
+
+        if 0 <= x < len( self._text ):
+            return self._text[x]
+
+        return '\x00'
+
+    def _get_line_starts(self):
+        if self._line_starts is None:
+            line_starts = [0]
+            find = self._text.find
+            index = find( '\n' )
+
+            while index > -1:
+                line_starts.append( index + 1 )
+                index = find( '\n', index + 1 )
+
+            self._line_starts = line_starts
+
+        return self._line_starts
+
+    def _line_bounds(self, point):
+        point = max( 0, min( point, len( self._text ) ) )
+        line_starts = self._get_line_starts()
+        index = bisect.bisect_right( line_starts, point ) - 1
+
+        begin = line_starts[index]
+        end = line_starts[index + 1] - 1 if index + 1 < len( line_starts ) else len( self._text )
+        return begin, end
+
+    def line(self, x):
+        if isinstance(x, Region):
+            begin = self._line_bounds( x.begin() )[0]
+            end = self._line_bounds( x.end() )[1]
+            return Region( begin, end )
+
+        return Region( *self._line_bounds( x ) )
+
+    def full_line(self, x):
+        region = self.line( x )
+        end = region.end()
+
+        if end < len( self._text ):
+            end += 1
+
+        return Region( region.begin(), end )
+
+    def lines(self, region):
+        lines = []
+        line_starts = self._get_line_starts()
+        begin = max( 0, region.begin() )
+        end = min( len( self._text ), region.end() )
+
+        index = bisect.bisect_right( line_starts, begin ) - 1
+        while index < len( line_starts ) and line_starts[index] <= end:
+            line_begin = line_starts[index]
+            line_end = line_starts[index + 1] - 1 if index + 1 < len( line_starts ) else len( self._text )
+            lines.append( Region( line_begin, line_end ) )
+            index += 1
+
+        return lines
+
+    def split_by_newlines(self, region):
+        return [line.intersection( region ) if not region.contains( line ) else line
+                for line in self.lines( region )]
+
+    def rowcol(self, point):
+        line_starts = self._get_line_starts()
+        row = bisect.bisect_right( line_starts, point ) - 1
+        return row, point - line_starts[row]
+
+    def text_point(self, row, col):
+        line_starts = self._get_line_starts()
+        row = max( 0, min( row, len( line_starts ) - 1 ) )
+        return min( line_starts[row] + col, len( self._text ) )
+
+    def _character_class(self, character, separators):
+        if character == '\x00':
+            return 0
+
+        if character.isspace():
+            return 1
+
+        if character in separators:
+            return 2
+
+        return 3
+
+    def word(self, x):
+        if isinstance(x, Region):
+            begin = self.word( x.begin() ).begin()
+            end = self.word( x.end() ).end()
+            return Region( begin, end )
+
+        text = self._text
+        separators = self._settings.get( 'word_separators', default_word_separators )
+        point = max( 0, min( x, len( text ) ) )
+
+        right = self._character_class( self.substr( point ), separators )
+        left = self._character_class( self.substr( point - 1 ), separators )
+
+        if right == 3 or left != 3:
+            wanted = right if right else left
+        else:
+            wanted = left
+
+        begin = point
+        while begin > 0 and self._character_class( text[begin - 1], separators ) == wanted:
+            begin -= 1
+
+        end = point
+        while end < len( text ) and self._character_class( text[end], separators ) == wanted:
+            end += 1
+
+        return Region( begin, end )
+
+    def find(self, pattern, start_point, flags=0):
+        regex_flags = re.IGNORECASE if flags & IGNORECASE else 0
+
+        if flags & LITERAL:
+            pattern = re.escape( pattern )
+
+        match = re.compile( pattern, regex_flags | re.MULTILINE ).search( self._text, start_point )
+        if match:
+            return Region( match.start(), match.end() )
+
+        return Region( -1, -1 )
+
+    def find_all(self, pattern, flags=0):
+        regex_flags = re.IGNORECASE if flags & IGNORECASE else 0
+
+        if flags & LITERAL:
+            pattern = re.escape( pattern )
+
+        return [Region( match.start(), match.end() )
+                for match in re.compile( pattern, regex_flags | re.MULTILINE ).finditer( self._text )]
+
+    def _get_tokens(self):
+        if self._tokens is None:
+            self._tokens = self.syntax.tokenize( self._text )
+
+        return self._tokens
+
+    def scope_name(self, point):
+        return self._get_tokens().scope_name( point )
+
+    def extract_scope(self, point):
+        begin, end = self._get_tokens().extract_scope( point, len( self._text ) )
+        return Region( begin, end )
+
+    def score_selector(self, point, selector):
+        return score_selector( self.scope_name( point ), selector )
+
+    def match_selector(self, point, selector):
+        return self.score_selector( point, selector ) > 0
+
+    def find_by_selector(self, selector):
+        return [Region( begin, end ) for begin, end in self._get_tokens().find_by_selector( selector )]
+
+    def meta_info(self, key, point):
+        if key == 'shellVariables':
+            return self.syntax.shell_variables()
+
+        return None
+
+    def add_regions(self, key, regions, scope='', icon='', flags=0):
+        self._regions[key] = list( regions )
+
+    def get_regions(self, key):
+        return list( self._regions.get( key, [] ) )
+
+    def erase_regions(self, key):
+        self._regions.pop( key, None )
+
+    def insert(self, edit, point, text):
+        self._text = self._text[:point] + text + self._text[point:]
+        self._shift_line_starts( point, point, text )
+        self._tokens = None
+        self._change_count += 1
+        self._shift_regions( point, point, len( text ), True )
+        return len( text )
+
+    def erase(self, edit, region):
+        self.replace( edit, region, '' )
+
+    def replace(self, edit, region, text):
+        begin, end = region.begin(), region.end()
+        self._text = self._text[:begin] + text + self._text[end:]
+        self._shift_line_starts( begin, end, text )
+        self._tokens = None
+        self._change_count += 1
+        self._shift_regions( begin, end, len( text ) - ( end - begin ), False )
+
+    def _shift_line_starts(self, begin, end, text):
+        # Shift the line starts after an edit, instead of finding them all again
+        line_starts = self._line_starts
+
+        if line_starts is None:
+            return
+
+        first = bisect.bisect_right( line_starts, begin )
+        last = bisect.bisect_right( line_starts, end )
+        delta = len( text ) - ( end - begin )
+
+        inserted = [begin + index + 1 for index, character in enumerate( text ) if character == '\n']
+        line_starts[first:] = inserted + [start + delta for start in line_starts[last:]]
+
+    def _shift_regions(self, begin, end, delta, is_insertion):
+        # The selection and the regions added by `add_regions()` follow the edits
+        self._selection._shift( begin, end, delta, is_insertion )
+
+        for key, regions in self._regions.items():
+            self._regions[key] = [Region(
+                    _shift_point( region.a, begin, end, delta, is_insertion ),
+                    _shift_point( region.b, begin, end, delta, is_insertion ) ) for region in regions]
+
+    def run_command(self, cmd, args=None):
+        from . import sublime_plugin
+        sublime_plugin.run_text_command( self, cmd, args or {} )
+
+
+def score_selector(scope_name, selector):
+    """Score a simple selector, as `comment` or `text, source.python`, against a
+    scope name, the same way `View.score_selector()` decides it matches.
+    """
+    scopes = scope_name.split()
+    best = 0
+
+    for alternative in selector.split( ',' ):
+        atoms = alternative.split()
+
+        if not atoms:
+            continue
+
+        scope_index = 0
+        score = 0
+
+        for atom in atoms:
+            while scope_index < len( scopes ):
+                scope = scopes[scope_index]
+                scope_index += 1
+
+                if scope == atom or scope.startswith( atom + '.' ):
+                    score = ( score << 3 ) + atom.count( '.' ) + 1
+                    break
+
+            else:
+                score = 0
+                break
+
+        best = max( best, score )
+
+    return best
+
+
+LITERAL = 1
+IGNORECASE = 2
+
+DRAW_EMPTY = 1
+HIDE_ON_MINIMAP = 2
+DRAW_EMPTY_AS_OVERWRITE = 4
+DRAW_NO_FILL = 32
+DRAW_NO_OUTLINE = 256
+DRAW_SOLID_UNDERLINE = 512
+DRAW_STIPPLED_UNDERLINE = 1024
+DRAW_SQUIGGLY_UNDERLINE = 2048
+PERSISTENT = 16
+HIDDEN = 128
+
+LAYOUT_INLINE = 0
+LAYOUT_BELOW = 1
+LAYOUT_BLOCK = 2
+
+
+class Phantom(object):
+
+    def __init__(self, region, content, layout, on_navigate=None):
+        self.region = region
+        self.content = content
+        self.layout = layout
+        self.on_navigate = on_navigate
+
+
+class PhantomSet(object):
+    """The phantoms of a view, which are not drawn, only kept for the tests."""
+
+    def __init__(self, view, key=""):
+        self.view = view
+        self.key = key
+        self.phantoms = []
+
+    def update(self, new_phantoms):
+        self.phantoms = list( new_phantoms )
+
+
+class Window(object):
+    """A window holding the headless views, created by `active_window()`."""
+
+    def __init__(self):
+        self._views = []
+        self._panels = {}
+        self._active_panel = None
+        self._active_view = None
+
+    def id(self):
+        return 1
+
+    def views(self):
+        return list( self._views )
+
+    def new_file(self):
+        view = View( window=self )
+        self._views.append( view )
+        self._active_view = view
+        return view
+
+    def active_view(self):
+        return self._active_view
+
+    def focus_view(self, view):
+        self._active_view = view
+
+    def close_view(self, view):
+        if view in self._views:
+            self._views.remove( view )
+
+        self._active_view = self._views[-1] if self._views else None
+
+    def run_command(self, cmd, args=None):
+        from . import sublime_plugin
+        sublime_plugin.run_window_command( self, cmd, args or {} )
+
+    def show_input_panel(self, caption, initial_text, on_done, on_change, on_cancel):
+        panel = View( initial_text, window=self )
+        panel.settings().set( 'is_widget', True )
+        panel.caption = caption
+        panel.on_done = on_done
+        panel.on_change = on_change
+        panel.on_cancel = on_cancel
+        self._panels['input'] = panel
+        return panel
+
+    def create_output_panel(self, name, unlisted=False):
+        panel = View( window=self )
+        panel.settings().set( 'is_widget', True )
+        self._panels['output.' + name] = panel
+        return panel
+
+    def find_output_panel(self, name):
+        return self._panels.get( 'output.' + name )
+
+    def active_panel(self):
+        return self._active_panel
+
+    def destroy_output_panel(self, name):
+        self._panels.pop( 'output.' + name, None )
+
+
+_active_window = None
+
+
+def active_window():
+    global _active_window
+
+    if _active_window is None:
+        _active_window = Window()
+
+    return _active_window
+
+
+def windows():
+    return [active_window()]
@@ -0,0 +1,157 @@
+"""In-memory stand-in for the `sublime_plugin` module, see `headless.sublime`.
+
+Commands register themselves by their class name, the same way Sublime Text
+names them, e.g., `WrapLinesPlusCommand` becomes `wrap_lines_plus`.
+"""
+import re
+
+from . import sublime
+
+
+text_commands = {}
+window_commands = {}
+all_callbacks = {
+    'on_modified': [],
+    'on_pre_save': [],
+    'on_post_save': [],
+    'on_close': [],
+    'on_load': [],
+    'on_activated': [],
+    'on_selection_modified': [],
+}
+
+
+def command_name(class_name):
+    class_name = re.sub( r'Command$', '', class_name )
+    return re.sub( r'(?<=[a-z0-9])([A-Z])', r'_\1', class_name ).lower()
+
+
+class Command(object):
+
+    def is_enabled(self, *args, **kwargs):
+        return True
+
+    def is_visible(self, *args, **kwargs):
+        return True
+
+    def description(self, *args, **kwargs):
+        return None
+
+    def name(self):
+        return command_name( self.__class__.__name__ )
+
+
+class TextCommand(Command):
+
+    def __init__(self, view):
+        self.view = view
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__( **kwargs )
+        text_commands[command_name( cls.__name__ )] = cls
+
+
+class WindowCommand(Command):
+
+    def __init__(self, window):
+        self.window = window
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__( **kwargs )
+        window_commands[command_name( cls.__name__ )] = cls
+
+
+class ApplicationCommand(Command):
+    pass
+
+
+class EventListener(object):
+    pass
+
+
+class ViewEventListener(object):
+
+    def __init__(self, view):
+        self.view = view
+
+    @classmethod
+    def is_applicable(cls, settings):
+        return True
+
+    @classmethod
+    def applies_to_primary_view_only(cls):
+        return True
+
+
+def run_text_command(view, name, args):
+    command = text_commands.get( name )
+
+    if command is None:
+        raise ValueError( "Unknown text command '%s'" % name )
+
+    return command( view ).run( sublime.Edit(), **args )
+
+
+def run_window_command(window, name, args):
+    command = window_commands.get( name )
+
+    if command is None:
+        raise ValueError( "Unknown window command '%s'" % name )
+
+    return command( window ).run( **args )
+
+
+class AppendCommand(TextCommand):
+
+    def run(self, edit, characters='', force=False, scroll_to_end=False):
+        self.view.insert( edit, self.view.size(), characters )
+
+
+class InsertCommand(TextCommand):
+
+    def run(self, edit, characters=''):
+        # Like in Sublime Text, the carets end after the inserted text
+        for region in reversed( list( self.view.sel() ) ):
+            self.view.erase( edit, region )
+            self.view.insert( edit, region.begin(), characters )
+
+
+class LeftDeleteCommand(TextCommand):
+
+    def run(self, edit):
+        for region in reversed( list( self.view.sel() ) ):
+
+            if region.empty():
+                region = sublime.Region( max( 0, region.begin() - 1 ), region.begin() )
+
+            self.view.erase( edit, region )
+
+
+class RightDeleteCommand(TextCommand):
+
+    def run(self, edit):
+        for region in reversed( list( self.view.sel() ) ):
+
+            if region.empty():
+                region = sublime.Region( region.begin(), min( self.view.size(), region.begin() + 1 ) )
+
+            self.view.erase( edit, region )
+
+
+class SelectAllCommand(TextCommand):
+
+    def run(self, edit):
+        self.view.sel().clear()
+        self.view.sel().add( sublime.Region( 0, self.view.size() ) )
+
+
+class ShowPanelCommand(WindowCommand):
+
+    def run(self, panel='', toggle=False):
+        self.window._active_panel = panel
+
+
+class CloseFileCommand(WindowCommand):
+
+    def run(self):
+        self.window.close_view( self.window.active_view() )
@@ -0,0 +1,288 @@
+"""Minimal syntax definitions providing scopes and comment characters for the
+headless view.
+
+Each definition knows its base scope, the file extensions it applies to, the
+`shellVariables` Sublime Text would report for it (from where `Default.comment`
+builds the comment data) and a handful of patterns for the only scopes Wrap
+Plus looks at: comments, strings, Python docstrings and Markdown headings.
+"""
+import os
+import re
+import bisect
+
+
+class Tokens(object):
+    """The scoped spans found on a text, sorted by their start offset."""
+
+    def __init__(self, base_scope, spans, size, last_character):
+        self.base_scope = base_scope
+        self.spans = spans
+        self.starts = [span[0] for span in spans]
+        self.size = size
+        self.last_character = last_character
+
+    def _find(self, point):
+        # The end of a file without a trailing new line is still part of the
+        # last token, e.g., a line comment in the last line.
+        if point >= self.size and self.last_character not in ('', '\n'):
+            point = self.size - 1
+
+        index = bisect.bisect_right( self.starts, point ) - 1
+
+        if index > -1:
+            span = self.spans[index]
+
+            if point < span[1]:
+                return span
+
+        return None
+
+    def scope_name(self, point):
+        span = self._find( point )
+
+        if span:
+            return '%s %s ' % (self.base_scope, span[2])
+
+        return self.base_scope + ' '
+
+    def extract_scope(self, point, size):
+        span = self._find( point )
+
+        if span:
+            return span[0], span[1]
+
+        return 0, size
+
+    def find_by_selector(self, selector):
+        from .sublime import score_selector
+        return [(span[0], span[1]) for span in self.spans
+                if score_selector( '%s %s' % (self.base_scope, span[2]), selector )]
+
+
+class Syntax(object):
+    """
+        @param path            the `Packages/...` path Sublime Text would use for it
+        @param base_scope      the scope of the whole file, e.g., `source.python`
+        @param extensions      the file extensions handled by this syntax
+        @param shell_variables a list of (name, value) tuples, like `TM_COMMENT_START`
+        @param rules           a list of (pattern, scope) tuples, tried from left to right
+    """
+
+    def __init__(self, path, base_scope, extensions=(), shell_variables=(), rules=()):
+        self.path = path
+        self.base_scope = base_scope
+        self.extensions = extensions
+        self._shell_variables = [{'name': name, 'value': value} for name, value in shell_variables]
+        self.rules = rules
+
+        if rules:
+            self.pattern = re.compile( '|'.join( '(?P<rule%d>%s)' % (index, pattern)
+                    for index, (pattern, scope) in enumerate( rules ) ), re.MULTILINE )
+            self.rule_patterns = [re.compile( pattern, re.MULTILINE ) for pattern, scope in rules]
+
+        else:
+            self.pattern = None
+            self.rule_patterns = []
+
+    def __repr__(self):
+        return 'Syntax(%r)' % self.path
+
+    def shell_variables(self):
+        return [dict( variable ) for variable in self._shell_variables]
+
+    def is_text(self):
+        return self.base_scope.startswith( 'text' )
+
+    def tokenize(self, text):
+        spans = []
+
+        if self.pattern:
+
+            for match in self.pattern.finditer( text ):
+                begin, end = match.span()
+
+                # The docstring patterns match from the start of the line
+                while begin < end and text[begin] in ' \t':
+                    begin += 1
+
+                if begin == end:
+                    continue
+
+                scope = self.rules[int( match.lastgroup[4:] )][1]
+                spans.append( (begin, end, scope) )
+
+        return Tokens( self.base_scope, spans, len( text ), text[-1:] )
+
+    def ends_inside_token(self, text):
+        """Whether a blank line appended to `text` would be part of some token,
+        e.g., when the text ends inside a block comment or a code fence.
+        """
+        spans = self.tokenize( text + '\n' ).spans
+        return bool( spans ) and spans[-1][1] > len( text )
+
+
+class TokenScanner(object):
+    """Tells whether the lines fed so far end inside some token, like
+    `Syntax.ends_inside_token()` on all of them, but scanning each line about
+    once: the lines before the last point outside of any token are not scanned
+    again, and a token left open is only continued over the lines fed after it.
+
+    The tokens continue the same way from the start of any of their lines, so
+    an open token is continued by matching its rule over the text of its first
+    line followed by the new lines.
+    """
+
+    def __init__(self, syntax):
+        self.syntax = syntax
+        self.reset()
+
+    def reset(self):
+        # The lines since the last point outside of any token, and how many of them were scanned
+        self.lines = []
+        self.scanned = 0
+
+        # The (rule_pattern, opener) of the token left open, where `opener` is its first line
+        self.open_token = None
+
+    def feed(self, line):
+        self.lines.append( line )
+
+    def ends_inside_token(self):
+        """Whether a blank line fed next would be part of some token."""
+        if self.syntax.pattern is None:
+            return False
+
+        text = ''.join( self.lines[self.scanned:] )
+        self.scanned = len( self.lines )
+        position = 0
+
+        if self.open_token:
+            rule_pattern, opener = self.open_token
+            self.open_token = None
+            probe = opener + text + '\n'
+            match = rule_pattern.match( probe )
+
+            if match is None:
+                # It does not continue as it started, e.g., after a backslash ending a line of a string
+                self.scanned = 0
+                return self.ends_inside_token()
+
+            if match.end() > len( probe ) - 1:
+                self.open_token = (rule_pattern, opener)
+                return True
+
+            position = match.end() - len( opener )
+
+        return self._scan( text, position )
+
+    def _scan(self, text, position):
+        last = None
+
+        for match in self.syntax.pattern.finditer( text + '\n', position ):
+            last = match
+
+        if last is None or last.end() <= len( text ) or not last.group().strip():
+            self.lines = []
+            self.scanned = 0
+            return False
+
+        line_end = text.find( '\n', last.start() )
+        line_end = len( text ) if line_end < 0 else line_end + 1
+        self.open_token = (self.syntax.rule_patterns[int( last.lastgroup[4:] )], text[last.start():line_end])
+        return True
+
+
+def _triple_quoted(quote):
+    return r'[rRbBuU]{0,2}%s(?:\\.|[^\\])*?(?:%s|\Z)' % (quote, quote)
+
+
+def _single_quoted(quote):
+    return r'[rRbBuUfF]{0,2}%s(?:\\.|[^%s\\\n])*(?:%s|$)' % (quote, quote, quote)
+
+
+PLAIN_TEXT = Syntax( 'Packages/Text/Plain text.tmLanguage', 'text.plain', ('txt', 'text', 'rst') )
+
+PYTHON = Syntax( 'Packages/Python/Python.sublime-syntax', 'source.python', ('py', 'pyw', 'pyi'),
+    shell_variables=[('TM_COMMENT_START', '# ')],
+    rules=[
+        # Docstrings are the triple quoted strings starting a line
+        (r'^[ \t]*' + _triple_quoted( '"""' ),
+                'comment.block.documentation.python string.quoted.double.block.python'),
+        (r'^[ \t]*' + _triple_quoted( "'''" ),
+                'comment.block.documentation.python string.quoted.single.block.python'),
+        (_triple_quoted( '"""' ), 'string.quoted.double.block.python'),
+        (_triple_quoted( "'''" ), 'string.quoted.single.block.python'),
+        (_single_quoted( '"' ), 'string.quoted.double.single-line.python'),
+        (_single_quoted( "'" ), 'string.quoted.single.single-line.python'),
+        (r'#[^\n]*\n?', 'comment.line.number-sign.python'),
+    ] )
+
+_C_RULES = [
+    (r'/\*(?s:.*?)(?:\*/|\Z)', 'comment.block.c'),
+    (r'//[^\n]*\n?', 'comment.line.double-slash.c'),
+    (_single_quoted( '"' ), 'string.quoted.double.c'),
+    (r"'(?:\\.|[^'\\\n])*'", 'string.quoted.single.c'),
+]
+
+_C_SHELL_VARIABLES = [
+    ('TM_COMMENT_START', '// '),
+    ('TM_COMMENT_START_2', '/*'),
+    ('TM_COMMENT_END_2', '*/'),
+]
+
+C = Syntax( 'Packages/C++/C.sublime-syntax', 'source.c', ('c', 'h'),
+    shell_variables=_C_SHELL_VARIABLES, rules=_C_RULES )
+
+CPP = Syntax( 'Packages/C++/C++.sublime-syntax', 'source.c++', ('cpp', 'cc', 'cxx', 'hpp', 'hh', 'hxx'),
+    shell_variables=_C_SHELL_VARIABLES, rules=_C_RULES )
+
+MARKDOWN = Syntax( 'Packages/Markdown/Markdown.sublime-syntax', 'text.html.markdown', ('md', 'markdown', 'mdown'),
+    shell_variables=[('TM_COMMENT_START', '<!-- '), ('TM_COMMENT_END', ' -->')],
+    rules=[
+        (r'^[ \t]{0,3}(?P<fence>```|~~~)(?s:.*?)(?:^[ \t]{0,3}(?P=fence)[^\n]*$|\Z)', 'markup.raw.code-fence.markdown'),
+        (r'<!--(?s:.*?)(?:-->|\Z)', 'comment.block.html'),
+        (r'^#{1,6}(?:[ \t][^\n]*)?$\n?', 'markup.heading.markdown'),
+    ] )
+
+LATEX = Syntax( 'Packages/LaTeX/LaTeX.sublime-syntax', 'text.tex.latex', ('tex', 'sty', 'cls', 'ltx', 'bib'),
+    shell_variables=[('TM_COMMENT_START', '% ')],
+    rules=[
+        (r'(?<!\\)%[^\n]*\n?', 'comment.line.percentage.tex'),
+    ] )
+
+SYNTAXES = [PLAIN_TEXT, PYTHON, C, CPP, MARKDOWN, LATEX]
+
+
+def find_syntax(syntax_file):
+    """Get the definition for a `Packages/...` syntax path, falling back to plain
+    text for unknown ones.
+    """
+    if isinstance(syntax_file, Syntax):
+        return syntax_file
+
+    for syntax in SYNTAXES:
+
+        if syntax.path == syntax_file:
+            return syntax
+
+    if syntax_file:
+        name = os.path.splitext( os.path.basename( syntax_file ) )[0].lower()
+
+        for syntax in SYNTAXES:
+
+            if os.path.splitext( os.path.basename( syntax.path ) )[0].lower() == name:
+                return syntax
+
+    return PLAIN_TEXT
+
+
+def syntax_for_file(file_name):
+    """Guess the syntax of a file by its extension."""
+    extension = os.path.splitext( file_name )[1].lstrip( '.' ).lower()
+
+    for syntax in SYNTAXES:
+
+        if extension in syntax.extensions:
+            return syntax
+
+    return PLAIN_TEXT
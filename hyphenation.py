@@ -0,0 +1,225 @@
+"""Hyphenation of the words by the patterns of Frank Liang, as TeX does, for
+breaking the long words instead of leaving ragged lines.
+
+The patterns are read from a local file, either a TeX `hyph-*.tex` with its
+`\\patterns{}` and `\\hyphenation{}` lists, or a file with one pattern per
+line, like the `hyph_*.dic` of LibreOffice.  They are compiled into a trie of
+nested dicts, walked once from each letter of the word, and the break points
+of each word are memoized, so a document repeating the same words walks the
+trie once per distinct word.
+"""
+import os
+import re
+
+# The key of the trie nodes holding the points of the pattern ending on them
+POINTS = None
+
+pattern_tokens = re.compile(r'\\(patterns|hyphenation)\s*\{([^}]*)\}')
+word_pattern = re.compile(r'^(\W*)([^\W\d_]+)(\W*)$')
+hyphenated_lines_pattern = re.compile(r'(?<![\w-])([^\W\d_]+)-\n([^\W\d_]+)(?![\w-])')
+
+
+def parse_patterns(text):
+    """Read the patterns and the hyphenation exceptions of a pattern file.
+
+    :returns: A (patterns, exceptions) tuple of lists of strings.
+    """
+    lines = [line.split('%', 1)[0] for line in text.splitlines()]
+    blocks = pattern_tokens.findall('\n'.join(lines))
+
+    if blocks:
+        patterns = [token for name, block in blocks if name == 'patterns' for token in block.split()]
+        exceptions = [token for name, block in blocks if name == 'hyphenation' for token in block.split()]
+        return patterns, exceptions
+
+    patterns = []
+    exceptions = []
+
+    for line in lines:
+        tokens = line.split()
+
+        # The charset and the LEFTHYPHENMIN like keywords, or the non standard
+        # patterns with replacements
+        if not tokens or re.search(r'[A-Z]', tokens[0]) or '/' in line:
+            continue
+
+        for token in tokens:
+            (exceptions if '-' in token else patterns).append(token)
+
+    return patterns, exceptions
+
+
+class Hyphenator(object):
+    """Find the hyphenation points of the words with Liang's patterns.
+
+    :param patterns: the patterns, like `hy3ph`, the odd digits allowing a
+        break between their letters and the even ones forbidding it
+    :param exceptions: the words hyphenated by hand, like `ta-ble`
+    :param left_min: the fewest letters kept before the first hyphen
+    :param right_min: the fewest letters kept after the last hyphen
+    :param cache_size: the most words whose points are memoized, the memo being
+        emptied when it is full
+    """
+
+    def __init__(self, patterns, exceptions=(), left_min=2, right_min=3, cache_size=10000):
+        self.trie = {}
+        self.exceptions = {}
+        self.left_min = left_min
+        self.right_min = right_min
+        self.cache_size = cache_size
+        self.cache = {}
+
+        for pattern in patterns:
+            self._insert(pattern)
+
+        for exception in exceptions:
+            pieces = exception.lower().split('-')
+            positions = []
+
+            for piece in pieces[:-1]:
+                positions.append((positions[-1] if positions else 0) + len(piece))
+
+            self.exceptions[''.join(pieces)] = tuple(positions)
+
+    def _insert(self, pattern):
+        letters = []
+        points = [0]
+
+        for character in pattern:
+
+            if character.isdigit():
+                points[-1] = int(character)
+
+            else:
+                letters.append(character)
+                points.append(0)
+
+        node = self.trie
+
+        for letter in letters:
+            node = node.setdefault(letter, {})
+
+        node[POINTS] = points
+
+    def positions(self, word):
+        """:returns: The tuple of the indexes of `word` before which a hyphen
+            can break it, memoized by word.
+        """
+        positions = self.cache.get(word)
+
+        if positions is None:
+
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+
+            positions = self.cache[word] = self._positions(word)
+
+        return positions
+
+    def _positions(self, word):
+        lowered = word.lower()
+
+        if lowered in self.exceptions:
+            return self.exceptions[lowered]
+
+        if len(word) < self.left_min + self.right_min:
+            return ()
+
+        letters = '.' + lowered + '.'
+        points = [0] * (len(letters) + 1)
+
+        for start in range(len(letters)):
+            node = self.trie
+
+            for letter in letters[start:]:
+                node = node.get(letter)
+
+                if node is None:
+                    break
+
+                pattern_points = node.get(POINTS)
+
+                if pattern_points:
+
+                    for index, point in enumerate(pattern_points, start):
+
+                        if point > points[index]:
+                            points[index] = point
+
+        # The point before the letter `index` of the word is after its dot
+        return tuple(index for index in range(self.left_min, len(word) - self.right_min + 1)
+                if points[index + 1] % 2)
+
+    def split(self, chunk):
+        """Split a word, possibly with punctuation around it, on its hyphenation
+        points, without adding the hyphens.
+
+        :returns: A list of strings, which is `[chunk]` when it has no point.
+        """
+        match = word_pattern.match(chunk)
+
+        if not match:
+            return [chunk]
+
+        prefix, word, suffix = match.groups()
+        positions = self.positions(word)
+
+        if not positions:
+            return [chunk]
+
+        bounds = (0,) + positions + (len(word),)
+        pieces = [word[begin:end] for begin, end in zip(bounds, bounds[1:])]
+        pieces[0] = prefix + pieces[0]
+        pieces[-1] += suffix
+        return pieces
+
+    def join_lines(self, text, join_hyphenated=True):
+        """Join back the words of letters hyphenated at the end of a line, so
+        rewrapping them does not leave a `hy- phenation` behind.
+
+        A compound word broken on its own hyphen cannot be told apart when the
+        hyphen is on one of their hyphenation points, so the hyphens are only
+        dropped on these points with `join_hyphenated`, and otherwise kept,
+        like the one of `co-operate`.
+        """
+        if '-\n' not in text:
+            return text
+
+        def join(match):
+            before, after = match.groups()
+
+            if join_hyphenated and len(before) in self.positions(before + after):
+                return before + after
+
+            return before + '-' + after
+
+        return hyphenated_lines_pattern.sub(join, text)
+
+
+# The hyphenators by file path, with the modification time they were read at
+hyphenators = {}
+
+
+def load(path):
+    """:returns: The `Hyphenator` of a pattern file, compiled again only when
+        the file is modified.
+
+    :raises OSError: when the file cannot be read
+    """
+    modified = os.path.getmtime(path)
+    loaded = hyphenators.get(path)
+
+    if loaded is None or loaded[0] != modified:
+
+        with open(path, 'rb') as pattern_file:
+            data = pattern_file.read()
+
+        try:
+            text = data.decode('utf-8')
+
+        except UnicodeDecodeError:
+            text = data.decode('latin-1')
+
+        loaded = hyphenators[path] = (modified, Hyphenator(*parse_patterns(text)))
+
+    return loaded[1]
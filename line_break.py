@@ -0,0 +1,271 @@
+"""Line break opportunities of the Unicode line breaking algorithm (UAX #14)
+and the East Asian width of the characters (UAX #11), for wrapping the text
+without spaces between its words, like Chinese and Japanese.
+
+The properties are compact tables of sorted code point ranges, looked up by
+bisect, as the Python of Sublime Text does not always have `unicodedata`, which
+has no line break classes anyway.  Only the classes deciding the breaks inside
+a run of characters without spaces are kept, and some are folded together:
+
+    ID  ideographs, kana, Hangul syllables and the other wide characters
+    OP  opening punctuation, no break after it
+    CL  closing punctuation, including CP, IS and SY, no break before it
+    EX  exclamation and interrogation, no break before it
+    NS  nonstarters, including the small kana (CJ), no break before it
+    IN  inseparable ellipses, no break before it
+    QU  quotation marks, no break around them
+    GL  non-breaking glue, including WJ, no break around it
+    BA  the ideographic space, a break after it
+    ZW  the zero width space, a break after it
+    ZWJ the zero width joiner, no break after it
+    CM  combining marks, including EM, which take the class of their base
+    AL  everything else
+
+The breaks are only taken next to an ideograph, after the wide closing
+punctuation, after a zero width space and after an ideographic space, so the
+words of the scripts using spaces, like the `e.g.` or the `a!=b` of the Latin
+text, are never split.  The south east Asian scripts (SA) would need a
+dictionary, and are not broken.
+"""
+import re
+import bisect
+
+AL = 'AL'
+BA = 'BA'
+CL = 'CL'
+CM = 'CM'
+EX = 'EX'
+GL = 'GL'
+ID = 'ID'
+IN = 'IN'
+NS = 'NS'
+OP = 'OP'
+QU = 'QU'
+ZW = 'ZW'
+ZWJ = 'ZWJ'
+
+# The East Asian Wide and Fullwidth ranges, which take two columns, with the
+# unassigned code points merged into the ranges around them
+wide_ranges = (
+    (0x1100, 0x115F), (0x231A, 0x231B), (0x2329, 0x232A), (0x23E9, 0x23EC), (0x23F0, 0x23F0),
+    (0x23F3, 0x23F3), (0x25FD, 0x25FE), (0x2614, 0x2615), (0x2648, 0x2653), (0x267F, 0x267F),
+    (0x2693, 0x2693), (0x26A1, 0x26A1), (0x26AA, 0x26AB), (0x26BD, 0x26BE), (0x26C4, 0x26C5),
+    (0x26CE, 0x26CE), (0x26D4, 0x26D4), (0x26EA, 0x26EA), (0x26F2, 0x26F3), (0x26F5, 0x26F5),
+    (0x26FA, 0x26FA), (0x26FD, 0x26FD), (0x2705, 0x2705), (0x270A, 0x270B), (0x2728, 0x2728),
+    (0x274C, 0x274C), (0x274E, 0x274E), (0x2753, 0x2755), (0x2757, 0x2757), (0x2795, 0x2797),
+    (0x27B0, 0x27B0), (0x27BF, 0x27BF), (0x2B1B, 0x2B1C), (0x2B50, 0x2B50), (0x2B55, 0x2B55),
+    (0x2E80, 0x303E), (0x3041, 0x3247), (0x3250, 0x4DBF), (0x4E00, 0xA4C6), (0xA960, 0xA97C),
+    (0xAC00, 0xD7A3), (0xF900, 0xFAD9), (0xFE10, 0xFE19), (0xFE30, 0xFE6B), (0xFF01, 0xFF60),
+    (0xFFE0, 0xFFE6), (0x16FE0, 0x1B2FB), (0x1F004, 0x1F004), (0x1F0CF, 0x1F0CF), (0x1F18E, 0x1F18E),
+    (0x1F191, 0x1F19A), (0x1F200, 0x1F320), (0x1F32D, 0x1F335), (0x1F337, 0x1F37C), (0x1F37E, 0x1F393),
+    (0x1F3A0, 0x1F3CA), (0x1F3CF, 0x1F3D3), (0x1F3E0, 0x1F3F0), (0x1F3F4, 0x1F3F4), (0x1F3F8, 0x1F43E),
+    (0x1F440, 0x1F440), (0x1F442, 0x1F4FC), (0x1F4FF, 0x1F53D), (0x1F54B, 0x1F54E), (0x1F550, 0x1F567),
+    (0x1F57A, 0x1F57A), (0x1F595, 0x1F596), (0x1F5A4, 0x1F5A4), (0x1F5FB, 0x1F64F), (0x1F680, 0x1F6C5),
+    (0x1F6CC, 0x1F6CC), (0x1F6D0, 0x1F6D2), (0x1F6D5, 0x1F6DF), (0x1F6EB, 0x1F6EC), (0x1F6F4, 0x1F6FC),
+    (0x1F7E0, 0x1F7F0), (0x1F90C, 0x1F93A), (0x1F93C, 0x1F945), (0x1F947, 0x1F9FF), (0x1FA70, 0x1FAF6),
+    (0x20000, 0x3FFFD),
+)
+
+# The combining marks and the format characters which take no column, from
+# the blocks used along the Latin, Greek, Cyrillic and East Asian scripts
+zero_width_ranges = (
+    (0x0300, 0x036F), (0x1160, 0x11FF), (0x1AB0, 0x1AFF), (0x1DC0, 0x1DFF), (0x200B, 0x200F),
+    (0x202A, 0x202E), (0x2060, 0x2064), (0x20D0, 0x20FF), (0x302A, 0x302D), (0x3099, 0x309A),
+    (0xFE00, 0xFE0F), (0xFE20, 0xFE2F), (0xFEFF, 0xFEFF), (0xE0000, 0xE007F), (0xE0100, 0xE01EF),
+)
+
+# The line break classes of the characters differing from their default,
+# which is ID for the wide characters, CM for the zero width ones, and AL
+class_ranges = (
+    (0x0021, 0x0021, EX), (0x0022, 0x0022, QU), (0x0027, 0x0027, QU), (0x0028, 0x0028, OP),
+    (0x0029, 0x0029, CL), (0x002C, 0x002C, CL), (0x002E, 0x002F, CL), (0x003A, 0x003B, CL),
+    (0x003F, 0x003F, EX), (0x005B, 0x005B, OP), (0x005D, 0x005D, CL), (0x007B, 0x007B, OP),
+    (0x007D, 0x007D, CL), (0x00A0, 0x00A0, GL), (0x00A1, 0x00A1, OP), (0x00AB, 0x00AB, QU),
+    (0x00BB, 0x00BB, QU), (0x00BF, 0x00BF, OP), (0x2007, 0x2007, GL), (0x200B, 0x200B, ZW),
+    (0x200D, 0x200D, ZWJ), (0x2011, 0x2011, GL), (0x2018, 0x2019, QU), (0x201C, 0x201D, QU),
+    (0x2024, 0x2026, IN), (0x202F, 0x202F, GL), (0x2039, 0x203A, QU), (0x203C, 0x203C, NS),
+    (0x2047, 0x2049, NS), (0x2060, 0x2060, GL), (0x3000, 0x3000, BA), (0x3001, 0x3002, CL),
+    (0x3005, 0x3005, NS), (0x3008, 0x3008, OP), (0x3009, 0x3009, CL), (0x300A, 0x300A, OP),
+    (0x300B, 0x300B, CL), (0x300C, 0x300C, OP), (0x300D, 0x300D, CL), (0x300E, 0x300E, OP),
+    (0x300F, 0x300F, CL), (0x3010, 0x3010, OP), (0x3011, 0x3011, CL), (0x3014, 0x3014, OP),
+    (0x3015, 0x3015, CL), (0x3016, 0x3016, OP), (0x3017, 0x3017, CL), (0x3018, 0x3018, OP),
+    (0x3019, 0x3019, CL), (0x301A, 0x301A, OP), (0x301B, 0x301B, CL), (0x301C, 0x301C, NS),
+    (0x301D, 0x301D, OP), (0x301E, 0x301F, CL), (0x303B, 0x303B, NS), (0x3041, 0x3041, NS),
+    (0x3043, 0x3043, NS), (0x3045, 0x3045, NS), (0x3047, 0x3047, NS), (0x3049, 0x3049, NS),
+    (0x3063, 0x3063, NS), (0x3083, 0x3083, NS), (0x3085, 0x3085, NS), (0x3087, 0x3087, NS),
+    (0x308E, 0x308E, NS), (0x3095, 0x3096, NS), (0x309B, 0x309E, NS), (0x30A0, 0x30A1, NS),
+    (0x30A3, 0x30A3, NS), (0x30A5, 0x30A5, NS), (0x30A7, 0x30A7, NS), (0x30A9, 0x30A9, NS),
+    (0x30C3, 0x30C3, NS), (0x30E3, 0x30E3, NS), (0x30E5, 0x30E5, NS), (0x30E7, 0x30E7, NS),
+    (0x30EE, 0x30EE, NS), (0x30F5, 0x30F6, NS), (0x30FB, 0x30FE, NS), (0x31F0, 0x31FF, NS),
+    (0xFE50, 0xFE50, CL), (0xFE52, 0xFE52, CL), (0xFE54, 0xFE55, NS), (0xFE56, 0xFE57, EX),
+    (0xFE59, 0xFE59, OP), (0xFE5A, 0xFE5A, CL), (0xFE5B, 0xFE5B, OP), (0xFE5C, 0xFE5C, CL),
+    (0xFE5D, 0xFE5D, OP), (0xFE5E, 0xFE5E, CL), (0xFEFF, 0xFEFF, GL), (0xFF01, 0xFF01, EX),
+    (0xFF08, 0xFF08, OP), (0xFF09, 0xFF09, CL), (0xFF0C, 0xFF0C, CL), (0xFF0E, 0xFF0E, CL),
+    (0xFF1A, 0xFF1B, NS), (0xFF1F, 0xFF1F, EX), (0xFF3B, 0xFF3B, OP), (0xFF3D, 0xFF3D, CL),
+    (0xFF5B, 0xFF5B, OP), (0xFF5D, 0xFF5D, CL), (0xFF5F, 0xFF5F, OP), (0xFF60, 0xFF61, CL),
+    (0xFF62, 0xFF62, OP), (0xFF63, 0xFF64, CL), (0xFF65, 0xFF65, NS), (0xFF66, 0xFF66, ID),
+    (0xFF67, 0xFF70, NS), (0xFF71, 0xFF9D, ID), (0xFF9E, 0xFF9F, NS), (0x1F3FB, 0x1F3FF, CM),
+)
+
+no_break_before = frozenset((CL, EX, NS, IN, QU, GL, ZW))
+no_break_after = frozenset((OP, QU, GL, ZWJ))
+
+non_ascii_pattern = re.compile('[^\x00-\x7f]')
+
+
+class RangeTable(object):
+    """A lookup of the value of the sorted, not overlapping, code point ranges."""
+
+    def __init__(self, ranges, default):
+        self.starts = [first for first, last, value in ranges]
+        self.ends = [last for first, last, value in ranges]
+        self.values = [value for first, last, value in ranges]
+        self.default = default
+
+    def get(self, code_point):
+        index = bisect.bisect_right(self.starts, code_point) - 1
+
+        if index >= 0 and code_point <= self.ends[index]:
+            return self.values[index]
+
+        return self.default
+
+
+wide_table = RangeTable([(first, last, 2) for first, last in wide_ranges], 1)
+zero_width_table = RangeTable([(first, last, 0) for first, last in zero_width_ranges], 1)
+class_table = RangeTable(class_ranges, None)
+
+# The lookups memoized by character, as the same few are looked up again and again
+character_widths = {}
+character_classes = {}
+
+
+def character_width(character):
+    """:returns: The columns taken by a character, 0, 1 or 2."""
+    width = character_widths.get(character)
+
+    if width is None:
+        code_point = ord(character)
+        width = zero_width_table.get(code_point) and wide_table.get(code_point)
+        character_widths[character] = width
+
+    return width
+
+
+def line_break_class(character):
+    line_class = character_classes.get(character)
+
+    if line_class is None:
+        line_class = class_table.get(ord(character))
+
+        if line_class is None:
+            width = character_width(character)
+            line_class = ID if width == 2 else CM if width == 0 else AL
+
+        character_classes[character] = line_class
+
+    return line_class
+
+
+def column_width(text):
+    """:returns: The columns taken by a text, counting the wide characters twice."""
+    if not non_ascii_pattern.search(text):
+        return len(text)
+
+    return sum(character_width(character) for character in text)
+
+
+def fit_length(text, columns):
+    """:returns: How many characters of the start of `text` fit on `columns`."""
+    if not non_ascii_pattern.search(text):
+        return columns
+
+    used = 0
+
+    for index, character in enumerate(text):
+        used += character_width(character)
+
+        if used > columns:
+            return index
+
+    return len(text)
+
+
+def is_break(before, after, is_wide_before=False):
+    """Tell if there is a break opportunity between two line break classes,
+    after resolving the combining marks to their base.
+
+    :param is_wide_before: if the character before is wide, as the closing
+        punctuation of Chinese and Japanese
+    """
+    if after in no_break_before:
+        return False
+
+    if before == ZW or before == BA or is_wide_before and before in (CL, EX, NS):
+        return True
+
+    if before in no_break_after:
+        return False
+
+    return before == ID or after == ID
+
+
+def split_segments(text):
+    """Split a text without spaces on its line break opportunities, in a
+    single pass over its characters.
+
+    :returns: A list of strings, which is `[text]` when there is no break.
+    """
+    if not non_ascii_pattern.search(text):
+        return [text]
+
+    segments = []
+    segment_begin = 0
+    before = None
+    is_wide_before = False
+
+    for index, character in enumerate(text):
+        after = line_break_class(character)
+
+        # The combining marks are part of the character before them, and
+        # nothing breaks after a joiner
+        if after == CM and before is not None:
+            continue
+
+        if after == ZWJ:
+            before = ZWJ
+            continue
+
+        if before is not None and is_break(before, after, is_wide_before):
+            segments.append(text[segment_begin:index])
+            segment_begin = index
+
+        before = after
+        is_wide_before = character_width(character) == 2
+
+    segments.append(text[segment_begin:])
+    return segments
+
+
+def join_wide_lines(text):
+    """Join the lines ending and starting with a wide character without a
+    space, as Chinese and Japanese do, instead of turning the new line into a
+    space.
+    """
+    if not non_ascii_pattern.search(text) or '\n' not in text:
+        return text
+
+    lines = text.split('\n')
+    pieces = [lines[0]]
+
+    for line_before, line in zip(lines, lines[1:]):
+
+        if line_before and line \
+                and character_width(line_before[-1]) == 2 and character_width(line[0]) == 2:
+            pieces.append(line)
+
+        else:
+            pieces.append('\n')
+            pieces.append(line)
+
+    return ''.join(pieces)
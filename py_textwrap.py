@@ -7,6 +7,8 @@
 
 import re
 
+from . import line_break
+
 __all__ = ['TextWrapper', 'wrap', 'fill', 'dedent', 'indent', 'shorten']
 
 # Hardcode the recognized whitespace characters to the US-ASCII
@@ -57,6 +59,26 @@ class TextWrapper:
         compound words.
       drop_whitespace (default: true)
         Drop leading and trailing whitespace from lines.
+      break_on_unicode (default: false)
+        Also break the words without spaces, like Chinese and Japanese, on
+        the break opportunities of the Unicode line breaking algorithm, and
+        measure the lines by their columns, with the wide characters taking
+        two of them.
+      hyphenator (default: None)
+        An object whose split(word) method gives the pieces of a word
+        between its hyphenation points, like hyphenation.Hyphenator.  The
+        words not fitting at the end of a line are then broken on the
+        last of their points which fits, with a hyphen.
+      join_hyphenated (default: false)
+        Drop the hyphen of the words of letters hyphenated at the end of a
+        line on one of their hyphenation points, as the hyphenator would
+        have broken them, before wrapping them again.  A compound word, like
+        co-operate, broken on its own hyphen on such a point, is joined too.
+        Otherwise, these words keep their hyphen, without the line break.
+      cache_chunks (default: false)
+        Keep the chunks each text is split into, so wrapping the same text
+        again, at another width, only breaks its lines.  The other options
+        should not change while it is on.
       max_lines (default: None)
         Truncate wrapped lines.
       placeholder (default: ' [...]')
@@ -125,7 +147,11 @@ class TextWrapper:
                  tabsize=8,
                  *,
                  max_lines=None,
-                 placeholder=' [...]'):
+                 placeholder=' [...]',
+                 break_on_unicode=False,
+                 hyphenator=None,
+                 join_hyphenated=False,
+                 cache_chunks=False):
         self.width = width
         self.initial_indent = initial_indent
         self.subsequent_indent = subsequent_indent
@@ -138,6 +164,10 @@ class TextWrapper:
         self.tabsize = tabsize
         self.max_lines = max_lines
         self.placeholder = placeholder
+        self.break_on_unicode = break_on_unicode
+        self.hyphenator = hyphenator
+        self.join_hyphenated = join_hyphenated
+        self.chunks_cache = {} if cache_chunks else None
 
 
     # -- Private methods -----------------------------------------------
@@ -150,6 +180,10 @@ class TextWrapper:
         whitespace characters to spaces.  Eg. " foo\\tbar\\n\\nbaz"
         becomes " foo    bar  baz".
         """
+        if self.break_on_unicode:
+            text = line_break.join_wide_lines(text)
+        if self.hyphenator is not None:
+            text = self.hyphenator.join_lines(text, self.join_hyphenated)
         if self.expand_tabs:
             text = text.expandtabs(self.tabsize)
         if self.replace_whitespace:
@@ -177,6 +211,8 @@ class TextWrapper:
         else:
             chunks = self.wordsep_simple_re.split(text)
         chunks = [c for c in chunks if c]
+        if self.break_on_unicode:
+            chunks = [segment for c in chunks for segment in line_break.split_segments(c)]
         return chunks
 
     def _fix_sentence_endings(self, chunks):
@@ -215,6 +251,9 @@ class TextWrapper:
         # If we're allowed to break long words, then do so: put as much
         # of the next chunk onto the current line as will fit.
         if self.break_long_words:
+            if self.break_on_unicode:
+                # At least one character, when a wide one does not fit alone
+                space_left = line_break.fit_length(reversed_chunks[-1], space_left) or int(not cur_line)
             cur_line.append(reversed_chunks[-1][:space_left])
             reversed_chunks[-1] = reversed_chunks[-1][space_left:]
 
@@ -230,6 +269,33 @@ class TextWrapper:
         # cur_len will be zero, so the next line will be entirely
         # devoted to the long word that we can't handle right now.
 
+    def _hyphenate_word(self, reversed_chunks, cur_line, space_left, measure):
+        """_hyphenate_word(chunks : [string],
+                           cur_line : [string],
+                           space_left : int, measure : function) -> bool
+
+        Put the start of the next word on the current line, up to the last
+        hyphenation point which fits on it with the hyphen, and leave the
+        rest for the next line.  Return true if the word was broken.
+        """
+        pieces = self.hyphenator.split(reversed_chunks[-1])
+        head = None
+        count = 1
+
+        while count < len(pieces):
+            candidate = ''.join(pieces[:count]) + '-'
+            if measure(candidate) > space_left:
+                break
+            head = candidate
+            count += 1
+
+        if head is None:
+            return False
+
+        cur_line.append(head)
+        reversed_chunks[-1] = reversed_chunks[-1][len(head) - 1:]
+        return True
+
     def _wrap_chunks(self, chunks):
         """_wrap_chunks(chunks : [string]) -> [string]
 
@@ -244,6 +310,7 @@ class TextWrapper:
         lines, but apart from that whitespace is preserved.
         """
         lines = []
+        measure = line_break.column_width if self.break_on_unicode else len
         if self.width <= 0:
             raise ValueError("invalid width %r (must be > 0)" % self.width)
         if self.max_lines is not None:
@@ -272,7 +339,7 @@ class TextWrapper:
                 indent = self.initial_indent
 
             # Maximum width for this line.
-            width = self.width - len(indent)
+            width = self.width - measure(indent)
 
             # First chunk on line is whitespace -- drop it, unless this
             # is the very beginning of the text (ie. no lines started yet).
@@ -280,7 +347,7 @@ class TextWrapper:
                 del chunks[-1]
 
             while chunks:
-                l = len(chunks[-1])
+                l = measure(chunks[-1])
 
                 # Can at least squeeze this chunk onto the current line.
                 if cur_len + l <= width:
@@ -291,15 +358,21 @@ class TextWrapper:
                 else:
                     break
 
+            # The current line is full: break the next word on one of its
+            # hyphenation points, if it has one fitting on the line.
+            if (chunks and self.hyphenator is not None and chunks[-1].strip() and
+                    self._hyphenate_word(chunks, cur_line, width - cur_len, measure)):
+                cur_len = sum(map(measure, cur_line))
+
             # The current line is full, and the next chunk is too big to
             # fit on *any* line (not just this one).
-            if chunks and len(chunks[-1]) > width:
+            elif chunks and measure(chunks[-1]) > width:
                 self._handle_long_word(chunks, cur_line, cur_len, width)
-                cur_len = sum(map(len, cur_line))
+                cur_len = sum(map(measure, cur_line))
 
             # If the last chunk on this line is all whitespace, drop it.
             if self.drop_whitespace and cur_line and cur_line[-1].strip() == '':
-                cur_len -= len(cur_line[-1])
+                cur_len -= measure(cur_line[-1])
                 del cur_line[-1]
 
             if cur_line:
@@ -334,6 +407,12 @@ class TextWrapper:
         return lines
 
     def _split_chunks(self, text):
+        if self.chunks_cache is not None:
+            chunks = self.chunks_cache.get(text)
+            if chunks is None:
+                chunks = self.chunks_cache[text] = self._split(self._munge_whitespace(text))
+            # _wrap_chunks() consumes its chunks
+            return list(chunks)
         text = self._munge_whitespace(text)
         return self._split(text)
 
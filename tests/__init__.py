@@ -0,0 +1,17 @@
+
+
+import os
+import sys
+import importlib
+
+PACKAGE_ROOT_DIRECTORY = os.path.dirname( os.path.dirname( os.path.realpath( __file__ ) ) )
+CURRENT_PACKAGE_NAME = os.path.basename( PACKAGE_ROOT_DIRECTORY ).rsplit('.', 1)[0]
+
+try:
+    import sublime
+
+except ImportError:
+    # Running outside Sublime Text, e.g., with `python -m unittest`, then use
+    # the in-memory `sublime` module stand-in from `headless`.
+    sys.path.insert( 0, os.path.dirname( PACKAGE_ROOT_DIRECTORY ) )
+    importlib.import_module( CURRENT_PACKAGE_NAME + '.headless' ).install()
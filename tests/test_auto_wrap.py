@@ -0,0 +1,107 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+
+COMMENT = "# first line of the\n# comment which is\n# here\nx = 1\n"
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class AutoWrapUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.listener = wrap_plus.WrapPlusAutoWrapListener()
+        self.scheduled = []
+
+    def create_view(self, text, syntax="Packages/Python/Python.sublime-syntax", **settings):
+        settings = dict( {'WrapPlus.auto_wrap': True, 'WrapPlus.wrap_width': 30}, **settings )
+        return sublime.View( text, syntax, settings )
+
+    def type_text(self, view, point, characters):
+        view.sel().clear()
+        view.sel().add( sublime.Region( point ) )
+        view.run_command( 'insert', {'characters': characters} )
+
+        # The stand-in `sublime.set_timeout()` would run the reflow right away
+        set_timeout = sublime.set_timeout
+        sublime.set_timeout = lambda callback, delay=0: self.scheduled.append( (callback, delay) )
+
+        try:
+            self.listener.on_modified( view )
+
+        finally:
+            sublime.set_timeout = set_timeout
+
+    def run_scheduled(self):
+        scheduled, self.scheduled = self.scheduled, []
+
+        for callback, delay in scheduled:
+            callback()
+
+    def text(self, view):
+        return view.substr( sublime.Region( 0, view.size() ) )
+
+    def test_reflow_from_the_edited_line(self):
+        view = self.create_view( COMMENT )
+        self.type_text( view, COMMENT.index( "is\n" ) + 2, " written with many words " )
+
+        self.assertEqual( [250], [delay for callback, delay in self.scheduled] )
+        self.run_scheduled()
+
+        # The first line would fit "comment" too, but it is before the edited line
+        self.assertEqual( "# first line of the\n# comment which is written\n# with many words here\nx = 1\n", self.text( view ) )
+        self.assertEqual( [sublime.Region( self.text( view ).index( "here" ) )], list( view.sel() ) )
+
+    def test_trailing_space_is_kept(self):
+        view = self.create_view( "Some plain text line which\n", "Packages/Text/Plain text.tmLanguage" )
+        self.type_text( view, view.size() - 1, " gets long " )
+        self.run_scheduled()
+
+        self.assertEqual( "Some plain text line which\ngets long \n", self.text( view ) )
+        self.assertEqual( [sublime.Region( view.size() - 1 )], list( view.sel() ) )
+
+    def test_debounced(self):
+        view = self.create_view( COMMENT )
+        self.type_text( view, COMMENT.index( "is\n" ) + 2, " written with many" )
+        self.type_text( view, view.sel()[0].b, " words" )
+        self.assertEqual( 2, len( self.scheduled ) )
+
+        first_callback, delay = self.scheduled.pop( 0 )
+        first_callback()
+        self.assertEqual( "# first line of the\n# comment which is written with many words\n# here\nx = 1\n", self.text( view ) )
+
+        self.run_scheduled()
+        self.assertEqual( "# first line of the\n# comment which is written\n# with many words here\nx = 1\n", self.text( view ) )
+
+        # The edits of the reflow itself do not schedule another one
+        self.listener.on_modified( view )
+        self.assertEqual( [], self.scheduled )
+
+    def test_not_scheduled(self):
+        short = self.create_view( COMMENT )
+        self.type_text( short, COMMENT.index( "is\n" ) + 2, " short" )
+
+        code = self.create_view( "value = 1\n" )
+        self.type_text( code, code.size() - 1, " + another_long_name + yet_another_one" )
+
+        disabled = self.create_view( COMMENT, **{'WrapPlus.auto_wrap': False} )
+        self.type_text( disabled, COMMENT.index( "is\n" ) + 2, " written with many words" )
+
+        self.assertEqual( [], self.scheduled )
+
+    def test_docstring(self):
+        text = 'def function():\n    """A docstring\n    line.\n    """\n'
+        view = self.create_view( text )
+        self.type_text( view, text.index( "docstring" ) + 9, " which gets long" )
+        self.run_scheduled()
+
+        self.assertEqual( 'def function():\n    """A docstring which gets\n    long line.\n    """\n', self.text( view ) )
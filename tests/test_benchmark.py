@@ -0,0 +1,62 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    benchmark = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.benchmark' )
+
+
+@unittest.skipUnless( is_headless, "The benchmarks run only outside Sublime Text" )
+class BenchmarkUnitTests(unittest.TestCase):
+
+    def test_fixture_texts(self):
+        syntax, texts = benchmark.fixture_texts( 'test.py' )
+
+        self.assertEqual( "Packages/Python/Python.sublime-syntax", syntax )
+        self.assertTrue( texts[0].startswith( 'def foo():\n    """Lorem ipsum' ) )
+        self.assertNotIn( '<START>', ''.join( texts ) )
+
+    def test_synthetic_corpora_are_reproducible(self):
+        first = [text for name, syntax, size, text in benchmark.make_corpora( [1, 2], seed=7 )]
+        second = [text for name, syntax, size, text in benchmark.make_corpora( [1, 2], seed=7 )]
+
+        self.assertEqual( first, second )
+
+    def test_run(self):
+        results = benchmark.run( [1], ['classic_wrap', 'textwrap'], repeats=1 )['results']
+
+        self.assertIn( 'classic_wrap/synthetic-prose/1', results )
+        self.assertEqual( {'seconds', 'bytes', 'throughput', 'peak_memory'}, set( results['textwrap/fixture-test.txt/1'] ) )
+
+    def test_run_startup(self):
+        results = benchmark.run( entry_points=['import', 'first_wrap', 'prewarmed_wrap'], repeats=1 )['results']
+
+        self.assertEqual( ['first_wrap/plugin/1', 'import/plugin/1', 'prewarmed_wrap/plugin/1'], sorted( results ) )
+        self.assertGreater( results['first_wrap/plugin/1']['seconds'], 0 )
+
+    def test_typing_latency(self):
+        best = benchmark.measure_typing( 1, lines_count=2000 )
+
+        self.assertEqual( sorted( benchmark.TYPING_POINTS ), sorted( best ) )
+        self.assertLess( best['auto_wrap_keystroke'], best['auto_wrap_reflow'] )
+
+    def test_compare(self):
+        baseline = {'results': {
+            'a/x/1': {'seconds': 1.0, 'peak_memory': 100},
+            'b/x/1': {'seconds': 1.0, 'peak_memory': 100},
+        }}
+        current = {'results': {
+            'a/x/1': {'seconds': 1.05, 'peak_memory': 100},
+            'b/x/1': {'seconds': 1.5, 'peak_memory': 300},
+        }}
+
+        self.assertEqual( [('b/x/1', 'seconds', 1.0, 1.5, 1.5), ('b/x/1', 'peak_memory', 100, 300, 3.0)],
+                benchmark.compare( baseline, current, 0.1 ) )
+        self.assertEqual( [('b/x/1', 'seconds', 1.0, 1.5, 1.5)], benchmark.compare( baseline, current, 0.1, 5.0 ) )
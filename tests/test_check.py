@@ -0,0 +1,102 @@
+
+
+import io
+import random
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+    stream = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.stream' )
+
+WORDS = "a an the wrap plus paragraph longer-word x yy zzz supercalifragilistic".split()
+TEXT = ( "# This is my very long comment line which goes over the width.\n# Its end.\n\n"
+         "# A short comment\n# which fits.\n\n"
+         "# Wrapped comment which\n# is already fine.\n\n"
+         "x = 1  # Some code which is never wrapped by the check.\n" )
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class CheckUnitTests(unittest.TestCase):
+
+    def create_view(self, text, syntax="Packages/Python/Python.sublime-syntax", window=None, **settings):
+        settings = dict( {'WrapPlus.wrap_width': 25, 'WrapPlus.semantic_line_wrap': False}, **settings )
+        return sublime.View( text, syntax, settings, window )
+
+    def check(self, view):
+        command = wrap_plus.WrapLinesPlusCommand( view )
+        line_wrapper_type = command._prepare_wrap()
+        paragraphs = command._find_regions_paragraphs( [sublime.Region( 0, view.size() )], wrap_plus.prose_selector )
+
+        diagnostics = command._check_paragraphs( paragraphs, line_wrapper_type )
+        return command, [(view.rowcol( point )[0] + 1, message) for point, message in diagnostics]
+
+    def test_invariants(self):
+        command, diagnostics = self.check( self.create_view( TEXT ) )
+
+        self.assertEqual( [(1, "line is 62 columns, over the width of 25"),
+                (4, "the first word of the next line fits on this line")], diagnostics )
+        self.assertEqual( 0, command.check_fallbacks )
+
+    def test_spacing(self):
+        command, diagnostics = self.check( self.create_view( "# Some  spaces which go\n# beyond.\n" ) )
+
+        self.assertEqual( [], diagnostics )
+        command, diagnostics = self.check( self.create_view( "# Some\tspaces which go\n# beyond.\n" ) )
+
+        self.assertEqual( [(1, "the paragraph would be wrapped differently")], diagnostics )
+        self.assertEqual( 1, command.check_fallbacks )
+
+    def test_semantic_falls_back_to_wrapping(self):
+        command, diagnostics = self.check( self.create_view( TEXT, **{'WrapPlus.semantic_line_wrap': True} ) )
+
+        self.assertTrue( diagnostics )
+        self.assertEqual( 3, command.check_fallbacks )
+
+    def test_agrees_with_the_wrapping(self):
+        randomizer = random.Random( 0 )
+
+        for _ in range( 300 ):
+            lines = [' '.join( randomizer.choice( WORDS ) for _ in range( randomizer.randint( 1, 8 ) ) )
+                    for _ in range( randomizer.randint( 1, 4 ) )]
+            prefix = randomizer.choice( ['', '  ', '- ', '\t'] )
+            text = prefix + ( '\n' + prefix.replace( '-', ' ' ) ).join( lines ) + '\n'
+            width = randomizer.randint( 10, 40 )
+
+            view = self.create_view( text, "Packages/Text/Plain text.tmLanguage", **{'WrapPlus.wrap_width': width} )
+            command, diagnostics = self.check( view )
+
+            view.sel().add( sublime.Region( 0, view.size() ) )
+            view.run_command( 'wrap_lines_plus' )
+            self.assertEqual( text != view.substr( sublime.Region( 0, view.size() ) ), bool( diagnostics ),
+                    (text, width, diagnostics) )
+
+    def test_command(self):
+        window = sublime.active_window()
+        view = self.create_view( TEXT, window=window )
+
+        view.run_command( 'wrap_lines_plus', {'check_only': True} )
+        panel = window.find_output_panel( 'wrap_plus' )
+
+        self.assertEqual( TEXT, view.substr( sublime.Region( 0, view.size() ) ) )
+        self.assertEqual( "untitled:1: line is 62 columns, over the width of 25\n"
+                "untitled:4: the first word of the next line fits on this line\n",
+                panel.substr( sublime.Region( 0, panel.size() ) ) )
+        self.assertEqual( 'output.wrap_plus', window.active_panel() )
+
+    def test_check_file(self):
+        input_file = io.StringIO( "\n\n" + TEXT )
+        diagnostics = stream.check_file( input_file, "Packages/Python/Python.sublime-syntax", width=25,
+                line_wrap_type='classic' )
+
+        self.assertEqual( [(3, "line is 62 columns, over the width of 25"),
+                (6, "the first word of the next line fits on this line")], diagnostics )
+        self.assertEqual( [(6, "the first word of the next line fits on this line")],
+                stream.check_file( io.StringIO( "\n\n" + TEXT ), "Packages/Python/Python.sublime-syntax", width=25,
+                line_wrap_type='classic', changed_lines=[7] ) )
@@ -0,0 +1,169 @@
+
+
+import io
+import os
+import contextlib
+import shutil
+import tempfile
+import textwrap
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    cli = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.cli' )
+
+
+@unittest.skipUnless( is_headless, "The command line runs only outside Sublime Text" )
+class CommandLineUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.directory = tempfile.mkdtemp()
+        self.cache_path = os.path.join( self.directory, '.cache.json' )
+
+        self.long_file = self.create_file( 'long.md', "This is my very long line which will wrap near its end.\n" )
+        self.short_file = self.create_file( os.path.join( 'docs', 'short.txt' ), "Short line.\n" )
+        self.create_file( 'source.py', "x = 1  # This is my very long line which will wrap near its end.\n" )
+        self.create_file( os.path.join( '.git', 'hidden.txt' ), "This is my very long line which will wrap near its end.\n" )
+
+    def tearDown(self):
+        shutil.rmtree( self.directory )
+
+    def create_file(self, name, contents):
+        path = os.path.join( self.directory, name )
+        os.makedirs( os.path.dirname( path ), exist_ok=True )
+
+        with open( path, 'w', encoding='utf-8' ) as output_file:
+            output_file.write( contents )
+
+        return path
+
+    def read_file(self, path):
+        with open( path, encoding='utf-8' ) as input_file:
+            return input_file.read()
+
+    def main(self, *arguments):
+        return cli.main( ['--cache', self.cache_path, '-q', '-w', '40'] + list( arguments ) )
+
+    def test_iter_files(self):
+        self.assertEqual( [self.long_file, self.short_file],
+                list( cli.iter_files( [self.directory], cli.text_extensions() ) ) )
+
+    def test_load_settings(self):
+        settings_path = self.create_file( 'WrapPlus.sublime-settings', """
+            {
+                // Comments are allowed
+                "WrapPlus.semantic_line_wrap": true,
+                "rulers": [80],
+            }
+            """ )
+
+        self.assertEqual( {'WrapPlus.semantic_line_wrap': True, 'rulers': [100], 'WrapPlus.after_wrap': 'cursor_stay'},
+                cli.load_settings( settings_path, ['rulers=[100]', 'WrapPlus.after_wrap=cursor_stay'] ) )
+
+    def test_check(self):
+        self.assertEqual( cli.EXIT_CHANGED, self.main( '--check', self.directory ) )
+        self.assertEqual( "This is my very long line which will wrap near its end.\n", self.read_file( self.long_file ) )
+
+    def test_check_diagnostics(self):
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout( output ):
+            exit_code = cli.main( ['--no-cache', '-w', '40', '--check', self.directory] )
+
+        self.assertEqual( cli.EXIT_CHANGED, exit_code )
+        self.assertEqual( "%s:1: line is 55 columns, over the width of 40\n" % self.long_file, output.getvalue() )
+
+    def test_in_place_with_process_pool(self):
+        self.assertEqual( 0, self.main( '--in-place', '-j', '2', self.directory ) )
+        self.assertEqual( "This is my very long line which will\nwrap near its end.\n", self.read_file( self.long_file ) )
+        self.assertEqual( 0, self.main( '--check', '-j', '2', self.directory ) )
+
+    def test_comments_only(self):
+        path = self.create_file( 'module.py', "# This is my very long comment which will wrap near its end.\n"
+                "x = 1  # This is my very long line which will not be wrapped.\n" )
+
+        self.assertEqual( 0, self.main( '--in-place', '--comments-only', path ) )
+        self.assertEqual( "# This is my very long comment which\n# will wrap near its end.\n"
+                "x = 1  # This is my very long line which will not be wrapped.\n", self.read_file( path ) )
+
+    def test_missing_file(self):
+        self.assertEqual( cli.EXIT_ERROR, self.main( '--check', os.path.join( self.directory, 'missing.txt' ) ) )
+
+    def test_cache_skips_clean_files(self):
+        self.assertEqual( cli.EXIT_CHANGED, self.main( '--check', self.directory ) )
+
+        manifest = cli.load_manifest( self.cache_path )
+        self.assertEqual( [os.path.abspath( self.short_file )], list( manifest ) )
+
+        # Pretend the long file was clean on the last run, so it is not wrapped again
+        profile_hash, tool_version = manifest[os.path.abspath( self.short_file )][1:]
+        manifest[os.path.abspath( self.long_file )] = [cli.hash_file( self.long_file ), profile_hash, tool_version]
+        cli.save_manifest( self.cache_path, manifest )
+
+        self.assertEqual( 0, self.main( '--check', self.directory ) )
+
+    def test_hash_file_on_chunks(self):
+        hash_chunk_size = cli.HASH_CHUNK_SIZE
+        cli.HASH_CHUNK_SIZE = 7
+
+        try:
+            self.assertEqual( cli.hash_bytes( b"This is my very long line which will wrap near its end.\n" ),
+                    cli.hash_file( self.long_file ) )
+
+        finally:
+            cli.HASH_CHUNK_SIZE = hash_chunk_size
+
+    def test_cache_profile_change(self):
+        self.main( '--check', self.short_file )
+        first_profile = cli.load_manifest( self.cache_path )[os.path.abspath( self.short_file )][1]
+
+        self.main( '--check', '--set', 'WrapPlus.semantic_line_wrap=true', self.short_file )
+        second_profile = cli.load_manifest( self.cache_path )[os.path.abspath( self.short_file )][1]
+
+        self.assertNotEqual( first_profile, second_profile )
+
+    def test_read_changed_lines(self):
+        diff = textwrap.dedent( """\
+            diff --git a/docs/file.txt b/docs/file.txt
+            --- a/docs/file.txt
+            +++ b/docs/file.txt
+            @@ -1,3 +1,4 @@
+             one
+            -two
+            +TWO
+             three
+            +++ added line looking like a header
+            @@ -10,2 +10,0 @@
+            -ten
+            -eleven
+            --- a/removed.txt
+            +++ /dev/null
+            @@ -1 +0,0 @@
+            -gone
+            """ )
+
+        self.assertEqual( {os.path.join( 'docs', 'file.txt' ): [1, 2, 4, 10, 11]},
+                cli.read_changed_lines( io.StringIO( diff ) ) )
+
+    def test_diff_only_wraps_changed_paragraphs(self):
+        long_line = "This is my very long line which will wrap near its end.\n"
+        path = self.create_file( 'changed.txt', long_line + "\n" + long_line )
+        diff_path = self.create_file( 'changes.diff', "+++ b/changed.txt\n@@ -3 +3 @@\n-old\n+%s" % long_line )
+
+        current_directory = os.getcwd()
+        os.chdir( self.directory )
+
+        try:
+            self.assertEqual( 0, self.main( '--in-place', '--diff', diff_path ) )
+
+        finally:
+            os.chdir( current_directory )
+
+        self.assertEqual( long_line + "\nThis is my very long line which will\nwrap near its end.\n", self.read_file( path ) )
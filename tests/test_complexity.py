@@ -0,0 +1,55 @@
+
+
+import time
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    benchmark = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.benchmark' )
+
+# Growing the input 4 times should take about 4 times longer, while a
+# quadratic path takes 16 times longer.  The slack absorbs the timing noise.
+GROWTH_FACTOR = 4
+GROWTH_LIMIT = 10
+
+
+def best_time(function, repeats=3):
+    best = float( 'inf' )
+
+    for _ in range( repeats ):
+        start = time.perf_counter()
+        function()
+        best = min( best, time.perf_counter() - start )
+
+    return best
+
+
+@unittest.skipUnless( is_headless, "The complexity guards run only outside Sublime Text" )
+class ComplexityGuardTests(unittest.TestCase):
+    """Time each operation on the adversarial corpora at sizes N and 4N."""
+
+    def test_adversarial_corpora_growth(self):
+
+        for name, syntax, generator, size, entry_points in benchmark.ADVERSARIAL_CORPORA:
+            small = benchmark.Engine( syntax, generator( size ), entry_points=entry_points )
+            large = benchmark.Engine( syntax, generator( size * GROWTH_FACTOR ), entry_points=entry_points )
+
+            for entry_point in entry_points:
+
+                with self.subTest( corpus=name, entry_point=entry_point ):
+                    small_time = best_time( getattr( small, entry_point ) )
+                    large_time = best_time( getattr( large, entry_point ) )
+
+                    # Too fast to be measured, so not growing with the input
+                    if large_time < 0.001:
+                        continue
+
+                    self.assertLess( large_time / max( small_time, 1e-6 ), GROWTH_LIMIT,
+                            "%s on %s took %.4fs for N and %.4fs for %dN" % (entry_point, name, small_time,
+                            large_time, GROWTH_FACTOR) )
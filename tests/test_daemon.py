@@ -0,0 +1,155 @@
+
+
+import io
+import os
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    daemon = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.daemon' )
+
+
+def request_line(request_id, method, **params):
+    return json.dumps( {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params} ) + '\n'
+
+
+@unittest.skipUnless( is_headless, "The wrap daemon runs only outside Sublime Text" )
+class WrapDaemonUnitTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = daemon.WrapService( {'WrapPlus.semantic_line_wrap': False, 'WrapPlus.after_wrap': 'cursor_stay'} )
+
+    def setUp(self):
+        self.maxDiff = None
+
+    def handle_line(self, line):
+        return json.loads( daemon.handle_line( self.service, line ) )
+
+    def test_wrap(self):
+        self.assertEqual( {'jsonrpc': '2.0', 'id': 1, 'result': {'text': "one two\nthree four\n\nfive six seven\n", 'selection': [[8, 8]]}},
+                self.handle_line( request_line( 1, 'wrap', text="one two three four\n\nfive six seven\n", selection=[[8, 8]], width=10 ) ) )
+
+    def test_wrap_with_settings_profile(self):
+        text = "# This is my very long comment which will wrap near its end.\nx = 1\n"
+
+        response = self.handle_line( request_line( 2, 'wrap', text=text, syntax="Packages/Python/Python.sublime-syntax",
+                selection=[[2, 2]], settings={'wrap_width': 40} ) )
+
+        self.assertEqual( "# This is my very long comment which\n# will wrap near its end.\nx = 1\n", response['result']['text'] )
+
+    def test_errors(self):
+        self.assertEqual( daemon.PARSE_ERROR, self.handle_line( '{"id": 1' )['error']['code'] )
+        self.assertEqual( daemon.INVALID_REQUEST, self.handle_line( '{"id": 1}' )['error']['code'] )
+        self.assertEqual( daemon.METHOD_NOT_FOUND, self.handle_line( request_line( 3, '_profile' ) )['error']['code'] )
+        self.assertEqual( daemon.INVALID_PARAMS, self.handle_line( request_line( 4, 'wrap', txt="" ) )['error']['code'] )
+
+    def test_invalid_params(self):
+        for params in ({'txt': ""}, {}, {'text': 1}, {'text': "", 'width': "80"}, {'text': "", 'width': True},
+                {'text': "", 'selection': [[0]]}, {'text': "", 'selection': [["0", 1]]}, ["", None, None, None, 80, None, 1]):
+            response = self.handle_line( json.dumps( {'jsonrpc': '2.0', 'id': 7, 'method': 'wrap', 'params': params} ) )
+            self.assertEqual( daemon.INVALID_PARAMS, response['error']['code'], params )
+
+        response = self.handle_line( json.dumps( {'jsonrpc': '2.0', 'id': 8, 'method': 'wrap', 'params': ["a b c\n", None, None, None, 4]} ) )
+        self.assertEqual( "a b\nc\n", response['result']['text'] )
+
+    def test_internal_errors(self):
+        wrap = self.service.wrap
+
+        def failing_wrap(**params):
+            raise TypeError( "an error of the wrapping" )
+
+        self.service.wrap = failing_wrap
+
+        try:
+            response = self.handle_line( request_line( 9, 'wrap', text="" ) )
+
+        finally:
+            self.service.wrap = wrap
+
+        self.assertEqual( {'code': daemon.INTERNAL_ERROR, 'message': "TypeError: an error of the wrapping"}, response['error'] )
+
+    def test_batch_and_notifications(self):
+        line = json.dumps( [{'jsonrpc': '2.0', 'method': 'ping'}, {'jsonrpc': '2.0', 'id': 5, 'method': 'ping'}] )
+
+        self.assertEqual( [{'jsonrpc': '2.0', 'id': 5, 'result': 'pong'}], self.handle_line( line ) )
+        self.assertIsNone( daemon.handle_line( self.service, '{"jsonrpc": "2.0", "method": "ping"}' ) )
+
+    def test_serve_stdio(self):
+        input_file = io.StringIO( ''.join( request_line( index, 'wrap', text="a b c d\n", width=4 ) for index in range( 20 ) ) )
+        output_file = io.StringIO()
+
+        daemon.serve_stdio( self.service, input_file, output_file, workers=4 )
+        responses = [json.loads( line ) for line in output_file.getvalue().splitlines()]
+
+        self.assertEqual( list( range( 20 ) ), sorted( response['id'] for response in responses ) )
+        self.assertEqual( {"a b\nc d\n"}, {response['result']['text'] for response in responses} )
+
+    @unittest.skipUnless( hasattr( socket, 'AF_UNIX' ), "Unix domain sockets are not available" )
+    def test_serve_socket(self):
+        directory = tempfile.mkdtemp()
+        server = daemon.WrapServer( os.path.join( directory, 'wrap.sock' ), self.service )
+        thread = threading.Thread( target=server.serve_forever )
+        thread.start()
+
+        try:
+            client = socket.socket( socket.AF_UNIX )
+            client.connect( os.path.join( directory, 'wrap.sock' ) )
+
+            with client, client.makefile( 'rwb' ) as client_file:
+                client_file.write( request_line( 6, 'wrap', text="one two three\n", width=8 ).encode( 'utf-8' ) )
+                client_file.flush()
+
+                self.assertEqual( "one two\nthree\n", json.loads( client_file.readline().decode( 'utf-8' ) )['result']['text'] )
+
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            shutil.rmtree( directory )
+
+    @unittest.skipUnless( hasattr( socket, 'AF_UNIX' ), "Unix domain sockets are not available" )
+    def test_remove_socket(self):
+        directory = tempfile.mkdtemp()
+        socket_path = os.path.join( directory, 'wrap.sock' )
+        file_path = os.path.join( directory, 'file.txt' )
+
+        try:
+            daemon.remove_socket( socket_path )
+
+            server = socket.socket( socket.AF_UNIX )
+            server.bind( socket_path )
+            server.close()
+
+            daemon.remove_socket( socket_path )
+            self.assertFalse( os.path.lexists( socket_path ) )
+
+            # Neither a file nor a symbolic link to a socket are removed
+            with open( file_path, 'w' ) as output_file:
+                output_file.write( "data" )
+
+            self.assertRaises( FileExistsError, daemon.remove_socket, file_path )
+            self.assertTrue( os.path.exists( file_path ) )
+
+            server = socket.socket( socket.AF_UNIX )
+            server.bind( socket_path )
+            server.close()
+            os.symlink( socket_path, file_path + '.link' )
+
+            self.assertRaises( FileExistsError, daemon.remove_socket, file_path + '.link' )
+            self.assertTrue( os.path.lexists( file_path + '.link' ) )
+            self.assertTrue( os.path.exists( socket_path ) )
+
+        finally:
+            shutil.rmtree( directory )
@@ -0,0 +1,64 @@
+
+
+import io
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+from . import PACKAGE_ROOT_DIRECTORY
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    import sublime_plugin
+
+    differential = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.differential' )
+    wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+
+
+@unittest.skipUnless( is_headless, "The differential harness runs only outside Sublime Text" )
+class DifferentialUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.reference = differential.load_reference( directory=PACKAGE_ROOT_DIRECTORY )
+
+    def test_reference_does_not_replace_the_commands(self):
+        self.assertIsNot( self.reference.WrapLinesPlusCommand, wrap_plus.WrapLinesPlusCommand )
+        self.assertIs( wrap_plus.WrapLinesPlusCommand, sublime_plugin.text_commands['wrap_lines_plus'] )
+
+    def test_cases_are_reproducible(self):
+        first = differential.make_cases( seed=3, count=5 )
+
+        self.assertEqual( first, differential.make_cases( seed=3, count=5 ) )
+        self.assertNotEqual( first, differential.make_cases( seed=4, count=5 ) )
+        self.assertIn( 'fixture-test.py#0', [name for name, syntax, text in first] )
+
+    def test_identical_engines(self):
+        output_file = io.StringIO()
+        results = differential.run( self.reference, differential.make_cases( count=3 ), repeats=1, output_file=output_file )
+
+        self.assertEqual( [], [key for key, result in results.items() if result['divergence']] )
+        self.assertIn( 'fixture-test.txt#0/semantic', results )
+        self.assertGreater( results['fixture-test.txt#0/classic']['speedup'], 0 )
+        self.assertEqual( 0, differential.report_divergences( results, set(), output_file ) )
+
+    def test_first_diverging_paragraph(self):
+        classic_wrap_text = self.reference.WrapLinesPlusCommand.classic_wrap_text
+
+        def diverging_wrap_text(command, wrapper, paragraph_lines, initial_indent, subsequent_indent):
+            text = classic_wrap_text( command, wrapper, paragraph_lines, initial_indent, subsequent_indent )
+            return text.upper() if 'second' in text else text
+
+        self.reference.WrapLinesPlusCommand.classic_wrap_text = diverging_wrap_text
+        text = "First paragraph.\n\nSecond paragraph.\n\nThe second again.\n"
+
+        result = differential.compare_case( self.reference, "Packages/Text/Plain text.tmLanguage", text, 'classic', repeats=1 )
+        self.assertEqual( 3, result['paragraphs'] )
+        self.assertEqual( {'paragraph': 2, 'line': 5, 'original': "The second again.",
+                'reference': "THE SECOND AGAIN.", 'current': "The second again."}, result['divergence'] )
+
+        results = {'case/classic': result}
+        self.assertEqual( 1, differential.report_divergences( results, set(), io.StringIO() ) )
+        self.assertEqual( 0, differential.report_divergences( results, {'case/classic'}, io.StringIO() ) )
@@ -0,0 +1,66 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+
+THREAD = """Reply at the top level which is long enough to be wrapped.
+> The quoted paragraph which is long enough to be wrapped too.
+> > A nested quoted paragraph which is long enough to be wrapped.
+> > Its second line.
+> Back to the first level which is long enough to be wrapped.
+>
+> Another first level paragraph which is long enough to wrap.
+Bottom reply which is long enough to be wrapped at forty.
+"""
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class EmailQuotesUnitTests(unittest.TestCase):
+
+    def create_view(self, text):
+        return sublime.View( text, "Packages/Text/Plain text.tmLanguage",
+                {'WrapPlus.semantic_line_wrap': False, 'WrapPlus.after_wrap': 'cursor_below'} )
+
+    def test_all_quote_depths_in_one_pass(self):
+        view = self.create_view( THREAD )
+        view.sel().add( sublime.Region( 0, view.size() ) )
+        view.run_command( 'wrap_lines_plus', {'width': 40} )
+
+        self.assertEqual( "Reply at the top level which is long\nenough to be wrapped.\n"
+                "> The quoted paragraph which is long\n> enough to be wrapped too.\n"
+                "> > A nested quoted paragraph which is\n> > long enough to be wrapped. Its\n> > second line.\n"
+                "> Back to the first level which is long\n> enough to be wrapped.\n"
+                ">\n"
+                "> Another first level paragraph which is\n> long enough to wrap.\n"
+                "Bottom reply which is long enough to be\nwrapped at forty.\n",
+                view.substr( sublime.Region( 0, view.size() ) ) )
+
+    def test_quote_runs(self):
+        view = self.create_view( THREAD )
+        command = wrap_plus.WrapLinesPlusCommand( view )
+        runs = command._quote_runs( sublime.Region( 0, view.size() ) )
+
+        self.assertEqual( [
+                "Reply at the top level which is long enough to be wrapped.",
+                "> The quoted paragraph which is long enough to be wrapped too.",
+                "> > A nested quoted paragraph which is long enough to be wrapped.\n> > Its second line.",
+                "> Back to the first level which is long enough to be wrapped.\n>\n"
+                "> Another first level paragraph which is long enough to wrap.",
+                "Bottom reply which is long enough to be wrapped at forty.\n",
+            ], [view.substr( run ) for run in runs] )
+
+        plain = sublime.Region( 0, THREAD.index( "\n" ) )
+        self.assertEqual( [plain], command._quote_runs( plain ) )
+
+    def test_patterns_cached_by_prefix(self):
+        self.assertIs( wrap_plus.get_email_quote_pattern( '# ' ), wrap_plus.get_email_quote_pattern( '# ' ) )
+        self.assertEqual( '# > ', wrap_plus.get_email_quote_pattern( '# ' ).match( '# > quoted' ).group() )
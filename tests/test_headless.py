@@ -0,0 +1,49 @@
+
+
+import unittest
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+
+@unittest.skipUnless( is_headless, "Testing the in-memory stand-in for the Sublime Text API" )
+class HeadlessViewUnitTests(unittest.TestCase):
+
+    def test_fixture_syntaxes_scopes(self):
+        cases = [
+            ("Packages/Python/Python.sublime-syntax", 'def f():\n    """Doc"""\n    # note\n', 16,
+                "source.python comment.block.documentation.python string.quoted.double.block.python "),
+            ("Packages/Python/Python.sublime-syntax", 'def f():\n    """Doc"""\n    # note\n', 30,
+                "source.python comment.line.number-sign.python "),
+            ("Packages/C++/C.sublime-syntax", '/* block */\nint x; // line\n', 3, "source.c comment.block.c "),
+            ("Packages/LaTeX/LaTeX.sublime-syntax", 'text % comment\n', 8, "text.tex.latex comment.line.percentage.tex "),
+            ("Packages/Markdown/Markdown.sublime-syntax", '```\ncode\n```\n', 5,
+                "text.html.markdown markup.raw.code-fence.markdown "),
+            ("Packages/Text/Plain text.tmLanguage", 'text\n', 2, "text.plain "),
+        ]
+
+        for syntax, text, point, scope in cases:
+            self.assertEqual( scope, sublime.View( text, syntax ).scope_name( point ), syntax )
+
+    def test_extract_scope(self):
+        view = sublime.View( '/* block */\nint x;\n', "Packages/C++/C.sublime-syntax" )
+        self.assertEqual( sublime.Region( 0, 11 ), view.extract_scope( 3 ) )
+
+    def test_window_and_builtin_commands(self):
+        window = sublime.active_window()
+        view = window.new_file()
+
+        view.run_command( 'append', {'characters': 'one two'} )
+        view.sel().add( sublime.Region( 3 ) )
+        view.run_command( 'left_delete' )
+        view.run_command( 'insert', {'characters': 'E'} )
+
+        self.assertEqual( 'onE two', view.substr( sublime.Region( 0, view.size() ) ) )
+        self.assertIn( view, window.views() )
+
+        window.focus_view( view )
+        window.run_command( 'close_file' )
+        self.assertNotIn( view, window.views() )
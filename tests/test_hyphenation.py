@@ -0,0 +1,132 @@
+
+
+import os
+import shutil
+import unittest
+import tempfile
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+hyphenation = importlib.import_module( CURRENT_PACKAGE_NAME + '.hyphenation' )
+py_textwrap = importlib.import_module( CURRENT_PACKAGE_NAME + '.py_textwrap' )
+
+# The patterns hyphenating `hyphenation` in the TeXbook, appendix H
+PATTERNS = ( "% The patterns of the TeXbook\n"
+             "\\patterns{ % hyphenation\n"
+             "hy3ph he2n hena4 hen5at 1na n2at 1tio 2io o2n\n"
+             "}\n"
+             "\\hyphenation{ ta-ble }\n" )
+
+
+class HyphenatorUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.hyphenator = hyphenation.Hyphenator( *hyphenation.parse_patterns( PATTERNS ) )
+
+    def test_parse_patterns(self):
+        self.assertEqual( (["hy3ph", "he2n", "hena4", "hen5at", "1na", "n2at", "1tio", "2io", "o2n"], ["ta-ble"]),
+                hyphenation.parse_patterns( PATTERNS ) )
+        self.assertEqual( (["1na", "hy3ph"], ["ta-ble"]),
+                hyphenation.parse_patterns( "UTF-8\nLEFTHYPHENMIN 2\n1na\nhy3ph\nta-ble\n" ) )
+
+    def test_positions(self):
+        self.assertEqual( (2, 6), self.hyphenator.positions( "hyphenation" ) )
+        self.assertEqual( (2, 6), self.hyphenator.positions( "Hyphenation" ) )
+        self.assertEqual( (2,), self.hyphenator.positions( "table" ) )
+        self.assertEqual( (2,), self.hyphenator.positions( "nation" ) )
+        self.assertEqual( (), self.hyphenator.positions( "potato" ) )
+
+    def test_split(self):
+        self.assertEqual( ["(Hy", "phen", "ation),"], self.hyphenator.split( "(Hyphenation)," ) )
+        self.assertEqual( ["well-known"], self.hyphenator.split( "well-known" ) )
+        self.assertEqual( ["hyphenation2"], self.hyphenator.split( "hyphenation2" ) )
+
+    def test_join_lines(self):
+        self.assertEqual( "hyphenation and well-known", self.hyphenator.join_lines( "hyphen-\nation and well-\nknown" ) )
+        self.assertEqual( "hyphen-ation", self.hyphenator.join_lines( "hyphen-\nation", join_hyphenated=False ) )
+
+    def test_compound_words_are_not_joined(self):
+        hyphenator = hyphenation.Hyphenator( ["o1o"] )
+        self.assertEqual( "cooperate", hyphenator.join_lines( "co-\noperate" ) )
+        self.assertEqual( "co-operate", hyphenator.join_lines( "co-\noperate", join_hyphenated=False ) )
+
+        # The hyphen of the compound is on a hyphenation point, so it is only
+        # kept when the hyphenated words are not joined back
+        wrapper = py_textwrap.TextWrapper( width=40, break_on_hyphens=False, hyphenator=hyphenator )
+        self.assertEqual( ["We co-operate."], wrapper.wrap( "We co-\noperate." ) )
+
+        wrapper.join_hyphenated = True
+        self.assertEqual( ["We cooperate."], wrapper.wrap( "We co-\noperate." ) )
+
+    def test_cache(self):
+        words = "the nation of a nation is nationhood".split() * 1000
+
+        for word in words:
+            self.hyphenator.positions( word )
+
+        self.assertEqual( {"the", "nation", "of", "a", "is", "nationhood"}, set( self.hyphenator.cache ) )
+
+        hyphenator = hyphenation.Hyphenator( ["1tio"], cache_size=2 )
+
+        for word in words:
+            hyphenator.positions( word )
+
+        self.assertEqual( {"is": (), "nationhood": (2,)}, hyphenator.cache )
+
+    def test_text_wrapper(self):
+        wrapper = py_textwrap.TextWrapper( width=12, break_long_words=False, break_on_hyphens=False,
+                hyphenator=self.hyphenator, join_hyphenated=True )
+        lines = wrapper.wrap( "The hyphenation of a table" )
+
+        self.assertEqual( ["The hyphen-", "ation of a", "table"], lines )
+        self.assertEqual( lines, wrapper.wrap( "\n".join( lines ) ) )
+        self.assertEqual( ["hy-", "phen-", "ation"], py_textwrap.TextWrapper( width=5, break_long_words=False,
+                hyphenator=self.hyphenator ).wrap( "hyphenation" ) )
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class HyphenationUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.patterns_path = os.path.join( self.directory, 'hyph-test.tex' )
+
+        with open( self.patterns_path, 'w', encoding='utf-8' ) as patterns_file:
+            patterns_file.write( PATTERNS )
+
+    def tearDown(self):
+        shutil.rmtree( self.directory )
+
+    def wrap(self, text, **settings):
+        settings = dict( {'WrapPlus.hyphenation_patterns': self.patterns_path, 'WrapPlus.semantic_line_wrap': False},
+                **settings )
+        view = sublime.View( text, "Packages/Python/Python.sublime-syntax", settings )
+        view.sel().add( sublime.Region( 0, view.size() ) )
+        view.run_command( 'wrap_lines_plus', {'width': 16} )
+        return view.substr( sublime.Region( 0, view.size() ) )
+
+    def test_comment(self):
+        wrapped = self.wrap( "# The hyphenation of a table\n" )
+
+        self.assertEqual( "# The hyphen-\n# ation of a ta-\n# ble\n", wrapped )
+        self.assertEqual( wrapped, self.wrap( wrapped, **{'WrapPlus.hyphenation_join_lines': True} ) )
+
+    def test_join_lines_setting(self):
+        text = "# The hyphen-\n# ation of a well-\n# known table\n"
+
+        # The hyphens at the end of the lines are kept by default, as the ones of compound words
+        self.assertEqual( "# The\n# hyphen-ation\n# of a\n# well-known ta-\n# ble\n", self.wrap( text ) )
+        self.assertEqual( "# The hyphen-\n# ation of a\n# well-known ta-\n# ble\n",
+                self.wrap( text, **{'WrapPlus.hyphenation_join_lines': True} ) )
+
+    def test_missing_patterns(self):
+        self.assertEqual( "# The\n# hyphenation of\n# a table\n",
+                self.wrap( "# The hyphenation of a table\n",
+                        **{'WrapPlus.hyphenation_patterns': os.path.join( self.directory, 'missing.tex' )} ) )
+
+    def test_load_once(self):
+        self.assertIs( hyphenation.load( self.patterns_path ), hyphenation.load( self.patterns_path ) )
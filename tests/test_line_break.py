@@ -0,0 +1,85 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+line_break = importlib.import_module( CURRENT_PACKAGE_NAME + '.line_break' )
+py_textwrap = importlib.import_module( CURRENT_PACKAGE_NAME + '.py_textwrap' )
+
+CHINESE = "这是一个很长的中文段落，用来测试自动换行功能是否能够正确地处理没有空格的文本。"
+MIXED = "Python 的文档也经常混合使用英文单词和中文字符，例如 TextWrapper 类。"
+
+
+class LineBreakUnitTests(unittest.TestCase):
+
+    def test_tables_are_sorted(self):
+        for ranges in (line_break.wide_ranges, line_break.zero_width_ranges, line_break.class_ranges):
+            bounds = [bound for entry in ranges for bound in entry[:2]]
+            self.assertEqual( sorted( bounds ), bounds )
+
+    def test_column_width(self):
+        self.assertEqual( 5, line_break.column_width( "ascii" ) )
+        self.assertEqual( 6, line_break.column_width( "日本áb" ) )
+        self.assertEqual( 4, line_break.column_width( "ｶﾀｶﾅ" ) )
+        self.assertEqual( 2, line_break.fit_length( "日本語", 5 ) )
+        self.assertEqual( 0, line_break.fit_length( "日本語", 1 ) )
+
+    def test_split_segments(self):
+        self.assertEqual( ["日", "本", "語", "の", "テ", "キ", "ス", "ト、", "「引", "用」", "で", "す。", "Python", "的"],
+                line_break.split_segments( "日本語のテキスト、「引用」です。Python的" ) )
+        self.assertEqual( ["ちょっ", "と〜", "待っ", "て"], line_break.split_segments( "ちょっと〜待って" ) )
+        self.assertEqual( ["👨‍👩", "x"], line_break.split_segments( "👨‍👩x" ) )
+        self.assertEqual( ["e.g.(a)!=b"], line_break.split_segments( "e.g.(a)!=b" ) )
+        self.assertEqual( ["ab​", "cd"], line_break.split_segments( "ab​cd" ) )
+
+    def test_join_wide_lines(self):
+        self.assertEqual( "中文。下一行\nEnglish\n中文", line_break.join_wide_lines( "中文。\n下一行\nEnglish\n中文" ) )
+        self.assertEqual( "plain\ntext", line_break.join_wide_lines( "plain\ntext" ) )
+
+    def test_text_wrapper(self):
+        wrapper = py_textwrap.TextWrapper( width=30, break_on_hyphens=False, break_on_unicode=True )
+        lines = wrapper.wrap( CHINESE + "\n" + MIXED )
+
+        self.assertEqual( ["这是一个很长的中文段落，用来测", "试自动换行功能是否能够正确地处",
+                "理没有空格的文本。 Python 的文", "档也经常混合使用英文单词和中文", "字符，例如 TextWrapper 类。"], lines )
+        self.assertEqual( [30, 30, 30, 30, 27], [line_break.column_width( line ) for line in lines] )
+
+        wrapper.break_on_unicode = False
+        self.assertEqual( ["这是一个很长的中文段落，用来测试自动换行功能是否能够正确地处", "理没有空格的文本。 Python",
+                "的文档也经常混合使用英文单词和中文字符，例如", "TextWrapper 类。"], wrapper.wrap( CHINESE + " " + MIXED ) )
+
+    def test_long_words(self):
+        wrapper = py_textwrap.TextWrapper( width=5, break_on_hyphens=False, break_on_unicode=True )
+        self.assertEqual( ["中文a", "bcdef"], wrapper.wrap( "中文abcdef" ) )
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class UnicodeLineBreakUnitTests(unittest.TestCase):
+
+    def wrap(self, text, **settings):
+        settings = dict( {'WrapPlus.unicode_line_break': True, 'WrapPlus.semantic_line_wrap': False}, **settings )
+        view = sublime.View( text, "Packages/Python/Python.sublime-syntax", settings )
+        view.sel().add( sublime.Region( 0, view.size() ) )
+        view.run_command( 'wrap_lines_plus', {'width': 34} )
+        return view.substr( sublime.Region( 0, view.size() ) )
+
+    def test_comment(self):
+        self.assertEqual( "# 这是一个很长的中文段落，用来测试\n# 自动换行功能是否能够正确地处理没\n"
+                "# 有空格的文本。\n", self.wrap( "# " + CHINESE + "\n" ) )
+
+    def test_rewrapping_is_stable(self):
+        wrapped = self.wrap( "# " + CHINESE + "\n# " + MIXED + "\n" )
+        self.assertEqual( wrapped, self.wrap( wrapped ) )
+
+    def test_balance(self):
+        settings = {'WrapPlus.semantic_line_wrap': True, 'WrapPlus.semantic_balance_characters_between_line_wraps': True,
+                'WrapPlus.semantic_wrap_extension_percent': 1.0}
+        lines = self.wrap( "# " + CHINESE + "\n", **settings ).splitlines()
+
+        self.assertTrue( all( line_break.column_width( line ) <= 34 for line in lines ), lines )
+        self.assertEqual( "# " + CHINESE, lines[0] + "".join( line[2:] for line in lines[1:] ) )
@@ -0,0 +1,107 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+
+LONG_COMMENT = "# This is my very long comment line which goes over the width.\n# Its end.\n"
+SHORT_COMMENT = "# A short comment.\n"
+LONG_CODE = "value = first_function( some_argument ) + second_function( other_argument )\n"
+TEXT = LONG_COMMENT + "\n" + SHORT_COMMENT + "\n" + LONG_CODE + "\n" + LONG_COMMENT
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class OverWidthUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.listener = wrap_plus.WrapPlusOverWidthListener()
+        self.view = sublime.View( TEXT, "Packages/Python/Python.sublime-syntax",
+                {'WrapPlus.highlight_over_width': True, 'WrapPlus.wrap_width': 40, 'WrapPlus.semantic_line_wrap': False} )
+        self.listener.on_activated( self.view )
+
+    def tearDown(self):
+        self.listener.on_close( self.view )
+
+    def highlights(self):
+        return [self.view.substr( region ) for region in self.view.get_regions( wrap_plus.over_width_key )]
+
+    def type_text(self, point, characters):
+        self.view.sel().clear()
+        self.view.sel().add( sublime.Region( point ) )
+        self.view.run_command( 'insert', {'characters': characters} )
+        self.listener.on_modified( self.view )
+
+    def test_prose_paragraphs_over_the_width(self):
+        self.assertEqual( [LONG_COMMENT[:-1], LONG_COMMENT[:-1]], self.highlights() )
+
+    def test_edited_paragraphs(self):
+        self.type_text( TEXT.index( "comment." ), "much longer and longer " )
+        self.assertEqual( [LONG_COMMENT[:-1], "# A short much longer and longer comment.", LONG_COMMENT[:-1]], self.highlights() )
+
+        # Splits the first paragraph, leaving only its first line over the width
+        self.type_text( TEXT.index( "# Its" ), "\n" )
+        self.assertEqual( [LONG_COMMENT.split( "\n" )[0], "# A short much longer and longer comment.", LONG_COMMENT[:-1]],
+                self.highlights() )
+
+    def test_pasted_paragraphs(self):
+        self.type_text( TEXT.index( SHORT_COMMENT ), LONG_COMMENT + "\n" + LONG_COMMENT + "\n" )
+        self.assertEqual( [LONG_COMMENT[:-1]] * 4, self.highlights() )
+
+    def test_only_the_edited_lines_are_checked(self):
+        highlights = self.view.get_regions( wrap_plus.over_width_key )
+        self.view.add_regions( wrap_plus.over_width_key, highlights[:1] )
+
+        self.type_text( TEXT.index( "comment." ), "a " )
+        self.assertEqual( [LONG_COMMENT[:-1]], self.highlights() )
+
+    def test_wrapped_paragraphs(self):
+        self.view.sel().clear()
+        self.view.sel().add( sublime.Region( 0 ) )
+        self.view.run_command( 'wrap_lines_plus', {'width': 40} )
+
+        self.assertEqual( [LONG_COMMENT[:-1]], self.highlights() )
+
+    def test_disabled(self):
+        self.view.settings().set( 'WrapPlus.highlight_over_width', False )
+        self.type_text( 0, "a" )
+
+        self.assertEqual( [], self.highlights() )
+        self.assertNotIn( self.view.id(), wrap_plus.over_width_views )
+
+    def test_prepared_once_until_the_settings_change(self):
+        command, width = wrap_plus.over_width_commands[self.view.id()]
+        self.type_text( TEXT.index( "comment." ), "a " )
+        self.assertIs( command, wrap_plus.over_width_commands[self.view.id()][0] )
+
+        self.view.settings().set( 'WrapPlus.wrap_width', 70 )
+        self.assertNotIn( self.view.id(), wrap_plus.over_width_commands )
+
+        # Over the width of 40, but not of 70
+        self.type_text( TEXT.index( "comment." ) + 2, "much longer and " )
+        self.assertEqual( 70, wrap_plus.over_width_commands[self.view.id()][1] )
+        self.assertEqual( [LONG_COMMENT[:-1], LONG_COMMENT[:-1]], self.highlights() )
+
+    def test_wide_characters(self):
+        # 25 wide characters take 50 columns, over the width, on only 27 characters
+        text = "# " + "中文" * 12 + "字\n"
+        view = sublime.View( text, "Packages/Python/Python.sublime-syntax", {'WrapPlus.highlight_over_width': True,
+                'WrapPlus.wrap_width': 40, 'WrapPlus.semantic_line_wrap': False, 'WrapPlus.unicode_line_break': True} )
+
+        try:
+            self.listener.on_activated( view )
+            self.assertEqual( [text[:-1]], [view.substr( region ) for region in view.get_regions( wrap_plus.over_width_key )] )
+            self.assertTrue( wrap_plus.WrapPlusAutoWrapListener._is_over_width( view, 10 ) )
+
+            view.settings().set( 'WrapPlus.unicode_line_break', False )
+            self.assertFalse( wrap_plus.WrapPlusAutoWrapListener._is_over_width( view, 10 ) )
+
+        finally:
+            self.listener.on_close( view )
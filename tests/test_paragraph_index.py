@@ -0,0 +1,129 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+
+LONG_LINE = "This is my very long line which will wrap near its end."
+TEXT = "first\nparagraph\n\nsecond\n  \nthird %s\nlast line\n" % LONG_LINE
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class ParagraphIndexUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.view = sublime.View( TEXT, "Packages/Text/Plain text.tmLanguage",
+                {'WrapPlus.semantic_line_wrap': False, 'WrapPlus.after_wrap': 'cursor_below'} )
+        self.index = wrap_plus.get_paragraph_index( self.view )
+        self.listener = wrap_plus.WrapPlusParagraphIndexListener()
+
+    def tearDown(self):
+        self.listener.on_close( self.view )
+
+    def substr(self, region):
+        return self.view.substr( region )
+
+    def fresh_rows(self):
+        index = wrap_plus.ParagraphIndex()
+        index.build( self.view )
+        return index.rows
+
+    def test_block(self):
+        self.assertEqual( "first\nparagraph", self.substr( self.index.block( self.view, 2 ) ) )
+        self.assertEqual( [2, 4, 7], self.index.rows )
+        self.assertEqual( "second", self.substr( self.index.block( self.view, TEXT.index( "second" ) + 3 ) ) )
+        self.assertEqual( "third %s\nlast line" % LONG_LINE, self.substr( self.index.block( self.view, TEXT.index( "last" ) ) ) )
+        self.assertEqual( "  ", self.substr( self.index.block( self.view, TEXT.index( "  " ) ) ) )
+
+    def test_listener_updates_the_edited_lines(self):
+        self.index.block( self.view, 0 )
+        self.view.sel().add( sublime.Region( TEXT.index( "second" ) + 3 ) )
+
+        self.view.run_command( 'insert', {'characters': "\n\nmore\n"} )
+        self.listener.on_modified( self.view )
+        self.assertEqual( self.fresh_rows(), self.index.rows )
+        self.assertEqual( "more\nond", self.substr( self.index.block( self.view, self.view.sel()[0].begin() ) ) )
+
+        # Joins back the lines of the insertion
+        self.view.sel().clear()
+        self.view.sel().add( sublime.Region( TEXT.index( "second" ) + 3, TEXT.index( "second" ) + 10 ) )
+        self.view.run_command( 'left_delete' )
+        self.listener.on_modified( self.view )
+        self.assertEqual( TEXT, self.substr( sublime.Region( 0, self.view.size() ) ) )
+        self.assertEqual( [2, 4, 7], self.index.rows )
+
+    def test_edits_shift_the_rows_lazily(self):
+        self.index.block( self.view, 0 )
+
+        # From the bottom up, as the wrapping of several paragraphs edits them
+        for needle in ("last", "second", "paragraph"):
+            self.view.sel().clear()
+            self.view.sel().add( sublime.Region( self.view.find( needle, 0 ).begin() ) )
+            self.view.run_command( 'insert', {'characters': "\n\n"} )
+            self.listener.on_modified( self.view )
+
+        self.assertEqual( 6, self.index.shift )
+        self.assertEqual( "second", self.substr( self.index.block( self.view, self.view.find( "second", 0 ).begin() ) ) )
+        self.assertEqual( "last line", self.substr( self.index.block( self.view, self.view.find( "last", 0 ).begin() ) ) )
+
+        self.assertEqual( self.fresh_rows(), self.index.rows )
+        self.assertEqual( 0, self.index.shift )
+
+    def test_stale_index_is_rebuilt(self):
+        self.index.block( self.view, 0 )
+        self.view.sel().add( sublime.Region( TEXT.index( "\n\n" ) + 1 ) )
+
+        # An edit not notified to the listener, which keeps the line count
+        self.view.run_command( 'insert', {'characters': "joined"} )
+        self.assertEqual( "first\nparagraph\njoined\nsecond", self.substr( self.index.block( self.view, 0 ) ) )
+        self.assertEqual( self.fresh_rows(), self.index.rows )
+
+    def test_stale_blank_row_of_the_caret(self):
+        self.index.block( self.view, 0 )
+        self.view.sel().add( sublime.Region( TEXT.index( "\n\n" ) + 1 ) )
+
+        # The caret is on the row indexed as blank, which is filled without
+        # notifying the listener
+        self.view.run_command( 'insert', {'characters': "joined"} )
+        self.view.run_command( 'wrap_lines_plus', {'width': 200} )
+
+        fresh_view = sublime.View( TEXT.replace( "\n\n", "\njoined\n", 1 ), "Packages/Text/Plain text.tmLanguage",
+                {'WrapPlus.semantic_line_wrap': False, 'WrapPlus.after_wrap': 'cursor_below'} )
+        fresh_view.sel().add( sublime.Region( TEXT.index( "\n\n" ) + 7 ) )
+        fresh_view.run_command( 'wrap_lines_plus', {'width': 200} )
+
+        self.assertEqual( "first paragraph joined second\n  \nthird %s\nlast line\n" % LONG_LINE,
+                self.substr( sublime.Region( 0, self.view.size() ) ) )
+        self.assertEqual( fresh_view.substr( sublime.Region( 0, fresh_view.size() ) ),
+                self.substr( sublime.Region( 0, self.view.size() ) ) )
+        wrap_plus.paragraph_indexes.pop( fresh_view.id(), None )
+
+    def test_wrapping_updates_the_index(self):
+        self.index.block( self.view, 0 )
+        self.view.sel().add( sublime.Region( TEXT.index( "third" ) ) )
+        self.view.run_command( 'wrap_lines_plus', {'width': 20} )
+
+        self.assertEqual( "first\nparagraph\n\nsecond\n  \nthird This is my\nvery long line which\n"
+                "will wrap near its\nend. last line\n", self.substr( sublime.Region( 0, self.view.size() ) ) )
+        self.assertEqual( [2, 4, 9], self.index.rows )
+        self.assertEqual( 10, self.index.line_count )
+
+    def test_caret_paragraphs_slice_only_their_block(self):
+        command = wrap_plus.WrapLinesPlusCommand( self.view )
+        command._prepare_wrap( 40 )
+        paragraph, = command._find_selections_paragraphs( [sublime.Region( TEXT.index( "last" ) )] )
+
+        self.assertEqual( ["third %s" % LONG_LINE, "last line"], paragraph.lines )
+        self.assertEqual( "third %s\nlast line" % LONG_LINE, paragraph._snapshot.text )
+
+    def test_dropped_on_close(self):
+        self.listener.on_close( self.view )
+        self.assertNotIn( self.view.id(), wrap_plus.paragraph_indexes )
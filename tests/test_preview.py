@@ -0,0 +1,101 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+
+FIRST = "# This is my very long comment line which will wrap near its end.\n# Its second line.\n"
+SECOND = "This is a text paragraph which is long enough to wrap on two lines.\n"
+TEXT = FIRST + "\n" + SECOND
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class WrapPreviewUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.view = sublime.View( TEXT, "Packages/Python/Python.sublime-syntax", {'WrapPlus.semantic_line_wrap': False} )
+        self.view.sel().add( sublime.Region( 0 ) )
+        self.view.sel().add( sublime.Region( TEXT.index( "text" ) ) )
+
+    def wrapped(self, width):
+        view = sublime.View( TEXT, "Packages/Python/Python.sublime-syntax", {'WrapPlus.semantic_line_wrap': False} )
+        view.sel().add( sublime.Region( 0 ) )
+        view.sel().add( sublime.Region( TEXT.index( "text" ) ) )
+        view.run_command( 'wrap_lines_plus', {'width': width} )
+        return view.substr( sublime.Region( 0, view.size() ) )
+
+    def phantom_lines(self, preview):
+        return [phantom.content.split( "</div><div>" )[1].split( "</div>" )[0].replace( "&nbsp;", " " ).split( "<br>" )
+                for phantom in preview.phantoms.phantoms]
+
+    def test_update(self):
+        preview = wrap_plus.WrapPreview( self.view )
+        wrapped = self.wrapped( 30 ).split( "\n\n" )
+
+        preview.update( 30 )
+        self.assertEqual( [wrapped[0].splitlines(), wrapped[1].splitlines()], self.phantom_lines( preview ) )
+        self.assertIn( "<b>2 &rarr; 3 lines</b>", preview.phantoms.phantoms[0].content )
+        self.assertEqual( [len( FIRST ) - 1, len( TEXT ) - 1], [phantom.region.a for phantom in preview.phantoms.phantoms] )
+        self.assertEqual( TEXT, self.view.substr( sublime.Region( 0, self.view.size() ) ) )
+
+        preview.erase()
+        self.assertEqual( [], preview.phantoms.phantoms )
+
+    def test_chunks_are_split_once(self):
+        preview = wrap_plus.WrapPreview( self.view )
+        preview.update( 30 )
+
+        def split(text):
+            raise AssertionError( "split again %r" % text )
+
+        preview.wrapper._split = split
+        preview.update( 50 )
+
+        wrapped = self.wrapped( 50 ).split( "\n\n" )
+        self.assertEqual( [wrapped[0].splitlines(), wrapped[1].splitlines()], self.phantom_lines( preview ) )
+
+    def test_only_the_visible_paragraphs(self):
+        self.view.visible_region = lambda: sublime.Region( TEXT.index( "text" ), self.view.size() )
+        preview = wrap_plus.WrapPreview( self.view )
+        preview.update( 30 )
+
+        self.assertEqual( [self.wrapped( 30 ).split( "\n\n" )[1].splitlines()], self.phantom_lines( preview ) )
+
+    def test_ask_command(self):
+        self.view.run_command( 'wrap_lines_enhancement_ask' )
+        panel = sublime.active_window()._panels['input']
+        command = panel.on_change.__self__
+        preview = command.preview
+
+        panel.on_change( "30" )
+        self.assertEqual( 2, len( preview.phantoms.phantoms ) )
+
+        # A stale keystroke does not replace the preview of the later one
+        command._update_preview( "x", command.change_count - 1 )
+        self.assertEqual( 2, len( preview.phantoms.phantoms ) )
+
+        panel.on_change( "x" )
+        self.assertEqual( [], preview.phantoms.phantoms )
+
+        panel.on_change( "30" )
+        panel.on_done( "30" )
+        self.assertEqual( [], preview.phantoms.phantoms )
+        self.assertEqual( None, command.preview )
+        self.assertEqual( self.wrapped( 30 ), self.view.substr( sublime.Region( 0, self.view.size() ) ) )
+
+    def test_cancel(self):
+        self.view.run_command( 'wrap_lines_enhancement_ask' )
+        panel = sublime.active_window()._panels['input']
+        preview = panel.on_change.__self__.preview
+
+        panel.on_cancel()
+        self.assertEqual( [], preview.phantoms.phantoms )
+        self.assertEqual( TEXT, self.view.substr( sublime.Region( 0, self.view.size() ) ) )
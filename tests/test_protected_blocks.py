@@ -0,0 +1,91 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+
+LONG_LINE = "This is my very long line which will wrap near its end."
+FENCE = "```python\ndef function():\n    return 1  # %s\n1. not a list\n```\n" % LONG_LINE
+TABLE = "| a | b |\n|---|---|\n| %s | c |\n" % LONG_LINE
+EQUATION = "\\begin{equation}\n  x = %s\n\\end{equation}\n" % LONG_LINE
+MATH = "$$\n%s\n$$\n" % LONG_LINE
+
+
+class ProtectedBlocksUnitTests(unittest.TestCase):
+
+    def blocks(self, text):
+        blocks = wrap_plus.ProtectedBlocks( text, 10 )
+        return [text[begin - 10:end - 10] for begin, end in zip( blocks.begins, blocks.ends )]
+
+    def test_blocks(self):
+        text = "Prose.\n" + FENCE + TABLE + "Prose.\n" + EQUATION + MATH + "\\[\n  y\n\\]\n"
+        self.assertEqual( [FENCE[:-1], TABLE[:-1], EQUATION[:-1], MATH[:-1], "\\[\n  y\n\\]"], self.blocks( text ) )
+
+    def test_unclosed_blocks(self):
+        self.assertEqual( [], self.blocks( "```\nSome text.\n~~~\n$$$\n\\end{equation}\n\\]\n" ) )
+        self.assertEqual( [], self.blocks( "| a single row |\nSome text.\n| another row |\n" ) )
+
+    def test_fences(self):
+        text = "````\n```\nStill inside.\n```\n````\n"
+        self.assertEqual( [text[:-1]], self.blocks( text ) )
+        self.assertEqual( [], self.blocks( "```\n``` not a closing fence\n" ) )
+
+    def test_find(self):
+        blocks = wrap_plus.ProtectedBlocks( "Prose.\n" + MATH, 10 )
+        begin = 10 + len( "Prose.\n" )
+
+        self.assertEqual( None, blocks.find( begin - 1 ) )
+        self.assertEqual( begin + len( MATH ) - 1, blocks.find( begin ) )
+        self.assertEqual( begin + len( MATH ) - 1, blocks.find( begin + len( MATH ) - 1 ) )
+        self.assertEqual( None, blocks.find( begin + len( MATH ) ) )
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class ProtectedBlocksWrapUnitTests(unittest.TestCase):
+
+    def wrap(self, text, syntax):
+        view = sublime.View( text, syntax, {'WrapPlus.semantic_line_wrap': False, 'WrapPlus.after_wrap': 'cursor_below'} )
+        view.sel().add( sublime.Region( 0, view.size() ) )
+        view.run_command( 'wrap_lines_plus', {'width': 40} )
+        return view.substr( sublime.Region( 0, view.size() ) )
+
+    def test_markdown(self):
+        text = LONG_LINE + "\n" + FENCE + TABLE + LONG_LINE + "\n"
+        self.assertEqual( "This is my very long line which will\nwrap near its end.\n" + FENCE + TABLE +
+                "This is my very long line which will\nwrap near its end.\n",
+                self.wrap( text, "Packages/Markdown/Markdown.sublime-syntax" ) )
+
+    def test_latex(self):
+        text = LONG_LINE + "\n" + EQUATION + MATH + LONG_LINE + "\n"
+        self.assertEqual( "This is my very long line which will\nwrap near its end.\n" + EQUATION + MATH +
+                "This is my very long line which will\nwrap near its end.\n",
+                self.wrap( text, "Packages/LaTeX/LaTeX.sublime-syntax" ) )
+
+    def test_caret_inside_a_block(self):
+        view = sublime.View( FENCE, "Packages/Markdown/Markdown.sublime-syntax", {'WrapPlus.semantic_line_wrap': False} )
+        view.sel().add( sublime.Region( FENCE.index( "return" ) ) )
+        view.run_command( 'wrap_lines_plus', {'width': 40} )
+
+        self.assertEqual( FENCE, view.substr( sublime.Region( 0, view.size() ) ) )
+
+    def test_caret_inside_a_block_with_blank_lines(self):
+        fence = "```\nfirst\n\nx = f()\ny = 2\n```\n"
+        verbatim = "\\begin{verbatim}\nline one\n\nline three\nline four\n\\end{verbatim}\n"
+
+        for syntax, block, caret in (("Packages/Markdown/Markdown.sublime-syntax", fence, "x = f()"),
+                ("Packages/LaTeX/LaTeX.sublime-syntax", verbatim, "line three"),
+                ("Packages/LaTeX/LaTeX.sublime-syntax", EQUATION.replace( "  x", "\n  x" ), "x =")):
+            text = "Text before.\n\n" + block + "\nAfter.\n"
+
+            with self.subTest( block=block ):
+                view = sublime.View( text, syntax, {'WrapPlus.semantic_line_wrap': False} )
+                view.sel().add( sublime.Region( text.index( caret ) ) )
+                view.run_command( 'wrap_lines_plus', {'width': 40} )
+
+                self.assertEqual( text, view.substr( sublime.Region( 0, view.size() ) ) )
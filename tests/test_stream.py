@@ -0,0 +1,281 @@
+
+
+import io
+import os
+import shutil
+import tempfile
+import textwrap
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    stream = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.stream' )
+    wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+    mapped = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.mapped' )
+
+
+def wrap_text(text):
+    return textwrap.dedent( text ).lstrip( "\n" )
+
+
+@unittest.skipUnless( is_headless, "The stream pipeline runs only outside Sublime Text" )
+class StreamPipelineUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.settings = {'WrapPlus.semantic_line_wrap': False, 'WrapPlus.after_wrap': 'cursor_below'}
+
+    def segment_blocks(self, syntax, text):
+        stream_wrapper = stream.StreamWrapper( syntax, self.settings, 40 )
+        return list( stream_wrapper.segment_blocks( io.StringIO( wrap_text( text ) ) ) )
+
+    def test_segment_blocks_on_blank_lines(self):
+        self.assertEqual( ['first\nparagraph\n\n\n', 'second\n'], self.segment_blocks( "Packages/Text/Plain text.tmLanguage", """
+                first
+                paragraph
+
+
+                second
+                """ ) )
+
+    def test_segment_blocks_inside_python_docstring(self):
+        self.assertEqual( ['def function():\n    """Docstring\n\n    end.\n    """\n\n', 'pass\n'],
+                self.segment_blocks( "Packages/Python/Python.sublime-syntax", '''
+                def function():
+                    """Docstring
+
+                    end.
+                    """
+
+                pass
+                ''' ) )
+
+    def test_segment_blocks_inside_markdown_code_fence(self):
+        self.assertEqual( ['```\ncode\n\ncode\n```\n\n', 'text\n'], self.segment_blocks(
+                "Packages/Markdown/Markdown.sublime-syntax", """
+                ```
+                code
+
+                code
+                ```
+
+                text
+                """ ) )
+
+    def test_segment_blocks_inside_protected_blocks(self):
+        verbatim = "\\begin{verbatim}\nkeep   this    line as it is please and do not wrap it\n\n" \
+                "second   line   of the verbatim block\n\\end{verbatim}\n"
+        fence = "```\nkeep   this    line as it is please and do not wrap it\n\nsecond   line   of the fence\n```\n"
+
+        for syntax, block in (("Packages/LaTeX/LaTeX.sublime-syntax", verbatim),
+                ("Packages/Text/Plain text.tmLanguage", fence)):
+            text = "Some text.\n\n" + block + "\nAfter.\n"
+
+            with self.subTest( syntax=syntax ):
+                stream_wrapper = stream.StreamWrapper( syntax, self.settings, 40 )
+                mapped_wrapper = mapped.MappedWrapper( syntax, self.settings, 40 )
+                buffer = text.encode( 'utf-8' )
+
+                self.assertEqual( ["Some text.\n\n", block + "\n", "After.\n"],
+                        list( stream_wrapper.segment_blocks( io.StringIO( text ) ) ) )
+                self.assertEqual( ["Some text.\n\n", block + "\n", "After.\n"], [buffer[begin:end].decode( 'utf-8' )
+                        for begin, end, has_text in mapped_wrapper.segment_blocks( mapped.LineIndex( buffer ) )] )
+
+                output_file = io.StringIO()
+                self.assertFalse( stream.wrap_file( io.StringIO( text ), output_file, syntax, self.settings, 40 ) )
+                self.assertEqual( text, output_file.getvalue() )
+
+    def test_token_scanner(self):
+        syntaxes = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.syntaxes' )
+        texts = [
+            ( syntaxes.PYTHON, 'x = 1\n"""Docstring\n\nstill\n""" + """another\n\nend"""\n\n# comment\n\n'
+                    "s = '''a\\\n\nb'''\n\n" ),
+            ( syntaxes.C, 'int x; /* comment\n\n * end */ /* open\n\n*/\n\n// line\n\n' ),
+            ( syntaxes.MARKDOWN, '```\ncode\n\n~~~\n\n```\n\ntext\n\n<!-- a\n\n-->\n\n' ),
+        ]
+
+        for syntax, text in texts:
+            scanner = syntaxes.TokenScanner( syntax )
+            lines = text.splitlines( True )
+
+            for index, line in enumerate( lines ):
+
+                if not line.strip():
+
+                    with self.subTest( syntax=syntax, line=index ):
+                        self.assertEqual( syntax.ends_inside_token( ''.join( lines[:index] ) ), scanner.ends_inside_token() )
+
+                scanner.feed( line )
+
+    def test_mapped_segment_blocks(self):
+        text = 'def function():\n    """Docstring\n\n    middle\n\n    end.\n    """\n\n\npass\n\n'
+        stream_wrapper = stream.StreamWrapper( "Packages/Python/Python.sublime-syntax", self.settings, 40 )
+        mapped_wrapper = mapped.MappedWrapper( "Packages/Python/Python.sublime-syntax", self.settings, 40 )
+        buffer = text.encode( 'utf-8' )
+
+        self.assertEqual( [text[:text.index( "pass" )], "pass\n\n"],
+                list( stream_wrapper.segment_blocks( io.StringIO( text ) ) ) )
+        self.assertEqual( list( stream_wrapper.segment_blocks( io.StringIO( text ) ) ), [buffer[begin:end].decode( 'utf-8' )
+                for begin, end, has_text in mapped_wrapper.segment_blocks( mapped.LineIndex( buffer ) )] )
+
+    def test_wrap_file(self):
+        input_file = io.StringIO( wrap_text( """
+                This is my very long line which will wrap near its end, and then continue.
+
+                - A list item which is also long enough to need wrapping.
+                """ ) )
+        output_file = io.StringIO()
+
+        self.assertTrue( stream.wrap_file( input_file, output_file, "Packages/Text/Plain text.tmLanguage", self.settings, 40 ) )
+        self.assertEqual( wrap_text( """
+                This is my very long line which will
+                wrap near its end, and then continue.
+
+                - A list item which is also long enough
+                  to need wrapping.
+                """ ), output_file.getvalue() )
+
+    def test_wrap_file_after_a_comment(self):
+        long_line = "This is my very long line which will wrap near its end."
+        text = "%% A comment which is long enough to wrap at forty columns.\n\n%s\n\n%% Another %s\n" % (
+                long_line, long_line)
+        wrapped_comment = "% A comment which is long enough to wrap\n% at forty columns.\n\n"
+
+        # Selecting all the text on the editor stops at the first paragraph out of the comment
+        view = sublime.View( text, "Packages/LaTeX/LaTeX.sublime-syntax", self.settings )
+        view.sel().add( sublime.Region( 0, view.size() ) )
+        view.run_command( 'wrap_lines_plus', {'width': 40} )
+
+        self.assertEqual( wrapped_comment + "%s\n\n%% Another %s\n" % (long_line, long_line),
+                view.substr( sublime.Region( 0, view.size() ) ) )
+
+        # Each block is wrapped from its own first line
+        output_file = io.StringIO()
+        self.assertTrue( stream.wrap_file( io.StringIO( text ), output_file, "Packages/LaTeX/LaTeX.sublime-syntax",
+                self.settings, 40 ) )
+        self.assertEqual( wrapped_comment + "This is my very long line which will\nwrap near its end.\n\n"
+                "% Another This is my very long line\n% which will wrap near its end.\n", output_file.getvalue() )
+
+    def test_wrap_file_unchanged(self):
+        input_file = io.StringIO( "Short line.\n\nAnother.\n" )
+        output_file = io.StringIO()
+
+        self.assertFalse( stream.wrap_file( input_file, output_file, "Packages/Text/Plain text.tmLanguage", self.settings, 40 ) )
+        self.assertEqual( "Short line.\n\nAnother.\n", output_file.getvalue() )
+
+    def test_wrap_lines_is_lazy(self):
+        lines_read = []
+
+        def read_lines():
+            for index in range( 1000 ):
+                lines_read.append( index )
+                yield "Paragraph %d with some words.\n" % index
+                yield "\n"
+
+        stream_wrapper = stream.StreamWrapper( "Packages/Text/Plain text.tmLanguage", self.settings, 40 )
+        original_text, wrapped_text = next( stream_wrapper.wrap_lines( read_lines() ) )
+
+        self.assertEqual( "Paragraph 0 with some words.\n\n", wrapped_text )
+        self.assertEqual( [0, 1], lines_read )
+
+    def test_scope_blocks(self):
+        stream_wrapper = stream.StreamWrapper( "Packages/Text/Plain text.tmLanguage", self.settings, 40 )
+
+        self.assertEqual( [('one\ntwo\n\n', [1]), ('three\n\n', []), ('four', [0])],
+                list( stream_wrapper.scope_blocks( ['one\ntwo\n\n', 'three\n\n', 'four'], [2, 6, 9] ) ) )
+
+    def test_wrap_file_changed_lines(self):
+        long_line = "This is my very long line which will wrap near its end."
+        input_file = io.StringIO( "First %s\nSecond %s\n- Item %s\n\nLast %s\n" % ((long_line,) * 4) )
+        output_file = io.StringIO()
+
+        self.assertTrue( stream.wrap_file( input_file, output_file, "Packages/Text/Plain text.tmLanguage",
+                self.settings, 40, changed_lines=[2] ) )
+
+        self.assertEqual( wrap_text( """
+                First This is my very long line which
+                will wrap near its end. Second This is
+                my very long line which will wrap near
+                its end.
+                - Item %s
+
+                Last %s
+                """ ) % (long_line, long_line), output_file.getvalue() )
+
+    def test_wrap_modified_lines_command(self):
+        long_line = "This is my very long line which will wrap near its end."
+        view = sublime.View( "First %s\n\nSecond %s\n" % (long_line, long_line),
+                "Packages/Text/Plain text.tmLanguage", self.settings )
+
+        view.sel().add( sublime.Region( view.size() ) )
+        view.add_regions( wrap_plus.modified_lines_key, [view.line( view.size() - 1 )] )
+        view.run_command( 'wrap_lines_plus', {'width': 40, 'modified_only': True} )
+
+        self.assertEqual( "First %s\n\nSecond This is my very long line which\nwill wrap near its end.\n" % long_line,
+                view.substr( sublime.Region( 0, view.size() ) ) )
+        self.assertEqual( [sublime.Region( view.size() )], list( view.sel() ) )
+
+
+@unittest.skipUnless( is_headless, "The memory mapped wrapping runs only outside Sublime Text" )
+class MappedFileUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.settings = {'WrapPlus.semantic_line_wrap': False}
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree( self.directory )
+
+    def create_file(self, contents):
+        path = os.path.join( self.directory, 'file.txt' )
+
+        with open( path, 'wb' ) as output_file:
+            output_file.write( contents )
+
+        return path
+
+    def read_file(self, path):
+        with open( path, 'rb' ) as input_file:
+            return input_file.read()
+
+    def test_line_index(self):
+        line_index = mapped.LineIndex( b"first\n  \nthird" )
+
+        self.assertEqual( [0, 6, 9, 14], list( line_index.starts ) )
+        self.assertEqual( [False, True, False], [line_index.is_blank( index ) for index in range( len( line_index ) )] )
+
+    def test_wrap_mapped_file_keeps_line_endings(self):
+        path = self.create_file( b"\r\nShort line.\r\n\r\nThis is my very long line which will wrap near its end.\r\n" )
+
+        self.assertTrue( mapped.wrap_mapped_file( path, settings=self.settings, width=40 ) )
+        self.assertEqual( b"\r\nShort line.\r\n\r\nThis is my very long line which will\r\nwrap near its end.\r\n",
+                self.read_file( path ) )
+
+    def test_wrap_mapped_file_unchanged(self):
+        path = self.create_file( "Short line, caf\u00e9.\n\nAnother.\n".encode( 'utf-8' ) )
+        modified_time = os.stat( path ).st_mtime_ns
+
+        self.assertFalse( mapped.wrap_mapped_file( path, settings=self.settings, width=40 ) )
+        self.assertEqual( modified_time, os.stat( path ).st_mtime_ns )
+        self.assertEqual( ['file.txt'], os.listdir( self.directory ) )
+
+    def test_wrap_mapped_file_to_output_path(self):
+        path = self.create_file( b"One\ntwo\n" )
+        output_path = os.path.join( self.directory, 'output.txt' )
+
+        self.assertTrue( mapped.wrap_mapped_file( path, output_path, settings=self.settings, width=40 ) )
+        self.assertEqual( b"One\ntwo\n", self.read_file( path ) )
+        self.assertEqual( b"One two\n", self.read_file( output_path ) )
+
+    def test_wrap_mapped_file_changed_lines(self):
+        path = self.create_file( b"One\ntwo\n\nThree\nfour\n\nFive\nsix\n" )
+
+        self.assertTrue( mapped.wrap_mapped_file( path, settings=self.settings, width=40, changed_lines=[5] ) )
+        self.assertEqual( b"One\ntwo\n\nThree four\n\nFive\nsix\n", self.read_file( path ) )
@@ -0,0 +1,84 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+
+LONG_LINE = "This is my very long line, which will wrap near its end. " * 4
+
+
+class WrapSchedulerUnitTests(unittest.TestCase):
+
+    def test_estimate(self):
+        self.assertLess( wrap_plus.WrapScheduler.estimate( 'classic', 1000, 200 ),
+                wrap_plus.WrapScheduler.estimate( 'semantic', 1000, 200 ) )
+        self.assertLess( wrap_plus.WrapScheduler.estimate( 'semantic', 1000, 200 ),
+                wrap_plus.WrapScheduler.estimate( 'balance', 1000, 200 ) )
+
+    def test_choose_within_the_budget(self):
+        lines = [LONG_LINE]
+        balance_cost = wrap_plus.WrapScheduler.estimate( 'balance', len( LONG_LINE ), len( LONG_LINE.split() ) )
+        semantic_cost = wrap_plus.WrapScheduler.estimate( 'semantic', len( LONG_LINE ), len( LONG_LINE.split() ) )
+        scheduler = wrap_plus.WrapScheduler( balance_cost + semantic_cost )
+
+        self.assertEqual( ('balance', balance_cost), scheduler.choose( 'balance', lines ) )
+        self.assertEqual( ('semantic', semantic_cost), scheduler.choose( 'balance', lines ) )
+        self.assertEqual( 'classic', scheduler.choose( 'balance', lines )[0] )
+        self.assertEqual( 'classic', scheduler.choose( 'classic', lines )[0] )
+
+
+@unittest.skipUnless( is_headless, "The commands run over views only outside Sublime Text" )
+class TimeBudgetUnitTests(unittest.TestCase):
+
+    def run_command(self, text, settings):
+        settings = dict( {'WrapPlus.semantic_line_wrap': True, 'WrapPlus.after_wrap': 'cursor_below'}, **settings )
+        view = sublime.View( text, "Packages/Text/Plain text.tmLanguage", settings )
+        view.sel().add( sublime.Region( 0, view.size() ) )
+
+        command = wrap_plus.WrapLinesPlusCommand( view )
+        command.run( sublime.Edit(), width=40 )
+        return command, view.substr( sublime.Region( 0, view.size() ) )
+
+    def semantic_cost(self):
+        return 1000 * wrap_plus.WrapScheduler.estimate( 'semantic', len( LONG_LINE ) - 1, len( LONG_LINE.split() ) )
+
+    def test_paragraphs_over_budget_fall_back_to_classic(self):
+        text = "%s\n\n%s\n" % (LONG_LINE, LONG_LINE)
+        command, wrapped = self.run_command( text, {'WrapPlus.time_budget_ms': self.semantic_cost() * 1.5} )
+        first, second = wrapped.split( "\n\n" )
+
+        self.assertEqual( ['semantic', 'classic'], [algorithm for algorithm, cost in command.paragraph_algorithms] )
+        self.assertNotEqual( first + "\n", second )
+
+        classic_command, classic_wrapped = self.run_command( LONG_LINE + "\n", {'WrapPlus.semantic_line_wrap': False} )
+        self.assertEqual( classic_wrapped, second )
+
+    def test_no_budget(self):
+        text = "%s\n\n%s\n" % (LONG_LINE, LONG_LINE)
+        command, wrapped = self.run_command( text, {'WrapPlus.time_budget_ms': 0} )
+
+        self.assertEqual( [('semantic', None), ('semantic', None)], command.paragraph_algorithms )
+
+    def test_no_budget_by_default(self):
+        text = "\n\n".join( [LONG_LINE] * 60 ) + "\n"
+        command, wrapped = self.run_command( text, {} )
+
+        self.assertEqual( [('semantic', None)] * 60, command.paragraph_algorithms )
+
+    def test_defer_paragraphs_over_budget(self):
+        text = "%s\n\n%s\n" % (LONG_LINE, LONG_LINE)
+        unlimited_command, unlimited = self.run_command( text, {'WrapPlus.time_budget_ms': 0} )
+
+        # The stand-in `sublime.set_timeout()` runs the deferred wrapping right away
+        command, wrapped = self.run_command( text, {'WrapPlus.time_budget_ms': self.semantic_cost() * 1.5,
+                'WrapPlus.over_budget': 'defer'} )
+
+        self.assertEqual( ['semantic', 'classic'], [algorithm for algorithm, cost in command.paragraph_algorithms] )
+        self.assertEqual( unlimited, wrapped )
+        self.assertEqual( [], command.view.get_regions( wrap_plus.deferred_paragraphs_key ) )
@@ -0,0 +1,86 @@
+
+
+import io
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    stream = importlib.import_module( CURRENT_PACKAGE_NAME + '.headless.stream' )
+
+LONG_CODE = "value = first_function( some_argument ) + second_function( other_argument )\n"
+TEXT = ( "# This is my very long comment line which will wrap near its end.\n"
+         "# Its second line.\n"
+         "def function():\n"
+         '    """This is my very long docstring line which will wrap near its end.\n'
+         '    """\n'
+         '    text = """This is my very long string line which is not a docstring."""\n'
+         "    " + LONG_CODE +
+         "\n"
+         "# Short comment.\n" )
+WRAPPED = ( "# This is my very long comment line\n"
+            "# which will wrap near its end. Its\n"
+            "# second line.\n"
+            "def function():\n"
+            '    """This is my very long docstring\n'
+            '    line which will wrap near its end.\n'
+            '    """\n'
+            '    text = """This is my very long string line which is not a docstring."""\n'
+            "    " + LONG_CODE +
+            "\n"
+            "# Short comment.\n" )
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class WrapCommentsUnitTests(unittest.TestCase):
+
+    def create_view(self, text):
+        return sublime.View( text, "Packages/Python/Python.sublime-syntax",
+                {'WrapPlus.semantic_line_wrap': False, 'WrapPlus.wrap_width': 40} )
+
+    def test_command(self):
+        view = self.create_view( TEXT )
+        view.sel().add( sublime.Region( TEXT.index( "Short" ) ) )
+        view.run_command( 'wrap_lines_plus', {'comments_only': True} )
+
+        self.assertEqual( WRAPPED, view.substr( sublime.Region( 0, view.size() ) ) )
+        self.assertEqual( [sublime.Region( WRAPPED.index( "Short" ) )], list( view.sel() ) )
+
+    def test_python_comment_spans(self):
+        spans = stream.python_comment_spans( TEXT )
+
+        self.assertEqual( ["# This is my very long comment line which will wrap near its end.", "# Its second line.",
+                '"""This is my very long docstring line which will wrap near its end.\n    """', "# Short comment."],
+                [TEXT[begin:end] for begin, end in spans] )
+        self.assertEqual( [], stream.python_comment_spans( LONG_CODE ) )
+        self.assertEqual( None, stream.python_comment_spans( "call( # argument\n" ) )
+
+    def test_wrap_file(self):
+        output_file = io.StringIO()
+        stream.wrap_file( io.StringIO( TEXT ), output_file, "Packages/Python/Python.sublime-syntax",
+                width=40, line_wrap_type='classic', comments_only=True )
+
+        self.assertEqual( WRAPPED, output_file.getvalue() )
+
+    def test_changed_lines(self):
+        output_file = io.StringIO()
+        stream.wrap_file( io.StringIO( TEXT ), output_file, "Packages/Python/Python.sublime-syntax",
+                width=40, line_wrap_type='classic', changed_lines=[4], comments_only=True )
+
+        self.assertEqual( TEXT[:TEXT.index( "def" )] + WRAPPED[WRAPPED.index( "def" ):], output_file.getvalue() )
+
+    def test_falls_back_to_the_selector(self):
+        # Alone, the block after the blank line inside the brackets does not tokenize
+        text = "call(\n\n    # This is my very long comment line which will wrap near its end.\n)\n"
+        output_file = io.StringIO()
+        stream.wrap_file( io.StringIO( text ), output_file, "Packages/Python/Python.sublime-syntax",
+                width=40, line_wrap_type='classic', comments_only=True )
+
+        self.assertEqual( None, stream.python_comment_spans( text.split( "\n\n" )[1] ) )
+        self.assertEqual( "call(\n\n    # This is my very long comment line\n    # which will wrap near its end.\n)\n",
+                output_file.getvalue() )
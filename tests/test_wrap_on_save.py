@@ -0,0 +1,86 @@
+
+
+import unittest
+import importlib
+
+import sublime
+
+from . import CURRENT_PACKAGE_NAME
+
+is_headless = sublime.__name__ == CURRENT_PACKAGE_NAME + '.headless.sublime'
+
+if is_headless:
+    wrap_plus = importlib.import_module( CURRENT_PACKAGE_NAME + '.wrap_plus' )
+
+LONG_COMMENT = "# This is my very long comment line which will wrap near its end.\n"
+LONG_CODE = "value = first_function( some_argument ) + second_function( other_argument )\n"
+TEXT = LONG_COMMENT + "\n" + "x = 1\n" * 100 + "\n# Short comment.\n" + LONG_CODE
+
+
+@unittest.skipUnless( is_headless, "The views are only created outside Sublime Text" )
+class WrapOnSaveUnitTests(unittest.TestCase):
+
+    def setUp(self):
+        self.listener = wrap_plus.WrapPlusModifiedLinesListener()
+
+    def create_view(self, **settings):
+        settings = dict( {'WrapPlus.wrap_on_save': True, 'WrapPlus.wrap_width': 40,
+                'WrapPlus.semantic_line_wrap': False}, **settings )
+        return sublime.View( TEXT, "Packages/Python/Python.sublime-syntax", settings )
+
+    def type_text(self, view, point, characters):
+        view.sel().clear()
+        view.sel().add( sublime.Region( point ) )
+        view.run_command( 'insert', {'characters': characters} )
+        self.listener.on_modified( view )
+
+    def edit_and_save(self, view):
+        self.type_text( view, TEXT.index( "comment." ), "edited " )
+        self.type_text( view, view.size() - 1, " + third_function()" )
+
+        self.listener.on_pre_save( view )
+        self.listener.on_post_save( view )
+        return view.substr( sublime.Region( 0, view.size() ) )
+
+    def test_only_the_edited_prose_is_wrapped(self):
+        view = self.create_view()
+        text = self.edit_and_save( view )
+
+        self.assertEqual( LONG_COMMENT + "\n" + "x = 1\n" * 100 + "\n# Short edited comment.\n" +
+                LONG_CODE[:-1] + " + third_function()\n", text )
+        self.assertEqual( [], view.get_regions( wrap_plus.modified_lines_key ) )
+
+        self.type_text( view, TEXT.index( "comment line" ), "edited " )
+        self.listener.on_pre_save( view )
+
+        self.assertEqual( "# This is my very long edited comment\n# line which will wrap near its end.\n",
+                view.substr( sublime.Region( 0, view.size() ) ).split( "\n\n" )[0] + "\n" )
+        self.assertEqual( [sublime.Region( TEXT.index( "comment line" ) + 7 )], list( view.sel() ) )
+
+    def test_pasted_paragraphs_are_wrapped(self):
+        view = self.create_view()
+        self.listener.on_activated( view )
+        self.type_text( view, TEXT.index( "x = 1" ), LONG_COMMENT + "\n" + LONG_COMMENT + "\n" )
+
+        self.listener.on_pre_save( view )
+        self.listener.on_post_save( view )
+
+        wrapped = "# This is my very long comment line\n# which will wrap near its end.\n"
+        self.assertEqual( LONG_COMMENT + "\n" + wrapped + "\n" + wrapped + "\n" + "x = 1\n" * 100 +
+                "\n# Short comment.\n" + LONG_CODE, view.substr( sublime.Region( 0, view.size() ) ) )
+
+    def test_disabled(self):
+        view = self.create_view( **{'WrapPlus.wrap_on_save': False} )
+        self.type_text( view, TEXT.index( "comment line" ), "edited " )
+        self.listener.on_pre_save( view )
+
+        self.assertEqual( TEXT.replace( "comment line", "edited comment line" ), view.substr( sublime.Region( 0, view.size() ) ) )
+
+    def test_distant_paragraphs_slice_only_their_text(self):
+        view = self.create_view()
+        command = wrap_plus.WrapLinesPlusCommand( view )
+        command._prepare_wrap( 40 )
+        first, last = command._find_selections_paragraphs( [sublime.Region( 0 ), sublime.Region( TEXT.index( "Short" ) )] )
+
+        self.assertEqual( LONG_COMMENT[:-1], first._snapshot.text )
+        self.assertEqual( "# Short comment.\n" + LONG_CODE[:-1], last._snapshot.text )
@@ -2,18 +2,16 @@ from __future__ import print_function
 import sublime
 import sublime_plugin
 
+import os
 import re
+import html
 import math
 import time
+import bisect
+import threading
+import collections
 
-try:
-    import Default.comment as comment
-except ImportError:
-    import comment
-
-from debug_tools import getLogger
-
-from . import py_textwrap as textwrap
+from array import array
 
 
 def is_quoted_string(scope_region, scope_name):
@@ -25,11 +23,109 @@ def is_quoted_string(scope_region, scope_name):
     return 'quoted' in scope_name or 'comment.block.documentation' in scope_name
 
 
+class LazyLogger(object):
+    """The `debug_tools` logger, only imported and created on its first use,
+    as importing `debug_tools` takes most of the time of loading the plugin.
+
+    Once created, the logger replaces this object on the module `log` global,
+    so the later calls go straight to it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.__dict__['_arguments'] = (args, kwargs)
+        self.__dict__['_logger'] = None
+
+    def _get_logger(self):
+        if self._logger is None:
+            from debug_tools import getLogger
+
+            args, kwargs = self._arguments
+            self.__dict__['_logger'] = getLogger(*args, **kwargs)
+
+            global log
+            log = self._logger
+
+        return self._logger
+
+    def __call__(self, *args, **kwargs):
+        return self._get_logger()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._get_logger(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_logger(), name, value)
+
+    def delete(self):
+        # Nothing to unlock when it was never created
+        if self._logger is not None:
+            self._logger.delete()
+
+
+class LazyPattern(object):
+    """A regular expression only compiled on its first use.
+
+    Once compiled, its methods are copied over this object, so the later calls
+    do not go through `__getattr__()`.
+    """
+
+    def __init__(self, pattern, flags=0):
+        self._pattern = pattern
+        self._flags = flags
+
+    def compile(self):
+        compiled = re.compile(self._pattern, self._flags)
+
+        for name in ('match', 'search', 'sub', 'subn', 'split', 'findall', 'finditer', 'pattern', 'groups'):
+            setattr(self, name, getattr(compiled, name))
+
+        return compiled
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return getattr(self.compile(), name)
+
+
 time_start = 0
 debug_enabled = 1
-log = getLogger(debug_enabled, "wrap_plus")
-# log = getLogger( debug_enabled, "wrap_plus", "wrapplus.txt" )
-# log = getLogger( debug_enabled, "wrap_plus", "wrapplus.txt", mode='w', time=False, msecs=False, tick=False )
+log = LazyLogger(debug_enabled, "wrap_plus")
+# log = LazyLogger( debug_enabled, "wrap_plus", "wrapplus.txt" )
+# log = LazyLogger( debug_enabled, "wrap_plus", "wrapplus.txt", mode='w', time=False, msecs=False, tick=False )
+
+
+def _load_comment_module():
+    try:
+        import Default.comment as comment
+    except ImportError:
+        import comment
+
+    return comment
+
+
+def prewarm():
+    """Import the modules and compile the patterns deferred until the first
+    wrapping, so the first `wrap_lines_plus` does not pay for them.
+    """
+    from . import py_textwrap
+    from . import line_break
+    from . import hyphenation
+
+    _load_comment_module()
+
+    for value in list(globals().values()):
+
+        if isinstance(value, LazyPattern):
+            value.compile()
+
+    log(4, "pattern blank_line_pattern", blank_line_pattern.pattern)
+
+
+def plugin_loaded():
+    thread = threading.Thread(target=prewarm, name='WrapPlus.prewarm')
+    thread.daemon = True
+    thread.start()
 
 
 def plugin_unloaded():
@@ -80,6 +176,15 @@ class PrefixStrippingView(object):
         self.view = view
         self.min = min
         self.max = max
+        # The text does not change while the view is used, see `set_range()`
+        self._c_comment_cache = {}
+
+    def set_range(self, min, max):
+        """Reuse this view for another selection, as if it was just created."""
+        self.min = min
+        self.max = max
+        self.required_comment_prefix = ''
+        self.required_comment_pattern = None
 
     def _is_c_comment(self, scope_name):
         if 'comment' not in scope_name and 'block' not in scope_name:
@@ -101,6 +206,7 @@ class PrefixStrippingView(object):
         # If the line at point is a comment line, set required_comment_prefix to
         # the comment prefix.
         self.required_comment_prefix = ''
+        self.required_comment_pattern = None
 
         # Grab the line.
         line_region = self.view.line(point)
@@ -145,7 +251,7 @@ class PrefixStrippingView(object):
         # TODO: re.escape required_comment_prefix.
 
         # Handle email-style quoting.
-        email_quote_pattern = re.compile('^' + self.required_comment_prefix + email_quote)
+        email_quote_pattern = get_email_quote_pattern(self.required_comment_prefix)
         regex_match = email_quote_pattern.match(line)
         if regex_match:
             self.required_comment_prefix = regex_match.group()
@@ -155,28 +261,16 @@ class PrefixStrippingView(object):
         log(2, 'scope=%r range=%r', scope_name, scope_region)
 
         if self._is_c_comment(scope_name):
-            # Check for C-style commenting with each line starting with an asterisk.
-            first_star_prefix = None
-            lines = self.view.lines(scope_region)
-            for line_region in lines[1:-1]:
-                line = self.view.substr(line_region)
-                regex_match = funny_c_comment_pattern.match(line)
-                if regex_match is not None:
-                    if first_star_prefix is None:
-                        first_star_prefix = regex_match.group()
-                else:
-                    first_star_prefix = None
-                    break
+            # Each paragraph inside the comment would scan all its lines again
+            key = (scope_region.begin(), scope_region.end())
+            if key not in self._c_comment_cache:
+                self._c_comment_cache[key] = self._scan_c_comment(scope_region)
+            first_star_prefix, contents_region = self._c_comment_cache[key]
             if first_star_prefix:
                 self.required_comment_prefix = first_star_prefix
-            # Narrow the scope to just the comment contents.
-            scope_text = self.view.substr(scope_region)
-            regex_match = re.match(r'^([ \t\n]*/\*).*(\*/[ \t\n]*)$', scope_text, re.DOTALL)
-            if regex_match:
-                begin = scope_region.begin() + len(regex_match.group(1))
-                end = scope_region.end() - len(regex_match.group(2))
-                self.min = max(self.min, begin)
-                self.max = min(self.max, end)
+            if contents_region:
+                self.min = max(self.min, contents_region.begin())
+                self.max = min(self.max, contents_region.end())
             log(2, 'Scope narrowed to %i:%i', self.min, self.max)
 
         log(2, 'required_comment_prefix determined to be %r', self.required_comment_prefix,)
@@ -187,6 +281,33 @@ class PrefixStrippingView(object):
             self.min = max(self.min, self.view.line(scope_region.begin()).begin())
             self.max = min(self.max, self.view.line(scope_region.end()).end())
 
+    def _scan_c_comment(self, scope_region):
+        """:returns: A (first_star_prefix, contents_region) tuple, where
+            first_star_prefix is the asterisk prefix shared by all the middle
+            lines of the comment, if any, and contents_region is the region
+            between its `/*` and `*/`, if found.
+        """
+        # Check for C-style commenting with each line starting with an asterisk.
+        first_star_prefix = None
+        lines = self.view.lines(scope_region)
+        for line_region in lines[1:-1]:
+            line = self.view.substr(line_region)
+            regex_match = funny_c_comment_pattern.match(line)
+            if regex_match is not None:
+                if first_star_prefix is None:
+                    first_star_prefix = regex_match.group()
+            else:
+                first_star_prefix = None
+                break
+        # Narrow the scope to just the comment contents.
+        scope_text = self.view.substr(scope_region)
+        regex_match = re.match(r'^([ \t\n]*/\*).*(\*/[ \t\n]*)$', scope_text, re.DOTALL)
+        contents_region = None
+        if regex_match:
+            contents_region = sublime.Region(scope_region.begin() + len(regex_match.group(1)),
+                                             scope_region.end() - len(regex_match.group(2)))
+        return first_star_prefix, contents_region
+
     def line(self, where):
         """Get a line for a point.
 
@@ -247,6 +368,428 @@ class PrefixStrippingView(object):
         return self.line(point)
 
 
+class Snapshot(object):
+    """The text of a region of the view, sliced by the points of the view,
+    like if it was the text of the whole view.
+    """
+    __slots__ = ('text', 'begin')
+
+    def __init__(self, text, begin):
+        self.text = text
+        self.begin = begin
+
+    def __getitem__(self, key):
+        return self.text[key.start - self.begin:key.stop - self.begin]
+
+    def startswith(self, prefix, start, end):
+        return self.text.startswith(prefix, start - self.begin, end - self.begin)
+
+
+class ProtectedBlocks(object):
+    """The blocks of a text which are never wrapped, found by a single scan of
+    their opening and closing lines: the closed code fences, the LaTeX
+    verbatim and math environments, the `$$` and `\\[` display math, and the
+    runs of two or more table rows.
+
+    The paragraph scanning treats their lines as breaks, and jumps from their
+    first line to their last one, instead of classifying each line.
+
+    :ivar list begins: The sorted points where each block begins.
+    :ivar list ends: The points where each block ends, after its last line.
+    """
+
+    def __init__(self, text, begin=0):
+        self.begins = []
+        self.ends = []
+
+        opened = None
+        table = None
+
+        for match in protected_line_pattern.finditer(text):
+            line_begin = match.start()
+            line_end = text.find('\n', match.end())
+            line_end = len(text) if line_end < 0 else line_end
+
+            if opened:
+                kind, closer, opened_begin = opened
+
+                if self._is_closer(match, kind, closer, text[match.end():line_end]):
+                    self._add(begin + opened_begin, begin + line_end)
+                    opened = None
+
+                continue
+
+            if match.group('table'):
+
+                if table and table[1] + 1 == line_begin:
+                    table = (table[0], line_end, table[2] + 1)
+                    continue
+
+                self._add_table(begin, table)
+                table = (line_begin, line_end, 1)
+                continue
+
+            opener = self._opener(match)
+
+            if opener:
+                self._add_table(begin, table)
+                table = None
+                opened = opener + (line_begin,)
+
+        self._add_table(begin, table)
+
+    @staticmethod
+    def _opener(match):
+        """:returns: The (kind, closer) of the block opened by the line of the
+            `match`, or None when it does not open any.
+        """
+        for kind in ('fence', 'environment', 'math'):
+            opener = match.group(kind)
+
+            if opener and (kind != 'environment' or match.group('command') == 'begin') and opener != '\\]':
+                return kind, '\\]' if opener == '\\[' else opener
+
+        return None
+
+    @classmethod
+    def follow_line(cls, line, opened):
+        """Follow the blocks line by line, for the streaming, which must not
+        split them on their blank lines.
+
+        :param opened: the (kind, closer) of the block open before the `line`,
+            or None
+        :returns: The (kind, closer) of the block open after the `line`, or None.
+        """
+        match = protected_line_pattern.match(line)
+
+        if not match:
+            return opened
+
+        if opened:
+            rest = line[match.end():].rstrip('\r\n')
+            return None if cls._is_closer(match, opened[0], opened[1], rest) else opened
+
+        return cls._opener(match)
+
+    @staticmethod
+    def _is_closer(match, kind, closer, rest):
+        """Whether the line of the `match`, ending with `rest`, closes the block
+        opened by a line of the same `kind`, where `closer` is what closes it.
+        """
+        found = match.group(kind)
+
+        if not found:
+            return False
+
+        if kind == 'fence':
+            # A longer fence of the same character closes it too, but only alone on its line
+            return found[0] == closer[0] and len(found) >= len(closer) and not rest.strip()
+
+        if kind == 'environment':
+            return found == closer and match.group('command') == 'end'
+
+        return found == closer
+
+    def _add(self, begin, end):
+        self.begins.append(begin)
+        self.ends.append(end)
+
+    def _add_table(self, begin, table):
+        if table and table[2] > 1:
+            self._add(begin + table[0], begin + table[1])
+
+    def find(self, point):
+        """:returns: The end of the block with the `point`, or None when it is
+            not inside any block.
+        """
+        index = bisect.bisect_right(self.begins, point) - 1
+
+        if index >= 0 and point <= self.ends[index]:
+            return self.ends[index]
+
+        return None
+
+
+def count_lines(view):
+    return view.rowcol(view.size())[0] + 1
+
+
+def edited_rows(view, delta):
+    """:returns: The list of the (first_row, last_row) each caret of the view
+        may have edited, given the count of lines the edit added, or removed
+        when negative.
+
+    The lines added by an edit end on its caret, but with several carets, it
+    is not known how many lines each one added, so each one is given all.
+    """
+    rows = []
+
+    for selection in view.sel():
+        first_row = view.rowcol(selection.begin())[0] - max(delta, 0)
+        rows.append((first_row, view.rowcol(selection.end())[0]))
+
+    return rows
+
+
+def edited_regions(view, delta):
+    """:returns: The regions of the lines of `edited_rows()`."""
+    return [sublime.Region(view.text_point(max(first_row, 0), 0), view.line(view.text_point(last_row, 0)).end())
+            for first_row, last_row in edited_rows(view, delta)]
+
+
+class ParagraphIndex(object):
+    """The rows of the blank lines of a view, which no paragraph crosses, so
+    the paragraphs of a caret are only looked for between the nearest ones.
+
+    It is built on the first lookup, and kept up to date by `edited()`, called
+    with the rows of each edit by `WrapPlusParagraphIndexListener` and by
+    `wrap_lines_plus`.  As any blank line is a paragraph break, a stale index
+    only makes the lookups less precise, but the lines found around a caret
+    are still checked to be blank, rebuilding the index when they are not.
+
+    The code fences and verbatim environments may have blank lines inside, so
+    their `ProtectedBlocks` are found over the whole view, not between these.
+
+    An edit adding or removing lines moves all the rows below it, so instead
+    of moving them on each edit, the rows from `shift_from` on are kept
+    without the `shift` of the lines added above them.  The next edit only
+    moves the rows between both edits, and the lookups add the shift.
+
+    :ivar int shift_from: The index of the first row stored without the shift.
+    :ivar int shift: The lines added above the rows from `shift_from` on.
+    :ivar int line_count: The count of lines of the view when last updated.
+    :ivar ProtectedBlocks protected: The blocks of the view never wrapped.
+    :ivar int protected_change_count: The change count of the view they were
+        found at.
+    """
+
+    def __init__(self):
+        self._rows = None
+        self.shift_from = 0
+        self.shift = 0
+        self.line_count = 0
+        self.protected = None
+        self.protected_change_count = None
+
+    @staticmethod
+    def _is_blank_row(view, row):
+        return not view.substr(view.line(view.text_point(row, 0))).strip()
+
+    @property
+    def rows(self):
+        """The sorted rows of the blank lines, or None to rebuild it."""
+        if self.shift:
+            rows = self._rows
+            rows[self.shift_from:] = [row + self.shift for row in rows[self.shift_from:]]
+            self.shift = 0
+
+        return self._rows
+
+    @rows.setter
+    def rows(self, rows):
+        self._rows = rows
+        self.shift = 0
+
+    @property
+    def built(self):
+        return self._rows is not None
+
+    def _row(self, index):
+        row = self._rows[index]
+        return row + self.shift if index >= self.shift_from else row
+
+    def _bisect(self, row, right=False):
+        """:returns: The index where `row` goes in the rows, before the equal
+            ones, or after them when `right`.
+        """
+        search = bisect.bisect_right if right else bisect.bisect_left
+        rows = self._rows
+        shift_from = min(self.shift_from, len(rows))
+
+        if shift_from < len(rows) and (self._row(shift_from) <= row if right else self._row(shift_from) < row):
+            return search(rows, row - self.shift, shift_from)
+
+        return search(rows, row, 0, shift_from)
+
+    def build(self, view):
+        text = view.substr(sublime.Region(0, view.size()))
+        self.rows = [row for row, line in enumerate(text.split('\n')) if not line.strip()]
+        self.line_count = text.count('\n') + 1
+
+    def edited(self, view, first_row, old_last_row, new_last_row):
+        """Update the index after the rows `first_row` up to `old_last_row` were
+        replaced by the rows `first_row` up to `new_last_row`.
+        """
+        if self._rows is None:
+            return
+
+        rows = self._rows
+        shift = self.shift
+        delta = new_last_row - old_last_row
+        first = self._bisect(first_row)
+        last = self._bisect(old_last_row, right=True)
+        blanks = [row for row in range(first_row, new_last_row + 1) if self._is_blank_row(view, row)]
+
+        # The rows shifted above the edit get their shift
+        if shift and self.shift_from < first:
+            rows[self.shift_from:first] = [row + shift for row in rows[self.shift_from:first]]
+            self.shift_from = first
+
+        if not delta and self.shift_from >= last:
+            rows[first:last] = blanks
+            self.shift_from += len(blanks) - (last - first)
+            return
+
+        # The rows below the edit are all stored without the new shift
+        if shift and last < self.shift_from:
+            rows[last:self.shift_from] = [row - shift for row in rows[last:self.shift_from]]
+
+        rows[first:last] = blanks
+        self.shift_from = first + len(blanks)
+        self.shift = shift + delta
+        self.line_count += delta
+
+    def protected_blocks(self, view):
+        """:returns: The `ProtectedBlocks` of the whole view, scanned again only
+            when the view changed since the last call.
+        """
+        change_count = view.change_count()
+
+        if self.protected is None or self.protected_change_count != change_count:
+            self.protected = ProtectedBlocks(view.substr(sublime.Region(0, view.size())))
+            self.protected_change_count = change_count
+
+        return self.protected
+
+    def block(self, view, point):
+        """:returns: The region of the lines between the blank lines around the
+            point, or the line of the point, when it is blank.
+        """
+        for attempt in range(2):
+
+            if self._rows is None or self.line_count != count_lines(view):
+                self.build(view)
+
+            count = len(self._rows)
+            row = view.rowcol(point)[0]
+            index = self._bisect(row)
+
+            if index < count and self._row(index) == row:
+
+                if self._is_blank_row(view, row):
+                    return view.line(point)
+
+            else:
+                above = self._row(index - 1) if index > 0 else None
+                below = self._row(index) if index < count else None
+
+                if (above is None or self._is_blank_row(view, above)) \
+                        and (below is None or self._is_blank_row(view, below)):
+                    begin = 0 if above is None else view.text_point(above + 1, 0)
+                    end = view.size() if below is None else view.line(view.text_point(below, 0)).begin() - 1
+                    return sublime.Region(begin, max(begin, end))
+
+            log(2, 'stale paragraph index around row %s', row)
+            self.rows = None
+
+        return sublime.Region(0, view.size())
+
+
+# The `ParagraphIndex` of each view by its id, dropped when the view closes
+paragraph_indexes = collections.OrderedDict()
+maximum_paragraph_indexes = 64
+
+
+# The email quote patterns compiled for each comment prefix, as each paragraph
+# scanned looks for the quotes after the comment prefix of its first line
+email_quote_patterns = {}
+
+
+def get_email_quote_pattern(prefix):
+    pattern = email_quote_patterns.get(prefix)
+
+    if pattern is None:
+        pattern = email_quote_patterns[prefix] = re.compile('^' + prefix + email_quote)
+
+    return pattern
+
+
+def get_paragraph_index(view):
+    index = paragraph_indexes.get(view.id())
+
+    if index is None:
+        index = paragraph_indexes[view.id()] = ParagraphIndex()
+
+        # Views closed without `on_close()`, like the ones of the command line tools
+        if len(paragraph_indexes) > maximum_paragraph_indexes:
+            paragraph_indexes.popitem(last=False)
+
+    return index
+
+
+class Paragraph(object):
+    """A paragraph found by `_find_paragraphs`.
+
+    Instead of keeping a copy of its lines, it keeps offsets into the text of
+    the view as it was when the paragraph was found (shared by all paragraphs
+    of the same command run), and the lines are only sliced out when needed.
+
+    :ivar Region region: The region of the paragraph on the view.
+
+    :ivar str comment_prefix: The `required_comment_prefix` of the paragraph,
+        already stripped from its lines.
+
+    :ivar list cursor_positions: The points of the carets on this paragraph.
+    """
+    __slots__ = ('region', 'comment_prefix', 'cursor_positions', '_snapshot', '_offsets')
+
+    def __init__(self, snapshot, region, comment_prefix, cursor_positions):
+        self.region = region
+        self.comment_prefix = comment_prefix
+        self.cursor_positions = cursor_positions
+        self._snapshot = snapshot
+        self._offsets = array('l')
+
+    def __repr__(self):
+        return 'Paragraph(%r, %r, %r, %r)' % (self.region, self.lines, self.comment_prefix, self.cursor_positions)
+
+    def __iter__(self):
+        # Allows unpacking it like the old (region, lines, comment_prefix, cursor_positions) tuples.
+        return iter((self.region, self.lines, self.comment_prefix, self.cursor_positions))
+
+    def __len__(self):
+        return len(self._offsets) // 2
+
+    def add_line(self, begin, end):
+        self._offsets.append(begin)
+        self._offsets.append(end)
+
+    def line(self, index, prefix_length=0):
+        """Get the line `index`, skipping its first `prefix_length` characters."""
+        offsets = self._offsets
+        return self._snapshot[offsets[index * 2] + prefix_length:offsets[index * 2 + 1]]
+
+    def line_startswith(self, index, prefix):
+        offsets = self._offsets
+        return self._snapshot.startswith(prefix, offsets[index * 2], offsets[index * 2 + 1])
+
+    @property
+    def lines(self):
+        """A new list with the text of each line, without the comment prefix."""
+        return [self.line(index) for index in range(len(self))]
+
+    def line_region(self, index):
+        """The region of the line `index` on the view, without the comment prefix."""
+        offsets = self._offsets
+        return sublime.Region(offsets[index * 2], offsets[index * 2 + 1])
+
+    def tail(self, index, begin):
+        """A new paragraph with the lines from `index` on, starting at the point `begin`."""
+        paragraph = Paragraph(self._snapshot, sublime.Region(begin, self.region.end()), self.comment_prefix, [])
+        paragraph._offsets = self._offsets[index * 2:]
+        return paragraph
+
+
 def OR(*args):
     return '(?:' + '|'.join(args) + ')'
 
@@ -256,38 +799,117 @@ def CONCAT(*args):
 
 
 first_group = lambda x: r"(?:^[\t \{\}\n]%s(?:````?.*)?)" % x
-blank_line_pattern = re.compile( r'({}$|{}(?:[%/].*)?$|(?:.*"""\\?$)|.*\$\$.+)'.format( first_group('*'), first_group('+') ) )
-next_word_pattern = re.compile(r'\s+[^ ]+', re.MULTILINE)
-space_prefix_pattern = re.compile(r'^[ \t]*')
-log( 4, "pattern blank_line_pattern", blank_line_pattern.pattern )
+blank_line_pattern = LazyPattern( r'({}$|{}(?:[%/].*)?$|(?:.*"""\\?$)|.*\$\$.+)'.format( first_group('*'), first_group('+') ) )
+next_word_pattern = LazyPattern(r'\s+[^ ]+', re.MULTILINE)
+space_prefix_pattern = LazyPattern(r'^[ \t]*')
+
+# The lines opening and closing the blocks which are never wrapped, see `ProtectedBlocks`
+protected_environments = ('verbatim', 'Verbatim', 'lstlisting', 'minted', 'alltt', 'comment', 'equation',
+                          'align', 'alignat', 'gather', 'multline', 'flalign', 'eqnarray', 'displaymath', 'math',
+                          'tabular', 'tabularx', 'array')
+protected_line_pattern = LazyPattern(r'^[ \t]*(?:(?P<fence>`{3,}|~{3,})'
+                                     r'|\\(?P<command>begin|end)\{(?P<environment>' + '|'.join(protected_environments) +
+                                     r')\*?\}|(?P<math>\$\$|\\\[|\\\])[ \t]*$|(?P<table>\|.*\|)[ \t]*$)', re.MULTILINE)
 
 # This doesn't always work, but seems decent.
 numbered_list = r'[\t ]*(?:(?:([0-9#]+)[.)])+[\t ])'
-numbered_list_pattern = re.compile(numbered_list)
+numbered_list_pattern = LazyPattern(numbered_list)
 lettered_list = r'(?:[a-zA-Z][.)][\t ])'
 bullet_list = r'(?:[*+#-]+[\t ])'
-list_pattern = re.compile(r'^[ \t]*' + OR(numbered_list, lettered_list, bullet_list) + r'[ \t]*')
+list_pattern = LazyPattern(r'^[ \t]*' + OR(numbered_list, lettered_list, bullet_list) + r'[ \t]*')
 latex_hack = r'(?:\\)(?!,|;|&|%|text|emph|cite|\w?(page)?ref|url|footnote|(La)*TeX)'
 rest_directive = r'(?:\.\.)'
 field_start = r'(?:[:@])'  # rest, javadoc, jsdoc, etc.
 
 fields = OR(r'(?<!\\):[^:]+:', '@[a-zA-Z]+ ')
-field_pattern = re.compile(r'^([ \t]*)' + fields)  # rest, javadoc, jsdoc, etc
-spaces_pattern = re.compile(r'^\s*$')
-not_spaces_pattern = re.compile(r'[^ ]+')
+field_pattern = LazyPattern(r'^([ \t]*)' + fields)  # rest, javadoc, jsdoc, etc
+spaces_pattern = LazyPattern(r'^\s*$')
+not_spaces_pattern = LazyPattern(r'[^ ]+')
+# The whitespace the classic wrapping check leaves for the full wrapping
+other_whitespace_pattern = LazyPattern(r'[^\S ]')
 
 sep_chars = '!@#$%^&*=+`~\'\":;.,?_-'
 sep_line = r'[{sep}]+[(?: |\t){sep}]*'.format(sep=sep_chars)
 
 # Break pattern is a little ambiguous. Something like "# Header" could also be a list element.
-break_pattern = re.compile(r'^[\t ]*' + OR(sep_line, OR(latex_hack, rest_directive) + '.*') + '$')
-pure_break_pattern = re.compile(r'^[\t ]*' + sep_line + '$')
+break_pattern = LazyPattern(r'^[\t ]*' + OR(sep_line, OR(latex_hack, rest_directive) + '.*') + '$')
+pure_break_pattern = LazyPattern(r'^[\t ]*' + sep_line + '$')
+
+# The lines changed since the file was last saved, see `WrapPlusModifiedLinesListener`
+modified_lines_key = 'WrapPlus.modified_lines'
+
+# The paragraphs wrapped by a faster algorithm for being over the time budget
+deferred_paragraphs_key = 'WrapPlus.deferred_paragraphs'
+
+# The comments and docstrings, wrapped by `wrap_lines_plus` with `comments_only`
+comments_selector = 'comment, string.quoted.double.block, string.quoted.single.block'
+
+# The comments, docstrings and text syntaxes, where the auto wrap, the wrap on
+# save and the over width highlighting apply
+prose_selector = comments_selector + ', text'
+
+# The paragraphs over the wrap width, as regions added to the view, which follow the edits
+over_width_key = 'WrapPlus.over_width'
+
+# The phantoms previewing the wrapping at the width typed on `wrap_lines_enhancement_ask`
+preview_key = 'WrapPlus.preview'
 
 email_quote = r'[\t ]*>[> \t]*'
-funny_c_comment_pattern = re.compile(r'^[\t ]*\*')
+quote_depth_pattern = LazyPattern(r'[\t ]*>[> \t]*')
+funny_c_comment_pattern = LazyPattern(r'^[\t ]*\*')
+
+
+class WrapScheduler(object):
+    """Pick the best wrapping algorithm for each paragraph whose estimated cost
+    fits what is left of the time budget of the command.
+
+    The cost is estimated as linear on the characters and words of the
+    paragraph, with the seconds for each one fitted on the timings of whole
+    documents wrapped at 80 columns, with paragraphs from 30 to 400 words of
+    3 to 12 characters, so the choices do not depend on the machine load.
+
+    :ivar float remaining: The seconds left of the time budget.
+    """
+    # The algorithms from the best to the fastest, with their seconds per
+    # character and per word
+    ALGORITHMS = ('balance', 'semantic', 'classic')
+    COSTS = {
+        'balance': (2.1e-6, 5.5e-6),
+        'semantic': (2.6e-6, 0.0),
+        'classic': (1.2e-7, 6.0e-7),
+    }
+
+    def __init__(self, budget):
+        self.remaining = budget
+
+    @classmethod
+    def estimate(cls, algorithm, characters, words):
+        per_character, per_word = cls.COSTS[algorithm]
+        return characters * per_character + words * per_word
+
+    def choose(self, algorithm, paragraph_lines):
+        """:returns: The (algorithm, estimated_cost) picked for the lines, falling
+            back to `classic` when no better algorithm fits the time budget.
+        """
+        characters = sum(len(line) for line in paragraph_lines)
+        words = sum(len(line.split()) for line in paragraph_lines)
+
+        for candidate in self.ALGORITHMS[self.ALGORITHMS.index(algorithm):]:
+            estimated_cost = self.estimate(candidate, characters, words)
+
+            if estimated_cost <= self.remaining or candidate == 'classic':
+                self.remaining -= estimated_cost
+                return candidate, estimated_cost
 
 
 class WrapLinesPlusCommand(sublime_plugin.TextCommand):
+    _line_cache = None
+    _snapshot = None
+    _protected = None
+    _unicode_line_break = False
+    _measure = len
+    _hyphenator = None
+    _join_hyphenated = False
 
     def __init__(self, view):
         super( WrapLinesPlusCommand, self ).__init__( view )
@@ -337,7 +959,28 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         log( 2, 'previous line appears to be a normal paragraph: %r', line )
         return False
 
+    def _cached_line_test(self, test, line_region, line, *args):
+        """Memoize the line classification functions while scanning several
+        selections, as overlapping carets would test the same lines again.
+        """
+        if self._line_cache is None:
+            return test(line_region, line, *args)
+
+        view = self._strip_view
+        key = (test.__name__, line_region.begin(), line_region.end(),
+               view.min, view.required_comment_prefix, view.required_comment_pattern, line) + args
+
+        if key not in self._line_cache:
+            self._line_cache[key] = test(line_region, line, *args)
+
+        return self._line_cache[key]
+
     def _is_paragraph_start(self, line_region, line):
+        return self._cached_line_test(self._is_paragraph_start_uncached, line_region, line)
+
+    def _is_paragraph_start_uncached(self, line_region, line):
+        if self._protected_end(line_region) is not None:
+            return False
         # Certain patterns at the beginning of the line indicate this is the
         # beginning of a paragraph.
         if new_paragraph_pattern.match(line):
@@ -355,6 +998,10 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         or anything that should not be wrapped and treated like a blank line
         (i.e. ignored).
         """
+        return self._cached_line_test(self._is_paragraph_break_uncached, line_region, line, pure)
+
+    def _is_paragraph_break_uncached(self, line_region, line, pure=False):
+        if self._protected_end(line_region) is not None: return True
         if self._is_blank_line(line): return True
         scope_name = self.view.scope_name(line_region.begin())
         log(2, 'scope_name=%r %r line=%r', scope_name, line_region, line)
@@ -371,6 +1018,17 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
             log(2, 'normal_break', normal_break)
             return normal_break
 
+    def _protected_end(self, line_region):
+        """:returns: The end of the `ProtectedBlocks` block of the line, if any."""
+        return self._protected.find(line_region.begin()) if self._protected else None
+
+    def _skip_protected(self, line_region):
+        """:returns: Where to look for the next line from, which is the last
+            line of the protected block of `line_region`, if any.
+        """
+        end = self._protected_end(line_region)
+        return line_region if end is None else sublime.Region(end)
+
     def _is_blank_line(self, line):
         is_blank_line = blank_line_pattern.match(line) is not None
         log(2, is_blank_line)
@@ -425,7 +1083,7 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
             current_line = prev_line
         return current_line_region, current_line
 
-    def _find_paragraphs(self, sublime_text_region):
+    def _find_paragraphs(self, sublime_text_region, bounds=None):
         """Find and return a list of paragraphs as regions.
 
         :param Region sublime_text_region: The region where to look for paragraphs.  If it is
@@ -433,21 +1091,31 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
             Otherwise, the region defines the max and min (with potentially
             several paragraphs contained within).
 
-        :returns: A list of (region, lines, comment_prefix) of each paragraph.
+        :param Region bounds: Where to discover the paragraph of an empty
+            region, by default, all the view.
+
+        :returns: A list of `Paragraph` objects.
         """
         result = []
         log(2, 'sublime_text_region=%r', sublime_text_region,)
         if sublime_text_region.empty():
             is_empty = True
-            view_min = 0
-            view_max = self.view.size()
+            view_min = bounds.begin() if bounds else 0
+            view_max = bounds.end() if bounds else self.view.size()
         else:
             is_empty = False
             full_sr = self._my_full_line(sublime_text_region)
             view_min = full_sr.begin()
             view_max = full_sr.end()
         started_in_comment = self._started_in_comment(sublime_text_region.begin())
-        self._strip_view = PrefixStrippingView(self.view, view_min, view_max)
+
+        if self._line_cache is None:
+            self._strip_view = PrefixStrippingView(self.view, view_min, view_max)
+            self._snapshot = self.view.substr(sublime.Region(0, self.view.size()))
+            self._protected = get_paragraph_index(self.view).protected_blocks(self.view)
+        else:
+            self._strip_view.set_range(view_min, view_max)
+
         view = self._strip_view
         # Loop for each paragraph (only loops once if sublime_text_region is empty).
         paragraph_start_pt = sublime_text_region.begin()
@@ -455,7 +1123,7 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         while 1:
             log(2, 'paragraph scanning start %r.', paragraph_start_pt,)
             view.set_comments(self._line_comment, self._is_block_comment, paragraph_start_pt)
-            lines = []
+            paragraph = Paragraph(self._snapshot, None, view.required_comment_prefix, None)
             if is_empty:
                 # Find the beginning of this paragraph.
                 log(2, 'empty sel finding paragraph start.')
@@ -469,7 +1137,7 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
 
             if current_line_region is None:
                 log(2, 'Could not find start.')
-                return []
+                return result
 
             # Skip blank and unambiguous break lines.
             while 1:
@@ -480,11 +1148,19 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
                 if is_empty:
                     log(2, 'empty sel on paragraph break %r', current_line,)
                     return []
-                new_current_line_region, new_current_line = view.next_line(current_line_region)
+                new_current_line_region, new_current_line = view.next_line(self._skip_protected(current_line_region))
                 log( 2, 'current_line_region', new_current_line_region, 'current_line', new_current_line )
                 if new_current_line is None: break
                 current_line_region, current_line = new_current_line_region, new_current_line
 
+            if view.required_comment_pattern and self._is_paragraph_break(current_line_region, current_line, pure=True):
+                # Only blank quote lines up to a line with another email quote prefix
+                next_line_point = self.view.line(self._skip_protected(current_line_region).end()).end() + 1
+                if next_line_point >= view_max:
+                    break
+                paragraph_start_pt = next_line_point
+                continue
+
             paragraph_start_pt = current_line_region.begin()
             paragraph_end_pt = current_line_region.end()
             # current_line_region now points to the beginning of the paragraph.
@@ -512,13 +1188,13 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
                     if regex_match:
                         end_pt -= len(regex_match.group(1))
                     log(2, 'non-comment contents are %r', region_substring)
+                    paragraph.add_line(current_line_region.begin(), sublime_region.end())
                     paragraph_end_pt = end_pt
-                    lines.append(region_substring)
                     # Skip over the comment.
                     current_line_region, current_line = view.next_line(current_line_region)
                     break
 
-                lines.append(current_line)
+                paragraph.add_line(current_line_region.end() - len(current_line), current_line_region.end())
                 paragraph_end_pt = current_line_region.end()
 
                 current_line_region, current_line = view.next_line(current_line_region)
@@ -534,13 +1210,15 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
                     log(2, 'current line is a paragraph start, stopping.')
                     break
 
-            paragraph_region = sublime.Region(paragraph_start_pt, paragraph_end_pt)
+            paragraph.region = sublime.Region(paragraph_start_pt, paragraph_end_pt)
 
             if first_selection_to_save:
-                result.append((paragraph_region, lines, view.required_comment_prefix, first_selection_to_save))
+                paragraph.cursor_positions = [first_selection_to_save]
                 first_selection_to_save = None
             else:
-                result.append((paragraph_region, lines, view.required_comment_prefix, paragraph_start_pt))
+                paragraph.cursor_positions = [paragraph_start_pt]
+
+            result.append(paragraph)
 
             if is_empty:
                 break
@@ -548,16 +1226,24 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
             # Skip over blank lines and break lines till the next paragraph
             # (or end of range).
             log(2, 'skip over blank lines')
+            last_line_point = paragraph_end_pt
             while current_line_region is not None:
                 if self._is_paragraph_start(current_line_region, current_line):
                     break
                 if not self._is_paragraph_break(current_line_region, current_line):
                     break
                 # It's a paragraph break, skip over it.
-                current_line_region, current_line = view.next_line(current_line_region)
+                last_line_point = self._skip_protected(current_line_region).end()
+                current_line_region, current_line = view.next_line(last_line_point)
 
             if current_line_region is None:
-                break
+                # A line with another email quote prefix of the same quote
+                # depth, e.g., `>` and `> `, starts the next paragraph
+                next_line_point = self.view.line(last_line_point).end() + 1
+                if not view.required_comment_pattern or next_line_point >= view_max:
+                    break
+                paragraph_start_pt = next_line_point
+                continue
 
             log(2, 'next_paragraph_start is %r %r', current_line_region, current_line)
             paragraph_start_pt = current_line_region.begin()
@@ -566,6 +1252,182 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
 
         return result
 
+    def _merge_selections(self, selections):
+        """Sort the selections and merge the ones sharing some line.
+
+        :returns: A list of (region, cursor_positions) tuples, where
+            cursor_positions are the beginning of each selection merged in the region.
+        """
+        merged = []
+
+        for selection in sorted(selections, key=lambda region: (region.begin(), region.end())):
+            begin = selection.begin()
+
+            if merged:
+                last_region, last_cursors, last_full_line = merged[-1]
+
+                if selection.empty():
+                    if last_region.empty() and last_region.begin() == begin:
+                        continue
+
+                elif not last_region.empty():
+                    full_line = self._my_full_line(selection)
+
+                    if full_line.begin() < last_full_line.end():
+                        last_cursors.append(begin)
+                        merged[-1] = (sublime.Region(last_region.begin(), max(last_region.end(), selection.end())),
+                                      last_cursors, last_full_line.cover(full_line))
+                        continue
+
+            full_line = None if selection.empty() else self._my_full_line(selection)
+            merged.append((sublime.Region(begin, selection.end()), [begin], full_line))
+
+        return [(region, cursors) for region, cursors, full_line in merged]
+
+    def _find_selections_paragraphs(self, selections):
+        """Find the paragraphs of all selections, discovering each paragraph only once.
+
+        Overlapping selections are merged and carets falling inside a paragraph
+        already found by a previous selection are attached to it, instead of
+        scanning it again.  All scans share the same `PrefixStrippingView` and
+        line classification cache.
+
+        :returns: A list of `Paragraph` objects, sorted and not overlapping each other.
+        """
+        paragraphs = []
+        last_started_in_comment = None
+        merged_selections = self._merge_selections(selections)
+
+        # The paragraphs of the carets are between the blank lines around them
+        index = get_paragraph_index(self.view)
+        bounds = [index.block(self.view, selection.begin()) if selection.empty() else self._my_full_line(selection)
+                  for selection, cursors in merged_selections]
+
+        # The overlapping bounds share a snapshot of their text, so the text
+        # sliced does not grow with the gaps between distant selections
+        windows = []
+        window_indexes = []
+
+        for region in bounds:
+
+            if windows and region.begin() <= windows[-1].end():
+                windows[-1] = windows[-1].cover(region)
+
+            else:
+                windows.append(region)
+
+            window_indexes.append(len(windows) - 1)
+
+        snapshots = [Snapshot(self.view.substr(window), window.begin()) for window in windows]
+        self._protected = index.protected_blocks(self.view)
+        self._strip_view = PrefixStrippingView(self.view, 0, self.view.size())
+        self._line_cache = {}
+
+        try:
+            for (selection, cursors), selection_bounds, window_index in zip(merged_selections, bounds, window_indexes):
+                log(2, 'examine %r', selection)
+                self._snapshot = snapshots[window_index]
+
+                if selection.empty() and paragraphs:
+                    last_region = paragraphs[-1].region
+                    point = selection.begin()
+
+                    if last_region.begin() <= point <= last_region.end() \
+                            and self._started_in_comment(point) == last_started_in_comment:
+                        log(2, 'caret %r is inside the paragraph %r', point, last_region)
+                        paragraphs[-1].cursor_positions.append(point)
+                        continue
+
+                started_in_comment = self._started_in_comment(selection.begin())
+
+                if selection.empty():
+                    found = self._find_paragraphs(selection, selection_bounds)
+
+                else:
+                    # Each quote depth is scanned apart, finding all levels of a reply thread in one pass
+                    found = [paragraph for run in self._quote_runs(selection)
+                             for paragraph in self._find_paragraphs(run, selection_bounds)]
+
+                # Other selections merged in this one go to the paragraph they are on
+                for cursor in cursors[1:]:
+                    owner = found[0] if found else None
+
+                    for paragraph in found:
+                        if paragraph.region.begin() <= cursor:
+                            owner = paragraph
+
+                    if owner:
+                        owner.cursor_positions.append(cursor)
+
+                for paragraph in found:
+
+                    if paragraphs and paragraph.region.begin() < paragraphs[-1].region.end():
+                        log(2, 'paragraph %r already found', paragraph.region)
+                        paragraphs[-1].cursor_positions.extend(paragraph.cursor_positions)
+                        continue
+
+                    paragraphs.append(paragraph)
+                    last_started_in_comment = started_in_comment
+
+        finally:
+            # The paragraphs keep their own reference to the text snapshot
+            self._line_cache = None
+            self._snapshot = None
+            self._protected = None
+
+        return paragraphs
+
+    def _quote_runs(self, region):
+        """Split a region into the runs of lines with the same email quote
+        depth, which is the count of `>` on their quote prefix, so the levels
+        of the quoting tree of a reply thread are found by a single scan.  The
+        blank lines stay on the run before them.
+
+        :returns: A list of regions, with only `region` when it has no quotes.
+        """
+        text = self.view.substr(region)
+
+        if '>' not in text:
+            return [region]
+
+        runs = []
+        run_begin = line_begin = region.begin()
+        depth = None
+
+        for line in text.split('\n'):
+
+            if line.strip():
+                regex_match = quote_depth_pattern.match(line)
+                line_depth = regex_match.group().count('>') if regex_match else 0
+
+                if depth is not None and line_depth != depth:
+                    runs.append(sublime.Region(run_begin, line_begin - 1))
+                    run_begin = line_begin
+
+                depth = line_depth
+
+            line_begin += len(line) + 1
+
+        runs.append(sublime.Region(run_begin, region.end()))
+        return runs
+
+    def _lines_carets(self, regions):
+        """Put a caret on the beginning of each line touched by the regions.
+
+        Passing them to `_find_selections_paragraphs()` finds every paragraph
+        with some of these lines, scanning each paragraph only once.
+        """
+        carets = []
+
+        for region in regions:
+
+            for line in self.view.lines(region):
+
+                if not carets or carets[-1].begin() < line.begin():
+                    carets.append(sublime.Region(line.begin()))
+
+        return carets
+
     def _determine_width(self, width):
         """Determine the maximum line width.
 
@@ -635,10 +1497,21 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
             tab_width = 8
         self._tab_width = tab_width
 
+    def _determine_measure(self):
+        self._unicode_line_break = self.view.settings().get('WrapPlus.unicode_line_break', False)
+
+        if self._unicode_line_break:
+            from . import line_break
+            self._measure = line_break.column_width
+
+        else:
+            self._measure = len
+
     def _determine_comment_style(self):
         # I'm not exactly sure why this function needs a point.  It seems to
         # return the same value regardless of location for the stuff I've
         # tried.
+        comment = _load_comment_module()
         (self._line_comment, self._is_block_comment) = comment.build_comment_data(self.view, 0)
 
     def _started_in_comment(self, point):
@@ -657,7 +1530,17 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
 
     def _width_in_spaces(self, text):
         tab_count = text.count('\t')
-        return tab_count * self._tab_width + len(text) - tab_count
+
+        if tab_count:
+            text = text.replace('\t', '')
+
+        return tab_count * self._tab_width + self._measure(text)
+
+    def _maximum_character_width(self):
+        """:returns: The most columns a character may take, a tab or a wide
+            character with `WrapPlus.unicode_line_break`.
+        """
+        return max(self._tab_width, 2 if self._unicode_line_break else 1)
 
     def _make_indent(self):
         # This is suboptimal.
@@ -667,12 +1550,16 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         # else:
         #     return '\t'
 
-    def _extract_prefix(self, paragraph_region, lines, required_comment_prefix):
+    def _extract_prefix(self, paragraph):
         # The comment prefix has already been stripped from the lines.
         # If the first line starts with a list-like thing, then that will be the initial prefix.
         initial_indent = ''
         subsequent_indent = ''
-        first_line = lines[0]
+        paragraph_region = paragraph.region
+        required_comment_prefix = paragraph.comment_prefix
+        lines_count = len(paragraph)
+        first_line = paragraph.line(0)
+        second_line = paragraph.line(1) if lines_count > 1 else None
         regex_match = list_pattern.match(first_line)
         if regex_match:
             initial_indent = first_line[0:regex_match.end()]
@@ -687,9 +1574,9 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
                 # The spaces in front of the field start.
                 initial_indent = regex_match.group(1)
                 log(2, 'setting initial_indent', initial_indent)
-                if len(lines) > 1:
+                if lines_count > 1:
                     # How to handle subsequent lines.
-                    regex_match = space_prefix_pattern.match(lines[1])
+                    regex_match = space_prefix_pattern.match(second_line)
                     if regex_match:
                         # It's already indented, keep this indent level
                         # (unless it is less than where the field started).
@@ -705,10 +1592,10 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
                 regex_match = space_prefix_pattern.match(first_line)
                 if regex_match:
                     initial_indent = first_line[0:regex_match.end()]
-                    if len(lines) > 1:
-                        regex_match = space_prefix_pattern.match(lines[1])
+                    if lines_count > 1:
+                        regex_match = space_prefix_pattern.match(second_line)
                         if regex_match:
-                            subsequent_indent = lines[1][0:regex_match.end()]
+                            subsequent_indent = second_line[0:regex_match.end()]
                         else:
                             subsequent_indent = ''
                     else:
@@ -721,7 +1608,7 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         point = paragraph_region.begin()
         scope_region = self.view.extract_scope(point)
         scope_name = self.view.scope_name(point)
-        if len(lines) == 1 and is_quoted_string(scope_region, scope_name):
+        if lines_count == 1 and is_quoted_string(scope_region, scope_name):
             # A multi-line quoted string, that is currently only on one line.
             # This is mainly for Python docstrings.  Not sure if it's a
             # problem in other cases.
@@ -733,13 +1620,14 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
                 if regex_match:
                     subsequent_indent = regex_match.group() + subsequent_indent
 
-        # Remove the prefixes that are there.
+        # Remove the prefixes that are there, slicing each line only once.
         new_lines = []
         new_lines.append(first_line[len(initial_indent):].strip())
-        for line in lines[1:]:
-            if line.startswith(subsequent_indent):
-                line = line[len(subsequent_indent):]
-            new_lines.append(line.strip())
+        for index in range(1, lines_count):
+            if paragraph.line_startswith(index, subsequent_indent):
+                new_lines.append(paragraph.line(index, len(subsequent_indent)).strip())
+            else:
+                new_lines.append(paragraph.line(index).strip())
 
         log(2, 'initial_indent=%r subsequent_indent=%r', initial_indent, subsequent_indent)
 
@@ -760,22 +1648,342 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
 
         return is_semantic_line_wrap
 
-    def run(self, edit, width=0, line_wrap_type=None):
+    def run(self, edit, width=0, line_wrap_type=None, modified_only=False, deferred_only=False, auto_wrap=False,
+            on_save=False, check_only=False, comments_only=False):
         debug_enabled = self.view.settings().get('WrapPlus.debug', False)
         debug_start(debug_enabled)
         log(2, '\n\n#########################################################################')
 
-        self._width = self._determine_width(width)
-        self.view_settings = self.view.settings()
+        # The deferred paragraphs are the ones over the time budget of the last run
+        line_wrapper_type = self._prepare_wrap(width, line_wrap_type, 0 if deferred_only else None)
 
-        log(4,'wrap width = %r', self._width)
-        self._determine_tab_size()
-        self._determine_comment_style()
+        if deferred_only:
+            self._wrap_regions_paragraphs(edit, deferred_paragraphs_key, line_wrapper_type)
+            self.view.erase_regions(deferred_paragraphs_key)
+            return
+
+        if modified_only:
+            self._wrap_regions_paragraphs(edit, modified_lines_key, line_wrapper_type)
+            self._report_over_budget(width, line_wrap_type)
+            return
+
+        if on_save:
+            # A deferred wrapping would modify the view after it is saved
+            self._defer_over_budget = False
+            self._wrap_regions_paragraphs(edit, modified_lines_key, line_wrapper_type, prose_selector)
+            return
+
+        if auto_wrap:
+            self._auto_wrap_paragraph(edit, line_wrapper_type)
+            return
+
+        if check_only:
+            self._report_check(line_wrapper_type)
+            return
+
+        if comments_only:
+            self._wrap_comments(edit, line_wrapper_type)
+            self._report_over_budget(width, line_wrap_type)
+            return
+
+        after_wrap = self.view_settings.get('WrapPlus.after_wrap', "cursor_below")
+
+        # paragraphs is a list of `Paragraph` objects.
+        paragraphs = []
+        has_trailing_whitespace = False
+        selections = self.view.sel()
+
+        if selections:
+            possible_last_region = self.view.word(selections[0])
+            possible_last_space = self.view.substr(possible_last_region)
+            has_trailing_whitespace = possible_last_space \
+                    and not not spaces_pattern.match(possible_last_space) \
+                    and possible_last_space[-1] == '\n'
+            log(2, 'possible_last_space %r' % possible_last_space, 'has_trailing_whitespace', has_trailing_whitespace)
+
+            paragraphs = self._find_selections_paragraphs(selections)
+
+        log( 2, 'paragraphs is %r', paragraphs )
+        log( 4, "self._width %s", self._width )
+
+        if paragraphs:
+            new_positions = self.insert_wrapped_text(edit, paragraphs, line_wrapper_type)
+
+            if after_wrap == "cursor_below":
+                self.move_cursor_below_the_last_paragraph()
+
+            if new_positions:
+                if after_wrap == "cursor_stay":
+                    self.move_the_cursor_to_the_original_position( new_positions )
+
+                if has_trailing_whitespace:
+                    last_position = new_positions[-1]
+                    self.view.insert( edit, last_position, " " )
+        else:
+            if after_wrap == "cursor_below":
+                self.move_cursor_below_the_last_paragraph()
+
+        self._report_over_budget(width, line_wrap_type)
+
+    def _report_over_budget(self, width, line_wrap_type):
+        """Tell how many paragraphs were over the time budget, and with
+        `WrapPlus.over_budget` set to `defer`, wrap them again with the
+        configured algorithm right after this command returns.
+        """
+        over_budget = sum(1 for algorithm, estimated_cost in self.paragraph_algorithms if algorithm != self._algorithm)
+
+        if not over_budget:
+            return
+
+        log(2, '%s paragraphs over the time budget, algorithms %s', over_budget, self.paragraph_algorithms)
+
+        if self._defer_over_budget:
+            view = self.view
+            sublime.status_message("Wrap Plus: rewrapping %s paragraphs over the time budget" % over_budget)
+            sublime.set_timeout(lambda: view.run_command('wrap_lines_plus',
+                    {'width': width, 'line_wrap_type': line_wrap_type, 'deferred_only': True}), 0)
+
+        else:
+            sublime.status_message("Wrap Plus: %s paragraphs over the time budget wrapped with a faster algorithm" % over_budget)
+
+    def _wrap_regions_paragraphs(self, edit, regions_key, line_wrapper_type, selector=None):
+        """Wrap only the paragraphs with some line on the regions added to the
+        view with `regions_key`, keeping the selections where they are.
+
+        :param selector: when given, only the paragraphs with their first
+            word matching it are wrapped
+        """
+        regions = self.view.get_regions(regions_key)
+        regions.sort(key=lambda region: region.begin())
+        paragraphs = self._find_regions_paragraphs(regions, selector)
+
+        log(2, '%s paragraphs is %r', regions_key, paragraphs)
+        self._wrap_paragraphs_in_place(edit, paragraphs, line_wrapper_type)
+
+    def _wrap_comments(self, edit, line_wrapper_type):
+        """Wrap all comments and docstrings of the view, found by a single
+        selector query, keeping the selections where they are.
+        """
+        paragraphs = self._find_comments_paragraphs(self.view.find_by_selector(comments_selector))
+
+        log(2, 'comments paragraphs is %r', paragraphs)
+        self._wrap_paragraphs_in_place(edit, paragraphs, line_wrapper_type)
+
+    def _wrap_paragraphs_in_place(self, edit, paragraphs, line_wrapper_type):
+        if paragraphs:
+            # The regions added to the view are shifted by the replacements
+            self.view.add_regions('WrapPlus.selections', list(self.view.sel()), '', '', sublime.HIDDEN)
+            self.insert_wrapped_text(edit, paragraphs, line_wrapper_type)
+
+            self.view.sel().clear()
+            self.view.sel().add_all(self.view.get_regions('WrapPlus.selections'))
+            self.view.erase_regions('WrapPlus.selections')
+
+        debug_end()
+
+    def _find_regions_paragraphs(self, regions, selector=None):
+        """Find the paragraphs with some line on the sorted regions.
+
+        :param selector: when given, only the paragraphs with their first
+            word matching it are kept
+        """
+        paragraphs = self._find_selections_paragraphs(self._lines_carets(regions))
+
+        if selector:
+            paragraphs = [paragraph for paragraph in paragraphs
+                          if self.view.score_selector(self._first_word_point(paragraph), selector) > 0]
+
+        return paragraphs
+
+    def _find_comments_paragraphs(self, regions):
+        """Find the paragraphs of the sorted comments and docstrings regions.
+
+        The comments on consecutive lines are merged into a single selection,
+        so each run of them is scanned at once, instead of line by line.
+        """
+        selections = []
+        view_substr = self.view.substr
+
+        for region in regions:
+            begin, end = region.begin(), region.end()
+
+            # The line comments scopes may end after their new line
+            if end > begin and view_substr(sublime.Region(end - 1, end)) == '\n':
+                end -= 1
+
+            if selections:
+                gap = view_substr(sublime.Region(selections[-1].end(), begin))
+
+                if not gap.strip() and gap.count('\n') < 2:
+                    selections[-1] = sublime.Region(selections[-1].begin(), end)
+                    continue
+
+            selections.append(sublime.Region(begin, end))
+
+        paragraphs = self._find_selections_paragraphs(selections)
+        return [paragraph for paragraph in paragraphs
+                if self.view.score_selector(self._first_word_point(paragraph), comments_selector) > 0]
+
+    def _classic_check(self, initial_indent, subsequent_indent, lines):
+        """Check the lines of a paragraph against the invariants of the greedy
+        classic wrapping: each line fits the width, or is a single long word,
+        and the first word of each line does not fit on the line before it.
+
+        When they hold, the wrapping gives back the same lines, with the
+        prefixes put in front of them.
+
+        :returns: A (decided, index, message) tuple, where `decided` is False
+            when the lines have something the check does not handle, and
+            `index` is the first line breaking the invariants, if any.
+        """
+        if self._algorithm != 'classic' or not lines or not all(lines) \
+                or self.view_settings.get('WrapPlus.break_long_words', False) \
+                or self.view_settings.get('WrapPlus.break_on_hyphens', False) \
+                or self._unicode_line_break \
+                or self._hyphenator is not None \
+                or '\t' in initial_indent or '\t' in subsequent_indent \
+                or other_whitespace_pattern.search(' '.join(lines)):
+            return False, None, None
+
+        last_index = len(lines) - 1
+
+        for index, line in enumerate(lines):
+            indent = initial_indent if index == 0 else subsequent_indent
+            width = self._width - len(indent)
+
+            if len(line) > width and ' ' in line:
+                return True, index, "line is %d columns, over the width of %d" % (len(indent) + len(line), self._width)
+
+            if index < last_index and len(line) + 1 + len(lines[index + 1].split(' ', 1)[0]) <= width:
+                return True, index, "the first word of the next line fits on this line"
+
+        return True, None, None
+
+    def _check_paragraph(self, paragraph, line_wrapper_type):
+        """Decide if wrapping a paragraph would change its text, only wrapping
+        it when `_classic_check()` cannot decide.
+
+        :returns: None when the paragraph would not change, or a (point,
+            message) tuple, with the beginning of its first line changing.
+        """
+        initial_indent, subsequent_indent, lines = self._extract_prefix(paragraph)
+        original_text = self.view.substr(paragraph.region)
+        decided, index, message = self._classic_check(initial_indent, subsequent_indent, lines)
+
+        if decided:
+
+            if index is not None:
+                return paragraph.line_region(index).begin(), message
+
+            wrapped_text = initial_indent + ('\n' + subsequent_indent).join(lines)
+            message = "the indentation or spacing would change"
+
+        else:
+            self.check_fallbacks += 1
+            wrapped_text = self._wrap_paragraph(paragraph, line_wrapper_type)
+            message = "the paragraph would be wrapped differently"
+
+        if wrapped_text == original_text:
+            return None
+
+        index = 0
+
+        for original_line, wrapped_line in zip(original_text.split('\n'), wrapped_text.split('\n')):
+
+            if original_line != wrapped_line:
+                break
+
+            index += len(original_line) + 1
+
+        return paragraph.region.begin() + index, message
+
+    def _check_paragraphs(self, paragraphs, line_wrapper_type):
+        """:returns: A list of (point, message) tuples, one for each paragraph
+            the wrapping would change.
+        """
+        self.check_fallbacks = 0
+        diagnostics = []
+
+        for paragraph in paragraphs:
+            diagnostic = self._check_paragraph(paragraph, line_wrapper_type)
+
+            if diagnostic:
+                diagnostics.append(diagnostic)
+
+        return diagnostics
+
+    def _report_check(self, line_wrapper_type):
+        """List the prose paragraphs of the view the wrapping would change, as
+        `file:line: message` diagnostics on the `wrap_plus` output panel.
+        """
+        paragraphs = self._find_regions_paragraphs([sublime.Region(0, self.view.size())], prose_selector)
+        name = self.view.file_name() or self.view.name() or 'untitled'
+
+        self.diagnostics = ["%s:%d: %s" % (name, self.view.rowcol(point)[0] + 1, message)
+                            for point, message in self._check_paragraphs(paragraphs, line_wrapper_type)]
+        log(2, 'check diagnostics %s, full wrap fallbacks %s', self.diagnostics, self.check_fallbacks)
+
+        window = self.view.window()
+
+        if window:
+            panel = window.create_output_panel('wrap_plus')
+            panel.settings().set('result_file_regex', r'^(.+):(\d+): ')
+            panel.run_command('append', {'characters': '\n'.join(self.diagnostics) + '\n'})
+            window.run_command('show_panel', {'panel': 'output.wrap_plus'})
+
+        sublime.status_message("Wrap Plus: %s paragraphs would be wrapped" % len(self.diagnostics)
+                               if self.diagnostics else "Wrap Plus: no paragraph would be wrapped")
+        debug_end()
+
+    def _first_word_point(self, paragraph):
+        line = paragraph.line(0)
+        return paragraph.line_region(0).begin() + len(line) - len(line.lstrip())
+
+    def _auto_wrap_paragraph(self, edit, line_wrapper_type):
+        """Reflow the paragraph of the caret from its line to the end, leaving
+        the lines before it as they are, and keeping the caret on its word.
+        """
+        selections = self.view.sel()
+
+        if len(selections) != 1 or not selections[0].empty():
+            debug_end()
+            return
+
+        caret = selections[0].b
+        caret_line = self.view.line(caret)
+        paragraphs = self._find_selections_paragraphs([sublime.Region(caret)])
+        log(2, 'auto wrap paragraphs is %r', paragraphs)
+
+        if paragraphs:
+            paragraph = paragraphs[0]
+            index = 0
+
+            while index < len(paragraph) - 1 and paragraph.line_region(index).end() < caret_line.begin():
+                index += 1
+
+            tail = paragraph.tail(index, self.view.line(paragraph.line_region(index).begin()).begin())
+            tail.cursor_positions = [caret]
+
+            # The space typed after the last word would be stripped by the wrapping
+            has_trailing_whitespace = caret == caret_line.end() and self.view.substr(caret - 1) in ' \t'
+            new_positions = self.insert_wrapped_text(edit, [tail], line_wrapper_type)
+            self.move_the_cursor_to_the_original_position(new_positions)
+
+            if has_trailing_whitespace and new_positions:
+                position = new_positions[-1]
+
+                if self.view.substr(position) not in ' \t':
+                    self.view.insert(edit, position, " ")
+
+                self.move_the_cursor_to_the_original_position([position + 1])
+
+        debug_end()
 
-        wrap_extension_percent                 = self.view_settings.get('WrapPlus.semantic_wrap_extension_percent', 1.0)
-        minimum_line_size_percent              = self.view_settings.get('WrapPlus.semantic_minimum_line_size_percent', 0.2)
-        balance_characters_between_line_wraps  = self.view_settings.get('WrapPlus.semantic_balance_characters_between_line_wraps', False)
-        disable_line_wrapping_by_maximum_width = self.view_settings.get('WrapPlus.semantic_disable_line_wrapping_by_maximum_width', False)
+    def _load_patterns(self):
+        """Set the separators and the paragraph patterns of the view settings,
+        which are globals shared by all the views.
+        """
+        view_settings = self.view.settings()
 
         global whitespace_character
         global alpha_separator_characters
@@ -783,161 +1991,254 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         global word_separator_characters
         global phrase_separator_characters
 
-        whitespace_character = self.view_settings.get( 'WrapPlus.whitespace_character', [" ", "\t"] )
-        alpha_separator_characters = self.view_settings.get( 'WrapPlus.alpha_separator_characters', ['e', 'and'] )
-        list_separator_characters = self.view_settings.get( 'WrapPlus.list_separator_characters', [ ",", ";"] )
-        word_separator_characters = self.view_settings.get( 'WrapPlus.word_separator_characters', [ ".", "?", "!", ":" ] )
+        whitespace_character = view_settings.get( 'WrapPlus.whitespace_character', [" ", "\t"] )
+        alpha_separator_characters = view_settings.get( 'WrapPlus.alpha_separator_characters', ['e', 'and'] )
+        list_separator_characters = view_settings.get( 'WrapPlus.list_separator_characters', [ ",", ";"] )
+        word_separator_characters = view_settings.get( 'WrapPlus.word_separator_characters', [ ".", "?", "!", ":" ] )
         word_separator_characters += list_separator_characters
         phrase_separator_characters = set( word_separator_characters ) - set( list_separator_characters )
 
         global start_line_block
         global new_paragraph_pattern
 
-        start_line_block = self.view_settings.get( 'WrapPlus.start_line_block', r'(?:\{|\})' )
+        start_line_block = view_settings.get( 'WrapPlus.start_line_block', r'(?:\{|\})' )
         new_paragraph_pattern = re.compile( r'^[\t ]*' + OR( lettered_list, bullet_list, field_start, start_line_block ) )
         log( 4, "pattern new_paragraph", new_paragraph_pattern.pattern )
 
-        after_wrap = self.view_settings.get('WrapPlus.after_wrap', "cursor_below")
+    def _prepare_wrap(self, width=0, line_wrap_type=None, time_budget=None):
+        """Load the settings of the view and the wrapping patterns.
+
+        :param time_budget: the milliseconds the wrapping of all the paragraphs
+            should take, 0 for no limit, or None to use `WrapPlus.time_budget_ms`
+
+        :returns: The function called as `line_wrapper_type(paragraph_lines,
+            initial_indent, subsequent_indent, wrapper)` to wrap each paragraph,
+            which records the algorithm used for it on `paragraph_algorithms`.
+        """
+        self._width = self._determine_width(width)
+        self.view_settings = self.view.settings()
+
+        log(4,'wrap width = %r', self._width)
+        self._determine_measure()
+        self._hyphenator = self._load_hyphenator()
+        self._join_hyphenated = self.view_settings.get('WrapPlus.hyphenation_join_lines', False)
+        self._determine_tab_size()
+        self._determine_comment_style()
+
+        wrap_extension_percent                 = self.view_settings.get('WrapPlus.semantic_wrap_extension_percent', 1.0)
+        minimum_line_size_percent              = self.view_settings.get('WrapPlus.semantic_minimum_line_size_percent', 0.2)
+        balance_characters_between_line_wraps  = self.view_settings.get('WrapPlus.semantic_balance_characters_between_line_wraps', False)
+        disable_line_wrapping_by_maximum_width = self.view_settings.get('WrapPlus.semantic_disable_line_wrapping_by_maximum_width', False)
+
+        self._load_patterns()
+
         self.maximum_words_in_comma_separated_list = self.view_settings.get('WrapPlus.semantic_maximum_words_in_comma_separated_list', 3) + 1
         self.maximum_items_in_comma_separated_list = self.view_settings.get('WrapPlus.semantic_maximum_items_in_comma_separated_list', 3) + 1
 
-        if balance_characters_between_line_wraps:
-            # minimum_line_size_percent = 0.0
-            disable_line_wrapping_by_maximum_width = True
-
         log( 4, "minimum_line_size_percent %s", minimum_line_size_percent )
-        if self.get_semantic_line_wrap_setting(line_wrap_type ):
-            self._width *= wrap_extension_percent
+        classic_width = self._width
+
+        def classic_wrapper(paragraph_lines, initial_indent, subsequent_indent, wrapper):
+            # The wrapper width is the one widened for the semantic wrapping, when falling back from it
+            wrapper.width = classic_width
+            return self.classic_wrap_text(wrapper, paragraph_lines, initial_indent, subsequent_indent)
+
+        def semantic_wrapper(balance_characters, disable_line_wrapping_by_maximum_width):
 
             def line_wrapper_type(paragraph_lines, initial_indent, subsequent_indent, wrapper):
                 text = self.semantic_line_wrap( paragraph_lines, initial_indent, subsequent_indent,
                         minimum_line_size_percent, disable_line_wrapping_by_maximum_width,
-                        balance_characters_between_line_wraps )
+                        balance_characters )
 
-                if balance_characters_between_line_wraps:
+                if balance_characters:
                     text = self.balance_characters_between_line_wraps( wrapper, text, initial_indent, subsequent_indent )
 
                 log( 4, 'run, text %r', "".join( text ) )
                 return "".join( text )
 
-        else:
-            def line_wrapper_type(paragraph_lines, initial_indent, subsequent_indent, wrapper):
-                return self.classic_wrap_text(wrapper, paragraph_lines, initial_indent, subsequent_indent)
+            return line_wrapper_type
 
-        # paragraphs is a list of (region, lines, comment_prefix) tuples.
-        paragraphs = []
-        has_trailing_whitespace = False
-        selections = self.view.sel()
+        line_wrappers = {'classic': classic_wrapper}
+        algorithm = 'classic'
 
-        if selections:
-            possible_last_region = self.view.word(selections[0])
-            possible_last_space = self.view.substr(possible_last_region)
-            has_trailing_whitespace = possible_last_space \
-                    and not not spaces_pattern.match(possible_last_space) \
-                    and possible_last_space[-1] == '\n'
-            log(2, 'possible_last_space %r' % possible_last_space, 'has_trailing_whitespace', has_trailing_whitespace)
+        if self.get_semantic_line_wrap_setting(line_wrap_type ):
+            self._width *= wrap_extension_percent
+            line_wrappers['semantic'] = semantic_wrapper( False, disable_line_wrapping_by_maximum_width )
+            algorithm = 'semantic'
 
-            for selection in selections:
-                log(2, 'examine %r', selection)
-                paragraphs.extend(self._find_paragraphs(selection))
+            if balance_characters_between_line_wraps:
+                # minimum_line_size_percent = 0.0
+                line_wrappers['balance'] = semantic_wrapper( True, True )
+                algorithm = 'balance'
 
-        log( 2, 'paragraphs is %r', paragraphs )
-        log( 4, "self._width %s", self._width )
+        if time_budget is None:
+            time_budget = self.view_settings.get('WrapPlus.time_budget_ms', 0)
 
-        if paragraphs:
-            new_positions = self.insert_wrapped_text(edit, paragraphs, line_wrapper_type)
+        scheduler = WrapScheduler( time_budget / 1000.0 ) if time_budget and algorithm != 'classic' else None
+        self._algorithm = algorithm
+        self._defer_over_budget = self.view_settings.get('WrapPlus.over_budget', 'classic') == 'defer'
+        self.paragraph_algorithms = []
 
-            if after_wrap == "cursor_below":
-                self.move_cursor_below_the_last_paragraph()
+        def line_wrapper_type(paragraph_lines, initial_indent, subsequent_indent, wrapper):
 
-            if new_positions:
-                if after_wrap == "cursor_stay":
-                    self.move_the_cursor_to_the_original_position( new_positions )
+            if scheduler:
+                chosen, estimated_cost = scheduler.choose( algorithm, paragraph_lines )
 
-                if has_trailing_whitespace:
-                    last_position = new_positions[-1]
-                    self.view.insert( edit, last_position, " " )
-        else:
-            if after_wrap == "cursor_below":
-                self.move_cursor_below_the_last_paragraph()
+            else:
+                chosen, estimated_cost = algorithm, None
+
+            log( 2, 'algorithm %s, estimated cost %s', chosen, estimated_cost )
+            self.paragraph_algorithms.append( (chosen, estimated_cost) )
+            return line_wrappers[chosen]( paragraph_lines, initial_indent, subsequent_indent, wrapper )
+
+        return line_wrapper_type
+
+    def _load_hyphenator(self):
+        """:returns: The `hyphenation.Hyphenator` of the patterns file set on
+            `WrapPlus.hyphenation_patterns`, or None when it is not set.
+        """
+        path = self.view_settings.get('WrapPlus.hyphenation_patterns')
+
+        if not path:
+            return None
+
+        from . import hyphenation
+        path = os.path.expanduser(path)
+
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+
+        try:
+            return hyphenation.load(path)
+
+        except OSError as error:
+            log(1, "Could not read the hyphenation patterns %r: %s", path, error)
+            sublime.status_message("Wrap Plus: could not read the hyphenation patterns %s" % path)
+            return None
+
+    def _make_text_wrapper(self, cache_chunks=False):
+        from . import py_textwrap as textwrap
+
+        wrapper = textwrap.TextWrapper(
+                break_long_words=self.view_settings.get('WrapPlus.break_long_words', False),
+                break_on_hyphens=self.view_settings.get('WrapPlus.break_on_hyphens', False),
+                break_on_unicode=self._unicode_line_break,
+                hyphenator=self._hyphenator,
+                join_hyphenated=self._join_hyphenated,
+                cache_chunks=cache_chunks)
+        wrapper.width = self._width
+        wrapper.expand_tabs = False
+        return wrapper
+
+    def _wrap_paragraph(self, paragraph, line_wrapper_type):
+        """Get the wrapped text of a `Paragraph`, ready to replace its region."""
+        initial_indent, subsequent_indent, paragraph_lines = self._extract_prefix(paragraph)
+        return line_wrapper_type(paragraph_lines, initial_indent, subsequent_indent, self._make_text_wrapper())
 
     def insert_wrapped_text(self, edit, paragraphs, line_wrapper_type):
         new_positions = []
-        break_long_words = self.view_settings.get('WrapPlus.break_long_words', False)
-        break_on_hyphens = self.view_settings.get('WrapPlus.break_on_hyphens', False)
+        wrapped_regions = []
 
         # Use view selections to handle shifts from the replace() command.
         self.view.sel().clear()
-        for index, others in enumerate(paragraphs):
-            region, lines, comment_prefix, cursor_position = others
-            self.view.sel().add(region)
+        for paragraph in paragraphs:
+            self.view.sel().add(paragraph.region)
+
+        # Wrap all the paragraphs before the first replacement, so the scopes
+        # they look up are still on their original coordinates.
+        wrapped_texts = []
+        for paragraph in paragraphs:
+            wrapped_text = self._wrap_paragraph(paragraph, line_wrapper_type)
+            is_over_budget = self._defer_over_budget and self.paragraph_algorithms[-1][0] != self._algorithm
+            wrapped_texts.append((wrapped_text, is_over_budget))
 
         # Regions fetched from view.sel() will shift appropriately with
         # the calls to replace().
         for index, selection in enumerate(self.view.sel()):
-            paragraph_region, paragraph_lines, required_comment_prefix, cursor_position = paragraphs[index]
+            paragraph = paragraphs[index]
+            paragraph_region = paragraph.region
+            wrapped_text, is_over_budget = wrapped_texts[index]
 
-            wrapper = textwrap.TextWrapper(break_long_words=break_long_words, break_on_hyphens=break_on_hyphens)
-            wrapper.width = self._width
-            wrapper.expand_tabs = False
+            # The cursors are still on the original coordinates, while the
+            # selection was already shifted by the previous replacements.
+            delta = selection.begin() - paragraph_region.begin()
+            cursor_positions = [cursor_position + delta for cursor_position in paragraph.cursor_positions]
 
-            initial_indent, subsequent_indent, paragraph_lines = self._extract_prefix(
-                paragraph_region, paragraph_lines, required_comment_prefix)
-
-            wrapped_text = line_wrapper_type(paragraph_lines, initial_indent, subsequent_indent, wrapper)
             original_text = self.view.substr(selection)
+
+            if is_over_budget:
+                # The regions added to the view are shifted by the next replacements
+                deferred_regions = self.view.get_regions(deferred_paragraphs_key)
+                deferred_regions.append(sublime.Region(selection.begin(), selection.begin() + len(wrapped_text)))
+                self.view.add_regions(deferred_paragraphs_key, deferred_regions, '', '', sublime.HIDDEN)
             log(2, 'wrapped_text len', len(wrapped_text))
             log(2, 'original_text len', len(original_text))
 
             if original_text != wrapped_text:
+                cursors = []
 
-                while True:
-                    word_region = self.view.word(cursor_position)
-                    actual_word = self.view.substr(word_region).strip(' ')
-                    log(2, 'cursor_position', cursor_position)
-                    log(2, 'actual_word %r' % actual_word)
+                for cursor_position in cursor_positions:
 
-                    if cursor_position < 1 or not spaces_pattern.match(actual_word):
-                        break
-                    cursor_position -= 1
+                    while True:
+                        word_region = self.view.word(cursor_position)
+                        actual_word = self.view.substr(word_region).strip(' ')
+                        log(2, 'cursor_position', cursor_position)
+                        log(2, 'actual_word %r' % actual_word)
+
+                        if cursor_position < 1 or not spaces_pattern.match(actual_word):
+                            break
+                        cursor_position -= 1
 
-                cut_original_text = self.view.substr( sublime.Region( selection.begin(), word_region.end() ) )
-                distance_word_end = cursor_position - word_region.begin()
-                log(2, 'distance_word_end', distance_word_end)
+                    cut_original_text = self.view.substr( sublime.Region( selection.begin(), word_region.end() ) )
+                    distance_word_end = cursor_position - word_region.begin()
+                    log(2, 'distance_word_end', distance_word_end)
+                    cursors.append( (cursor_position, word_region, actual_word, cut_original_text, distance_word_end) )
 
                 wrapped_text_difference = abs( len(original_text.rstrip(' ')) - len(wrapped_text) ) + 1
                 log(2, 'wrapped_text_difference', wrapped_text_difference)
 
+                selection_begin = selection.begin()
+                first_row = self.view.rowcol(selection_begin)[0]
+                old_last_row = self.view.rowcol(selection.end())[0]
                 self.view.replace(edit, selection, wrapped_text)
-                replaced_region = sublime.Region( selection.begin(), word_region.end() + wrapped_text_difference )
-                cut_replaced_text = self.view.substr( replaced_region )
-                last_position = cut_replaced_text.rfind( actual_word )
-                log(2, 'last_position', last_position)
+                get_paragraph_index(self.view).edited(self.view, first_row, old_last_row,
+                        first_row + wrapped_text.count('\n'))
+                wrapped_regions.append(sublime.Region(selection_begin, selection_begin + len(wrapped_text)))
 
-                if last_position > -1:
-                    actual_position = selection.begin() + last_position + distance_word_end
-                    log(2, 'new actual_position', actual_position)
-                    new_positions.append( actual_position )
+                for cursor_position, word_region, actual_word, cut_original_text, distance_word_end in cursors:
+                    replaced_region = sublime.Region( selection_begin, word_region.end() + wrapped_text_difference )
+                    cut_replaced_text = self.view.substr( replaced_region )
+                    last_position = cut_replaced_text.rfind( actual_word )
+                    log(2, 'last_position', last_position)
+
+                    if last_position > -1:
+                        actual_position = selection_begin + last_position + distance_word_end
+                        log(2, 'new actual_position', actual_position)
+                        new_positions.append( actual_position )
+
+                    else:
+                        # fallback to the original heuristic if the word is not found
+                        spaces_count_original = len( [char for char in cut_original_text if spaces_pattern.match(char)] )
+                        spaces_count_wrapped = len( [char for char in cut_replaced_text if spaces_pattern.match(char)] )
+                        log(2, 'spaces_count_original', spaces_count_original)
+                        log(2, 'spaces_count_wrapped', spaces_count_wrapped)
+
+                        added_spaces_count = cursor_position + spaces_count_wrapped - spaces_count_original
+                        log(2, 'new actual_position', added_spaces_count)
+                        new_positions.append(added_spaces_count)
+
+                    log(2, 'cut_original_text %r' % cut_original_text)
+                    log(2, 'cut_replaced_text %r' % cut_replaced_text)
 
-                else:
-                    # fallback to the original heuristic if the word is not found
-                    spaces_count_original = len( [char for char in cut_original_text if spaces_pattern.match(char)] )
-                    spaces_count_wrapped = len( [char for char in cut_replaced_text if spaces_pattern.match(char)] )
-                    log(2, 'spaces_count_original', spaces_count_original)
-                    log(2, 'spaces_count_wrapped', spaces_count_wrapped)
-
-                    added_spaces_count = cursor_position + spaces_count_wrapped - spaces_count_original
-                    log(2, 'new actual_position', added_spaces_count)
-                    new_positions.append(added_spaces_count)
-
-                log(2, 'cut_original_text %r' % cut_original_text)
-                log(2, 'cut_replaced_text %r' % cut_replaced_text)
                 log(2, 'replaced text not the same!')
 
             else:
-                new_positions.append(cursor_position)
+                new_positions.extend(cursor_positions)
                 log(2, 'replaced text is the same')
 
+        if wrapped_regions and self.view.id() in over_width_views:
+            update_over_width(self.view, wrapped_regions)
+
         return new_positions
 
     def move_the_cursor_to_the_original_position(self, new_positions):
@@ -990,8 +2291,8 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
                     next_index = _index + 1
 
                     if next_index < lines_count \
-                            and len( new_line ) - subsequent_indent_length \
-                            < math.ceil( ( len( new_lines_reversed[next_index] ) - subsequent_indent_length ) / 2 ):
+                            and self._measure( new_line ) - subsequent_indent_length \
+                            < math.ceil( ( self._measure( new_lines_reversed[next_index] ) - subsequent_indent_length ) / 2 ):
 
                         increment_percent = INCREMENT_VALUE
                         first_lines_count = lines_count
@@ -1046,7 +2347,7 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         return new_text
 
     def is_line_bellow_half_wrap_limit(self, new_lines, subsequent_indent_length):
-        return len( new_lines[-1] ) - subsequent_indent_length \
+        return self._measure( new_lines[-1] ) - subsequent_indent_length \
             < math.floor( ( self._width - subsequent_indent_length ) / 1.8 )
 
     def is_there_line_over_the_wrap_limit(self, new_lines):
@@ -1057,7 +2358,7 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         """
         for new_line in new_lines:
 
-            if len( new_line ) > self._width:
+            if self._measure( new_line ) > self._width:
                 return True
 
         return False
@@ -1073,12 +2374,11 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
 
         for new_line in new_lines:
             longest = -1
-            line_length = len( new_line )
+            line_length = self._measure( new_line )
             line_percent_size = math.ceil( line_length / maximumwidth )
 
             for match in not_spaces_pattern.finditer( new_line ):
-                start, end = match.span()
-                length = end - start
+                length = self._word_length( match.group() )
 
                 if length > longest:
                     longest = length
@@ -1096,6 +2396,33 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         log( 4, 'FALSE' )
         return False
 
+    def _word_length(self, word):
+        """
+            The columns of the longest part of a word the line breaking does not split, which is the
+            whole word, unless `WrapPlus.unicode_line_break` splits it, e.g., on Chinese text, or
+            `WrapPlus.hyphenation_patterns` hyphenates it, counting the hyphen.
+        """
+        if not self._unicode_line_break and self._hyphenator is None:
+            return len( word )
+
+        segments = [word]
+
+        if self._unicode_line_break:
+            from . import line_break
+            segments = line_break.split_segments( word )
+
+        if self._hyphenator is not None:
+            pieces = []
+
+            for segment in segments:
+                segment_pieces = self._hyphenator.split( segment )
+                pieces.extend( piece + '-' for piece in segment_pieces[:-1] )
+                pieces.append( segment_pieces[-1] )
+
+            segments = pieces
+
+        return max( self._measure( segment ) for segment in segments )
+
     def is_there_big_word_on_line(self, line, new_width):
         """
             Check whether there is some big word on the line.
@@ -1106,8 +2433,7 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         wordlimit = new_width * 0.5
 
         for match in not_spaces_pattern.finditer( line ):
-            start, end = match.span()
-            length = end - start
+            length = self._word_length( match.group() )
 
             if length > longest:
                 longest = length
@@ -1179,9 +2505,9 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         subsequent_indent_length = len( subsequent_indent )
 
         lines_count = 0
-        line_length = len( line ) + initial_indent_length
+        line_length = self._measure( line ) + initial_indent_length
 
-        new_line_length  = len( line ) + initial_indent_length
+        new_line_length  = self._measure( line ) + initial_indent_length
         last_line_length = 0
 
         while last_line_length != new_line_length \
@@ -1223,6 +2549,19 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         text        = ' '.join(paragraph_lines)
         text_length = len(text)
 
+        if self._unicode_line_break or self._hyphenator is not None:
+            text = '\n'.join( paragraph_lines )
+
+            if self._unicode_line_break:
+                from . import line_break
+                text = line_break.join_wide_lines( text )
+
+            if self._hyphenator is not None:
+                text = self._hyphenator.join_lines( text, self._join_hyphenated )
+
+            text        = text.replace( '\n', ' ' )
+            text_length = len(text)
+
         minimum_line_size = int( self._width * minimum_line_size_percent )
         log( 4, "minimum_line_size %s", minimum_line_size )
 
@@ -1507,22 +2846,472 @@ class WrapLinesPlusCommand(sublime_plugin.TextCommand):
         return text
 
 
+class WrapPreview(object):
+    """Show the selected paragraphs wrapped at a width as phantoms below them,
+    with their line counts, without modifying the view.
+
+    The paragraphs, their prefixes and the chunks of their text are found once,
+    so each new width only breaks their lines again, and only for the
+    paragraphs on the screen, so it costs the same on any selection size.
+    """
+
+    def __init__(self, view, line_wrap_type=None):
+        self.view = view
+        self.line_wrap_type = line_wrap_type
+        self.command = WrapLinesPlusCommand(view)
+        self.command._prepare_wrap(0, line_wrap_type)
+
+        selections = view.sel()
+        paragraphs = self.command._find_selections_paragraphs(selections) if selections else []
+
+        self.prefixed = [(paragraph, self.command._extract_prefix(paragraph)) for paragraph in paragraphs]
+        self.wrapper = self.command._make_text_wrapper(cache_chunks=True)
+        self.phantoms = sublime.PhantomSet(view, preview_key)
+
+    def update(self, width):
+        """Preview the wrapping of the visible paragraphs at a width, replacing
+        the last preview.
+        """
+        line_wrapper_type = self.command._prepare_wrap(width, self.line_wrap_type)
+        visible_region = self.view.visible_region()
+        phantoms = []
+        lines_count = 0
+        wrapped_lines_count = 0
+
+        for paragraph, (initial_indent, subsequent_indent, lines) in self.prefixed:
+
+            if paragraph.region.end() < visible_region.begin() or paragraph.region.begin() > visible_region.end():
+                continue
+
+            # The wrappers change the width and the indents of the shared text wrapper
+            self.wrapper.width = self.command._width
+            self.wrapper.initial_indent = self.wrapper.subsequent_indent = ''
+
+            wrapped_lines = line_wrapper_type(lines, initial_indent, subsequent_indent, self.wrapper).splitlines()
+            lines_count += len(lines)
+            wrapped_lines_count += len(wrapped_lines)
+
+            phantoms.append(sublime.Phantom(sublime.Region(paragraph.region.end()),
+                    self._render(wrapped_lines, len(lines)), sublime.LAYOUT_BLOCK))
+
+        self.phantoms.update(phantoms)
+        sublime.status_message("Wrap Plus: the %s visible lines wrapped at %s would take %s lines"
+                               % (lines_count, width, wrapped_lines_count))
+
+    def erase(self):
+        self.phantoms.update([])
+
+    @staticmethod
+    def _render(wrapped_lines, lines_count):
+        body = '<br>'.join(html.escape(line).replace(' ', '&nbsp;') for line in wrapped_lines)
+        return ('<body id="wrap-plus-preview"><div><b>%s &rarr; %s lines</b></div><div>%s</div></body>'
+                % (lines_count, len(wrapped_lines), body))
+
+
 last_used_width = 80
 
 class WrapLinesEnhancementAskCommand(sublime_plugin.TextCommand):
+    """Ask the wrap width on an input panel, previewing the wrapping of the
+    selected paragraphs at the width typed, a moment after the last keystroke,
+    until it is confirmed or cancelled.
+    """
+
+    preview = None
 
     def run(self, edit, line_wrap_type=None):
         self.line_wrap_type = line_wrap_type
+        self.preview = WrapPreview(self.view, line_wrap_type)
+        self.change_count = 0
 
         view = sublime.active_window().show_input_panel(
             'Provide wrapping width', str( last_used_width ),
-            self.input_package, None, None
+            self.input_package, self.on_change, self.on_cancel
         )
         view.run_command("select_all")
+        self.on_change( str( last_used_width ) )
+
+    def on_change(self, width):
+        self.change_count += 1
+        change_count = self.change_count
+
+        delay = self.view.settings().get( 'WrapPlus.preview_delay_ms', 50 )
+        sublime.set_timeout( lambda: self._update_preview( width, change_count ), delay )
+
+    def _update_preview(self, width, change_count):
+        # Some later keystroke scheduled its own preview, or the panel was closed
+        if self.preview is None or change_count != self.change_count:
+            return
+
+        try:
+            width = int( width )
+
+        except ValueError:
+            width = 0
+
+        if width > 0:
+            self.preview.update( width )
+
+        else:
+            self.preview.erase()
+
+    def on_cancel(self):
+        self._close_preview()
+
+    def _close_preview(self):
+        if self.preview:
+            self.preview.erase()
+            self.preview = None
 
     def input_package(self, width):
         global last_used_width
 
+        self._close_preview()
         last_used_width = width
         self.view.run_command( 'wrap_lines_plus', { 'width': int( width ), "line_wrap_type": self.line_wrap_type } )
 
+
+class WrapPlusModifiedLinesListener(sublime_plugin.EventListener):
+    """Record the lines edited since the file was last saved, as regions which
+    follow the later edits, for `wrap_lines_plus` with `modified_only`.
+
+    With `WrapPlus.wrap_on_save`, the comments and prose paragraphs with some
+    of these lines are wrapped right before saving, on a single edit.
+    """
+
+    def __init__(self):
+        # The count of lines of each view after its last edit, for finding
+        # the lines added by the next one
+        self.line_counts = {}
+
+    def on_activated(self, view):
+        self.line_counts[view.id()] = count_lines(view)
+
+    def on_modified(self, view):
+        if view.settings().get('is_widget'):
+            return
+
+        line_count = count_lines(view)
+        delta = line_count - self.line_counts.get(view.id(), line_count)
+        self.line_counts[view.id()] = line_count
+
+        regions = view.get_regions(modified_lines_key)
+        changed = False
+
+        for lines in edited_regions(view, delta):
+
+            if not any(region.contains(lines) for region in regions):
+                regions.append(lines)
+                changed = True
+
+        if changed:
+            view.add_regions(modified_lines_key, self._merge_regions(regions), '', '', sublime.HIDDEN)
+
+    def on_pre_save(self, view):
+        if view.settings().get('WrapPlus.wrap_on_save', False) and view.get_regions(modified_lines_key):
+            view.run_command('wrap_lines_plus', {'on_save': True})
+
+    def on_post_save(self, view):
+        view.erase_regions(modified_lines_key)
+        self.line_counts[view.id()] = count_lines(view)
+
+    def on_close(self, view):
+        self.line_counts.pop(view.id(), None)
+
+    @staticmethod
+    def _merge_regions(regions):
+        merged = []
+
+        for region in sorted(regions, key=lambda region: (region.begin(), region.end())):
+
+            if merged and region.begin() <= merged[-1].end():
+                merged[-1] = merged[-1].cover(region)
+
+            else:
+                merged.append(region)
+
+        return merged
+
+
+class WrapPlusParagraphIndexListener(sublime_plugin.EventListener):
+    """Keep the `ParagraphIndex` of each view up to date with the edits, and
+    drop it when the view closes.
+    """
+
+    def on_modified(self, view):
+        index = paragraph_indexes.get(view.id())
+
+        if index is None or not index.built:
+            return
+
+        delta = count_lines(view) - index.line_count
+
+        # With several carets, it is not known how many lines each one changed
+        if delta and len(view.sel()) != 1:
+            index.rows = None
+            return
+
+        for first_row, last_row in edited_rows(view, delta):
+
+            if first_row < 0:
+                index.rows = None
+                return
+
+            index.edited(view, first_row, last_row - delta, last_row)
+            delta = 0
+
+    def on_close(self, view):
+        paragraph_indexes.pop(view.id(), None)
+
+
+class WrapPlusAutoWrapListener(sublime_plugin.EventListener):
+    """With `WrapPlus.auto_wrap`, reflow the paragraph of the caret from the
+    edited line on, after `WrapPlus.auto_wrap_delay_ms` milliseconds without
+    other edits, when that line gets longer than the wrap width.
+
+    Each keystroke only measures the line of the caret, so typing costs the
+    same on any file size.
+    """
+
+    def __init__(self):
+        # The change count of each view after its last reflow, and the view
+        # being reflowed, to ignore the edits made by the reflow
+        self.wrapped_change_counts = {}
+        self.wrapping_view_id = None
+
+    def on_modified(self, view):
+        settings = view.settings()
+
+        if not settings.get('WrapPlus.auto_wrap', False) or settings.get('is_widget'):
+            return
+
+        change_count = view.change_count()
+        selections = view.sel()
+
+        if view.id() == self.wrapping_view_id or self.wrapped_change_counts.get(view.id()) == change_count \
+                or len(selections) != 1 or not selections[0].empty():
+            return
+
+        caret = selections[0].b
+
+        if not self._is_over_width(view, caret):
+            return
+
+        delay = settings.get('WrapPlus.auto_wrap_delay_ms', 250)
+        sublime.set_timeout(lambda: self._auto_wrap(view, change_count), delay)
+
+    def on_close(self, view):
+        self.wrapped_change_counts.pop(view.id(), None)
+
+    @staticmethod
+    def _is_over_width(view, caret):
+        line = view.line(caret)
+        command = WrapLinesPlusCommand(view)
+        width = command._determine_width(0)
+        command._determine_tab_size()
+        command._determine_measure()
+
+        # The line is only sliced out when its tabs or wide characters could make it over the width
+        if line.size() * command._maximum_character_width() <= width or command._width_in_spaces(view.substr(line)) <= width:
+            return False
+
+        return view.score_selector(caret, prose_selector) > 0 \
+                or view.score_selector(max(caret - 1, line.begin()), prose_selector) > 0
+
+    def _auto_wrap(self, view, change_count):
+        # Some later edit scheduled its own reflow
+        if not view.is_valid() or view.change_count() != change_count:
+            return
+
+        self.wrapping_view_id = view.id()
+
+        try:
+            view.run_command('wrap_lines_plus', {'auto_wrap': True})
+
+        finally:
+            self.wrapping_view_id = None
+
+        self.wrapped_change_counts[view.id()] = view.change_count()
+
+
+# The views with their over width paragraphs highlighted, which are updated
+# only around the edited lines from then on
+over_width_views = set()
+
+# The (command, width) of each highlighted view, kept until its settings change
+over_width_commands = {}
+
+
+def _over_width_command(view):
+    """:returns: A (command, width) tuple, with a command prepared to find the
+        paragraphs of the view, and the wrap width of its lines.
+    """
+    prepared = over_width_commands.get(view.id())
+
+    if prepared is None:
+        command = WrapLinesPlusCommand(view)
+        command._prepare_wrap()
+
+        # Not the width widened for the semantic wrapping
+        prepared = over_width_commands[view.id()] = (command, command._determine_width(0))
+
+        settings = view.settings()
+        settings.clear_on_change(over_width_key)
+        settings.add_on_change(over_width_key, lambda: over_width_commands.pop(view.id(), None))
+
+    else:
+        # Some other view may have been wrapped with other patterns
+        prepared[0]._load_patterns()
+
+    return prepared
+
+
+def _forget_over_width_command(view):
+    over_width_commands.pop(view.id(), None)
+    view.settings().clear_on_change(over_width_key)
+
+
+def _over_width_paragraphs(command, width, lines):
+    """:returns: The regions of the prose paragraphs with some of the `lines`,
+        sorted, which have some line over the wrap width.
+    """
+    view = command.view
+    regions = []
+    maximum_character_width = command._maximum_character_width()
+
+    def is_over_width(line):
+        return line.size() * maximum_character_width > width and command._width_in_spaces(view.substr(line)) > width
+
+    for paragraph in command._find_selections_paragraphs(command._lines_carets(lines)):
+
+        if view.score_selector(command._first_word_point(paragraph), prose_selector) > 0 \
+                and any(is_over_width(line) for line in view.lines(paragraph.region)):
+            regions.append(paragraph.region)
+
+    return regions
+
+
+def _show_over_width(view, regions):
+    view.add_regions(over_width_key, regions, 'invalid', 'dot', sublime.DRAW_NO_FILL)
+
+
+def highlight_over_width(view):
+    """Highlight all the paragraphs over the wrap width, scanning the whole view."""
+    command, width = _over_width_command(view)
+    tab = view.find('\t', 0, sublime.LITERAL)
+
+    # Each tab is at most `tab_size` spaces wide, and each wide character two
+    if tab is not None and tab.begin() > -1:
+        minimum_size = width // command._maximum_character_width() + 1
+
+    else:
+        minimum_size = width // (2 if command._unicode_line_break else 1) + 1
+    lines = view.find_all('^.{%d,}$' % minimum_size)
+    _show_over_width(view, _over_width_paragraphs(command, width, lines))
+    over_width_views.add(view.id())
+
+
+def update_over_width(view, regions):
+    """Check again only the paragraphs with some line on the `regions`, and the
+    highlighted ones next to them, keeping the other highlights as they are.
+    """
+    command, width = _over_width_command(view)
+    lines = [view.line(region) for region in regions]
+    highlights = view.get_regions(over_width_key)
+
+    touched = set()
+
+    for line in lines:
+        # The highlights are added sorted and do not overlap, so their ends are sorted too
+        index, high = 0, len(highlights)
+
+        while index < high:
+            middle = (index + high) // 2
+
+            if highlights[middle].end() < line.begin() - 1:
+                index = middle + 1
+
+            else:
+                high = middle
+
+        # The paragraphs just before or after an edited line may have merged with it
+        while index < len(highlights) and highlights[index].begin() <= line.end() + 1:
+            touched.add(index)
+            index += 1
+
+    lines.extend(highlights[index] for index in touched)
+    lines.sort(key=lambda region: region.begin())
+    checked = _over_width_paragraphs(command, width, lines)
+
+    if checked == [highlights[index] for index in sorted(touched)]:
+        return
+
+    kept = []
+    checked_index = 0
+
+    for index, highlight in enumerate(highlights):
+
+        if index in touched:
+            continue
+
+        while checked_index < len(checked) and checked[checked_index].end() <= highlight.begin():
+            checked_index += 1
+
+        if checked_index < len(checked) and checked[checked_index].begin() < highlight.end():
+            continue
+
+        kept.append(highlight)
+
+    _show_over_width(view, sorted(kept + checked, key=lambda region: region.begin()))
+
+
+class WrapPlusOverWidthListener(sublime_plugin.EventListener):
+    """With `WrapPlus.highlight_over_width`, highlight the paragraphs of the
+    comments, docstrings and text with some line over the wrap width.
+
+    The whole view is scanned when it is first activated.  Then the highlights
+    are regions added to the view, which follow the edits, and each edit only
+    checks again the paragraphs of the edited lines.
+    """
+
+    def __init__(self):
+        # The count of lines of each highlighted view after its last edit, for
+        # finding the lines added by the next one
+        self.line_counts = {}
+
+    def on_activated(self, view):
+        if view.settings().get('is_widget'):
+            return
+
+        if view.settings().get('WrapPlus.highlight_over_width', False):
+
+            # Some setting of the preferences may have changed meanwhile
+            _forget_over_width_command(view)
+
+            if view.id() not in over_width_views:
+                highlight_over_width(view)
+                self.line_counts[view.id()] = count_lines(view)
+
+        else:
+            self.on_close(view)
+
+    def on_modified(self, view):
+        if view.id() not in over_width_views:
+            return
+
+        if not view.settings().get('WrapPlus.highlight_over_width', False):
+            self.on_close(view)
+            return
+
+        line_count = count_lines(view)
+        delta = line_count - self.line_counts.get(view.id(), line_count)
+        self.line_counts[view.id()] = line_count
+
+        update_over_width(view, edited_regions(view, delta))
+
+    def on_close(self, view):
+        self.line_counts.pop(view.id(), None)
+        _forget_over_width_command(view)
+
+        if view.id() in over_width_views:
+            over_width_views.discard(view.id())
+            view.erase_regions(over_width_key)